@@ -1,7 +1,16 @@
-import redis
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError, ResponseError, WatchError
+except ImportError:
+    aioredis = None
+    RedisError = ResponseError = Exception
+    from app.core.redis_stub import WatchError
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
 import os
 import json
+import uuid
 import logging
+from app.core.redis_stub import AsyncInMemoryRedis
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,27 +18,241 @@ logger = logging.getLogger(__name__)
 class CacheManager:
     """
     Manages caching for frequent queries using Redis.
+
+    Async throughout (redis.asyncio), so handlers never block the event loop.
+    Connections come from a bounded pool with short socket timeouts; a slow
+    or unreachable Redis turns into cache misses rather than failed requests.
+
+    Entries can be registered under tags (e.g. "stories", "user:<id>"), kept
+    as Redis sets of keys, so a write can drop every response it made stale
+    with invalidate(tag) instead of waiting for the TTL.
+
+    Each tag also has a generation counter that invalidate() bumps. A
+    response computed after a miss from get_with_generation() is stored
+    only if its tags' generations are unchanged, so a page read before a
+    concurrent write's invalidation is not re-cached for a full TTL.
     """
-    
-    def __init__(self):
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    def __init__(self, client=None, key_prefix: str = "cache:", default_ttl: int = 3600,
+                 batch_size: int = 500):
+        """
+        Args:
+            client: redis.asyncio.Redis (or AsyncInMemoryRedis in tests);
+                    None disables caching.
+            key_prefix: Namespace for cache keys.
+            default_ttl: Seconds before entries expire.
+            batch_size: Keys per SSCAN/SCAN page and per UNLINK during invalidation.
+        """
+        self.redis = client
+        self.key_prefix = key_prefix
+        self.default_ttl = default_ttl
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_url(cls,
+                 redis_url: Optional[str] = None,
+                 max_connections: int = 20,
+                 pool_timeout: float = 1.0,
+                 socket_timeout: float = 0.5,
+                 **kwargs) -> "CacheManager":
+        """
+        Build a manager on an explicit BlockingConnectionPool: at most
+        `max_connections` sockets, waiting up to `pool_timeout` seconds for a
+        free one, and `socket_timeout` seconds for connects and replies.
+        """
+        redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        if not aioredis:
+            logger.warning("redis is not installed. Caching disabled.")
+            return cls(None, **kwargs)
         try:
-            self.redis = redis.from_url(redis_url)
+            pool = aioredis.BlockingConnectionPool.from_url(
+                redis_url,
+                max_connections=max_connections,
+                timeout=pool_timeout,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+                health_check_interval=30,
+            )
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}. Caching disabled.")
-            self.redis = None
+            return cls(None, **kwargs)
+        return cls(aioredis.Redis(connection_pool=pool), **kwargs)
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}tag:{tag}"
 
-    def get(self, key: str):
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.key_prefix}gen:{tag}"
+
+    def _register(self, pipe, keys: Iterable[str], tags: Iterable[str], ttl: int):
+        full_keys = [self._key(k) for k in keys]
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, *full_keys)
+            # The tag set lives as long as its longest-lived entry
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+
+    async def get(self, key: str) -> Optional[Any]:
         if not self.redis: return None
-        val = self.redis.get(key)
+        try:
+            val = await self.redis.get(self._key(key))
+        except RedisError as e:
+            logger.warning(f"Cache get failed: {e}")
+            return None
         if val:
             return json.loads(val)
         return None
 
-    def set(self, key: str, value: dict, expire: int = 3600):
-        if not self.redis: return
-        self.redis.setex(key, expire, json.dumps(value))
+    async def get_with_generation(self, key: str, tags: Iterable[str]) -> Tuple[Optional[Any], Optional[tuple]]:
+        """
+        get() plus, in the same MGET, the current generation of `tags`. Pass
+        the generation to set()/set_many() when caching the value computed
+        after a miss.
+        """
+        tags = list(tags)
+        if not self.redis: return None, None
+        try:
+            val, *generation = await self.redis.mget([self._key(key), *map(self._generation_key, tags)])
+        except RedisError as e:
+            logger.warning(f"Cache get failed: {e}")
+            return None, None
+        return (json.loads(val) if val else None), tuple(generation)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        One MGET round trip; returns only the keys that were cached.
+        """
+        keys = list(keys)
+        if not self.redis or not keys: return {}
+        try:
+            values = await self.redis.mget([self._key(k) for k in keys])
+        except RedisError as e:
+            logger.warning(f"Cache get failed: {e}")
+            return {}
+        return {k: json.loads(v) for k, v in zip(keys, values) if v}
+
+    async def set(self, key: str, value: Any, expire: Optional[int] = None, tags: Iterable[str] = (),
+                  generation: Optional[tuple] = None):
+        await self.set_many({key: value}, expire=expire, tags=tags, generation=generation)
 
-    def invalidate(self, key_pattern: str):
-        # advanced logic for pattern matching deletion
-        pass
+    async def set_many(self, items: Dict[str, Any], expire: Optional[int] = None, tags: Iterable[str] = (),
+                       generation: Optional[tuple] = None):
+        """
+        Store several entries in one pipelined round trip. (MSET cannot set a
+        TTL, so this pipelines one SET EX per entry.)
+        With a `generation` from get_with_generation() (same tags), nothing is
+        stored if any of the tags was invalidated since.
+        """
+        if not self.redis or not items: return
+        tags = list(tags)
+        ttl = expire or self.default_ttl
+        try:
+            if generation is None:
+                pipe = self.redis.pipeline(transaction=False)
+                self._queue_set(pipe, items, tags, ttl)
+                await pipe.execute()
+                return
+            generation_keys = [self._generation_key(tag) for tag in tags]
+            async with self.redis.pipeline(transaction=True) as pipe:
+                # An invalidate() between the check and EXEC aborts the write
+                await pipe.watch(*generation_keys)
+                if tuple(await pipe.mget(generation_keys)) != tuple(generation):
+                    return
+                pipe.multi()
+                self._queue_set(pipe, items, tags, ttl)
+                await pipe.execute()
+        except WatchError:
+            pass  # invalidated while storing: the value may be stale
+        except RedisError as e:
+            logger.warning(f"Cache set failed: {e}")
+
+    def _queue_set(self, pipe, items: Dict[str, Any], tags: Iterable[str], ttl: int):
+        for key, value in items.items():
+            pipe.set(self._key(key), json.dumps(value), ex=ttl)
+        self._register(pipe, items, tags, ttl)
+
+    async def delete(self, *keys: str) -> int:
+        if not self.redis or not keys: return 0
+        try:
+            return await self.redis.unlink(*(self._key(k) for k in keys))
+        except RedisError as e:
+            logger.warning(f"Cache delete failed: {e}")
+            return 0
+
+    async def invalidate(self, *tags: str, pattern: Optional[str] = None) -> int:
+        """
+        Drop every entry registered under any of `tags`, and every key
+        matching the glob `pattern` (relative to key_prefix, e.g. "story:*").
+        Keys are read with SSCAN/SCAN and removed with UNLINK, `batch_size`
+        at a time, so a big tag or keyspace never stalls Redis the way KEYS
+        or one huge DEL would. Returns the number of entries removed.
+        """
+        if not self.redis: return 0
+        removed = 0
+        try:
+            if tags:
+                # Bump generations first, so writes of values read before
+                # this point are refused from now on
+                pipe = self.redis.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._generation_key(tag))
+                    pipe.expire(self._generation_key(tag), self.default_ttl)
+                await pipe.execute()
+            for tag in tags:
+                removed += await self._invalidate_tag(tag)
+            if pattern is not None:
+                removed += await self._unlink_batches(
+                    self.redis.scan_iter(match=self._key(pattern), count=self.batch_size))
+        except RedisError as e:
+            logger.warning(f"Cache invalidation failed: {e}")
+        return removed
+
+    async def _invalidate_tag(self, tag: str) -> int:
+        tag_key = self._tag_key(tag)
+        # Move the set aside first: entries cached meanwhile register under a
+        # fresh set instead of being dropped from this one unseen
+        detached = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+        try:
+            await self.redis.rename(tag_key, detached)
+        except ResponseError:  # no entries under this tag
+            return 0
+        removed = await self._unlink_batches(self.redis.sscan_iter(detached, count=self.batch_size))
+        await self.redis.unlink(detached)
+        return removed
+
+    async def _unlink_batches(self, keys: AsyncIterator[bytes]) -> int:
+        removed, batch = 0, []
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= self.batch_size:
+                removed += await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            removed += await self.redis.unlink(*batch)
+        return removed
+
+    async def close(self):
+        """
+        Close the client and disconnect its connection pool (from_url passes
+        an explicit pool, which aclose() alone would leave open).
+        """
+        if self.redis:
+            await self.redis.aclose(close_connection_pool=True)
+
+def create_cache() -> CacheManager:
+    """
+    Build the response cache selected by CACHE_BACKEND: "redis" (shared by
+    every worker), "local" (in-process; only safe with a single worker, since
+    other workers never see its invalidations) or "none". When unset, Redis
+    is used if REDIS_URL is configured, otherwise caching is off.
+    """
+    backend = os.getenv("CACHE_BACKEND") or ("redis" if os.getenv("REDIS_URL") else "none")
+    if backend == "redis":
+        return CacheManager.from_url()
+    if backend == "none":
+        return CacheManager(None)
+    return CacheManager(AsyncInMemoryRedis())
@@ -0,0 +1,473 @@
+try:
+    from redis.exceptions import ResponseError, WatchError
+except ImportError:
+    class WatchError(Exception):
+        pass
+
+    class ResponseError(Exception):
+        pass
+from fnmatch import fnmatchcase
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+class InMemoryRedis:
+    """
+    In-process stand-in for the subset of the redis-py client used by the app.
+    Values are stored as bytes, keys expire lazily, and WATCH/MULTI/EXEC
+    transactions fail with WatchError when a watched key changed, mirroring Redis.
+    SCAN cursors follow key creation order, so keys that exist for the whole
+    iteration are returned even while others are deleted, as in Redis.
+    Intended for tests and local development without a Redis server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expiry: Dict[str, float] = {}
+        self._revisions: Dict[str, int] = {}  # bumped on every write, drives WATCH
+        self._created: Dict[str, int] = {}    # creation sequence, drives SCAN cursors
+        self._sequence = count(1)
+        self._lock = threading.RLock()
+
+    # -- internals -------------------------------------------------------
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _alive(self, key: str) -> bool:
+        deadline = self._expiry.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+            self._touch(key)
+        return key in self._data
+
+    def _touch(self, key: str):
+        self._revisions[key] = self._revisions.get(key, 0) + 1
+        if key not in self._data:
+            self._created.pop(key, None)
+        elif key not in self._created:
+            self._created[key] = next(self._sequence)
+
+    def _revision(self, key: str) -> int:
+        with self._lock:
+            self._alive(key)
+            return self._revisions.get(key, 0)
+
+    # -- strings ---------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = self._encode(value)
+            self._expiry.pop(key, None)
+            if ex is not None:
+                self._expiry[key] = time.monotonic() + ex
+            self._touch(key)
+            return True
+
+    def setex(self, key: str, time_seconds: int, value) -> bool:
+        return self.set(key, value, ex=time_seconds)
+
+    def mget(self, keys, *args) -> List[Optional[bytes]]:
+        keys = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[str, Any]) -> bool:
+        with self._lock:
+            for key, value in mapping.items():
+                self.set(key, value)
+            return True
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        # Like Redis, keeps the key's TTL
+        with self._lock:
+            current = int(self.get(key) or 0) + amount
+            deadline = self._expiry.get(key) if self._alive(key) else None
+            self.set(key, current)
+            if deadline is not None:
+                self._expiry[key] = deadline
+            return current
+
+    # -- hashes ----------------------------------------------------------
+
+    def hset(self, key: str, field: str = None, value=None, mapping: Dict[str, Any] = None) -> int:
+        with self._lock:
+            if self._alive(key):
+                stored = self._data[key]
+            else:
+                stored = self._data[key] = {}
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            added = sum(1 for f in items if f not in stored)
+            for f, v in items.items():
+                stored[f] = self._encode(v)
+            self._touch(key)
+            return added
+
+    def hget(self, key: str, field: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data[key].get(field) if self._alive(key) else None
+
+    def hmget(self, key: str, *fields) -> List[Optional[bytes]]:
+        if len(fields) == 1 and isinstance(fields[0], (list, tuple)):
+            fields = fields[0]
+        with self._lock:
+            stored = self._data[key] if self._alive(key) else {}
+            return [stored.get(f) for f in fields]
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            current = int(self.hget(key, field) or 0) + amount
+            self.hset(key, field, current)
+            return current
+
+    # -- lists -----------------------------------------------------------
+
+    def rpush(self, key: str, *values) -> int:
+        with self._lock:
+            if self._alive(key):
+                stored = self._data[key]
+            else:
+                stored = self._data[key] = []
+            stored.extend(self._encode(v) for v in values)
+            self._touch(key)
+            return len(stored)
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._lock:
+            if not self._alive(key):
+                return []
+            stored = self._data[key]
+            # Redis ranges are inclusive; negative indexes count from the end
+            end = len(stored) if end == -1 else end + 1
+            return list(stored[start:end])
+
+    def llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._data[key]) if self._alive(key) else 0
+
+    # -- sorted sets -----------------------------------------------------
+
+    def zadd(self, key: str, mapping: Dict[Any, float], xx: bool = False) -> int:
+        with self._lock:
+            if self._alive(key):
+                stored = self._data[key]
+            elif xx:
+                return 0
+            else:
+                stored = self._data[key] = {}
+            encoded = {self._encode(m): float(score) for m, score in mapping.items()}
+            if xx:
+                encoded = {m: score for m, score in encoded.items() if m in stored}
+            added = sum(1 for m in encoded if m not in stored)
+            stored.update(encoded)
+            self._touch(key)
+            return added
+
+    def zscore(self, key: str, member) -> Optional[float]:
+        with self._lock:
+            return self._data[key].get(self._encode(member)) if self._alive(key) else None
+
+    def zrangebyscore(self, key: str, min, max, start: Optional[int] = None,
+                      num: Optional[int] = None) -> List[bytes]:
+        low = float("-inf") if min == "-inf" else float(min)
+        high = float("inf") if max == "+inf" else float(max)
+        with self._lock:
+            if not self._alive(key):
+                return []
+            members = sorted((score, m) for m, score in self._data[key].items() if low <= score <= high)
+            members = [m for _, m in members]
+            if start is not None:
+                members = members[start:start + num if num is not None else None]
+            return members
+
+    def zrem(self, key: str, *members) -> int:
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            stored = self._data[key]
+            removed = sum(1 for m in members if stored.pop(self._encode(m), None) is not None)
+            if not stored:
+                del self._data[key]
+            self._touch(key)
+            return removed
+
+    # -- sets ------------------------------------------------------------
+
+    def sadd(self, key: str, *members) -> int:
+        with self._lock:
+            if self._alive(key):
+                stored = self._data[key]
+            else:
+                stored = self._data[key] = set()
+            encoded = {self._encode(m) for m in members}
+            added = len(encoded - stored)
+            stored |= encoded
+            self._touch(key)
+            return added
+
+    def srem(self, key: str, *members) -> int:
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            stored = self._data[key]
+            encoded = {self._encode(m) for m in members}
+            removed = len(encoded & stored)
+            stored -= encoded
+            if not stored:
+                del self._data[key]
+                self._expiry.pop(key, None)
+            self._touch(key)
+            return removed
+
+    def smembers(self, key: str) -> set:
+        with self._lock:
+            return set(self._data[key]) if self._alive(key) else set()
+
+    def scard(self, key: str) -> int:
+        with self._lock:
+            return len(self._data[key]) if self._alive(key) else 0
+
+    def sscan(self, key: str, cursor: int = 0, match: Optional[str] = None,
+              count: Optional[int] = None) -> Tuple[int, List[bytes]]:
+        """
+        Members in sorted order; the cursor is a position in that order.
+        """
+        with self._lock:
+            members = sorted(self._data[key]) if self._alive(key) else []
+        page = members[cursor:cursor + (count or 10)]
+        next_cursor = cursor + len(page) if cursor + len(page) < len(members) else 0
+        if match is not None:
+            page = [m for m in page if fnmatchcase(m.decode(), match)]
+        return next_cursor, page
+
+    def sscan_iter(self, key: str, match: Optional[str] = None, count: Optional[int] = None) -> Iterable[bytes]:
+        cursor = None
+        while cursor != 0:
+            cursor, members = self.sscan(key, cursor or 0, match=match, count=count)
+            yield from members
+
+    # -- keys ------------------------------------------------------------
+
+    def scan(self, cursor: int = 0, match: Optional[str] = None,
+             count: Optional[int] = None) -> Tuple[int, List[bytes]]:
+        """
+        Like SCAN: up to `count` (default 10) keys per call, filtered by
+        `match` after paging, and a cursor of 0 once the iteration is over.
+        """
+        with self._lock:
+            for key in list(self._data):
+                self._alive(key)
+            ordered = sorted((seq, key) for key, seq in self._created.items() if seq >= cursor)
+        page = ordered[:count or 10]
+        next_cursor = ordered[len(page)][0] if len(page) < len(ordered) else 0
+        keys = [key for _, key in page if match is None or fnmatchcase(key, match)]
+        return next_cursor, [key.encode() for key in keys]
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Iterable[bytes]:
+        cursor = None
+        while cursor != 0:
+            cursor, keys = self.scan(cursor or 0, match=match, count=count)
+            yield from keys
+
+    def exists(self, *keys) -> int:
+        with self._lock:
+            return sum(1 for k in keys if self._alive(k))
+
+    def delete(self, *keys) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                key = key.decode() if isinstance(key, bytes) else key  # as returned by SCAN
+                if self._alive(key):
+                    del self._data[key]
+                    self._expiry.pop(key, None)
+                    self._touch(key)
+                    removed += 1
+            return removed
+
+    def unlink(self, *keys) -> int:
+        return self.delete(*keys)
+
+    def rename(self, src: str, dst: str) -> bool:
+        with self._lock:
+            if not self._alive(src):
+                raise ResponseError("no such key")
+            self.delete(dst)
+            self._data[dst] = self._data.pop(src)
+            if src in self._expiry:
+                self._expiry[dst] = self._expiry.pop(src)
+            self._touch(src)
+            self._touch(dst)
+            return True
+
+    def expire(self, key: str, seconds: int, nx: bool = False, xx: bool = False,
+               gt: bool = False, lt: bool = False) -> bool:
+        with self._lock:
+            if not self._alive(key):
+                return False
+            current = self._expiry.get(key)
+            deadline = time.monotonic() + seconds
+            # A key without a TTL counts as an infinite one for GT/LT, as in Redis
+            if (nx and current is not None) or (xx and current is None) \
+                    or (gt and (current is None or deadline <= current)) \
+                    or (lt and current is not None and deadline >= current):
+                return False
+            self._expiry[key] = deadline
+            return True
+
+    def ttl(self, key: str) -> int:
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            deadline = self._expiry.get(key)
+            return -1 if deadline is None else max(int(deadline - time.monotonic()), 0)
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            for key in list(self._data):
+                self._touch(key)
+            self._data.clear()
+            self._expiry.clear()
+            self._created.clear()
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self, transaction)
+
+class InMemoryPipeline:
+    """
+    Pipeline for InMemoryRedis with redis-py semantics: commands issued after
+    watch() and before multi() run immediately; everything else is queued
+    until execute(), which applies the queue atomically.
+    """
+
+    def __init__(self, client: InMemoryRedis, transaction: bool = True):
+        self._client = client
+        self._transaction = transaction
+        self._queue: List[Tuple[str, tuple, dict]] = []
+        self._watched: Dict[str, int] = {}
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def watch(self, *keys):
+        for key in keys:
+            self._watched[key] = self._client._revision(key)
+        self._immediate = True
+
+    def multi(self):
+        self._immediate = False
+
+    def reset(self):
+        self._queue = []
+        self._watched = {}
+        self._immediate = False
+
+    def __getattr__(self, name: str):
+        command = getattr(self._client, name)
+
+        def call(*args, **kwargs):
+            if self._immediate:
+                return command(*args, **kwargs)
+            self._queue.append((name, args, kwargs))
+            return self
+
+        return call
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            try:
+                for key, revision in self._watched.items():
+                    if self._client._revision(key) != revision:
+                        raise WatchError("Watched variable changed.")
+                return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._queue]
+            finally:
+                self.reset()
+
+class AsyncInMemoryRedis:
+    """
+    redis.asyncio-style facade over InMemoryRedis: every command is awaitable,
+    pipelines queue commands synchronously and `await pipe.execute()`.
+    Pass an existing InMemoryRedis to share data with synchronous callers.
+    """
+
+    def __init__(self, client: Optional[InMemoryRedis] = None):
+        self.sync = client or InMemoryRedis()
+
+    def __getattr__(self, name: str):
+        command = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return call
+
+    async def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None):
+        for key in self.sync.scan_iter(match=match, count=count):
+            yield key
+
+    async def sscan_iter(self, name: str, match: Optional[str] = None, count: Optional[int] = None):
+        for member in self.sync.sscan_iter(name, match=match, count=count):
+            yield member
+
+    def pipeline(self, transaction: bool = True) -> "AsyncInMemoryPipeline":
+        return AsyncInMemoryPipeline(self.sync.pipeline(transaction))
+
+    async def aclose(self, close_connection_pool: Optional[bool] = None):
+        pass
+
+class AsyncInMemoryPipeline:
+    """
+    Async counterpart of InMemoryPipeline with redis.asyncio semantics:
+    queued commands return the pipeline without await, while watch() and
+    commands issued between watch() and multi() are awaited for their result.
+    """
+
+    def __init__(self, pipeline: InMemoryPipeline):
+        self._pipeline = pipeline
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._pipeline.reset()
+
+    async def watch(self, *keys):
+        self._pipeline.watch(*keys)
+
+    def multi(self):
+        self._pipeline.multi()
+
+    async def reset(self):
+        self._pipeline.reset()
+
+    def __getattr__(self, name: str):
+        command = getattr(self._pipeline, name)
+
+        def call(*args, **kwargs):
+            if self._pipeline._immediate:
+                async def immediate():
+                    return command(*args, **kwargs)
+                return immediate()
+            command(*args, **kwargs)
+            return self
+
+        return call
+
+    async def execute(self) -> List[Any]:
+        return self._pipeline.execute()
@@ -1,10 +1,37 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
+import asyncio
 import datetime
+import os
+import logging
+from app.models.job import Job
+from app.models.story import Story
+from app.models.conversation import Role
 
-app = FastAPI(title="Memory Keeper API", version="1.0.0")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def sweep_sessions_periodically(interval: float):
+    # Archives idle sessions before they expire; every worker may run one
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await context_manager.sweep_sessions()
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(
+        sweep_sessions_periodically(float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))))
+    yield
+    sweeper.cancel()
+    await cache.close()
+
+app = FastAPI(title="Memory Keeper API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
@@ -16,16 +43,6 @@ app.add_middleware(
 )
 
 # Mock Data Storage
-class Story(BaseModel):
-    id: str
-    title: str
-    date: str
-    duration: str
-    topics: List[str]
-    content: str  # The full text or summary
-    transcript: Optional[List[dict]] = None # List of {role, content}
-    audio_url: Optional[str] = None
-
 class DashboardStat(BaseModel):
     label: str
     value: str
@@ -33,6 +50,10 @@ class DashboardStat(BaseModel):
     color: str
     trend: str
 
+class StoryPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
 class TimelineEvent(BaseModel):
     year: int
     title: str
@@ -52,7 +73,7 @@ MOCK_STORIES = [
         id="1",
         title="Memories of the Old Dock",
         date="Mar 24, 2024",
-        duration="12 mins",
+        duration_seconds=720,
         topics=["Childhood", "Family", "Travel"],
         content="I remember the old dock down by the bay. We used to go there every summer. The wood was weathered and gray, smelling of salt and memories. My grandfather taught me how to fish there. We would sit for hours, just watching the bobbers dance on the water. It wasn't really about the fish, you know? It was about the silence, the shared peace. I can still hear the creaking of the wood and the gentle lap of the waves.",
         transcript=[
@@ -67,7 +88,7 @@ MOCK_STORIES = [
         id="2",
         title="The First Day of College",
         date="Mar 22, 2024",
-        duration="10 mins",
+        duration_seconds=600,
         topics=["Education", "Growth"],
         content="Walking onto campus for the first time felt like stepping into a new world. The buildings were so tall, covered in ivy. I was terrified but also exhilarated. I remember carrying a heavy suitcase up three flights of stairs to my dorm room. My roommate was already there, unpacking a collection of vintage records. That day marked the beginning of my independence.",
         audio_url="mock_audio_2.mp3"
@@ -76,16 +97,29 @@ MOCK_STORIES = [
         id="3",
         title="Our Wedding in Vermont",
         date="Mar 20, 2024",
-        duration="15 mins",
+        duration_seconds=900,
         topics=["Love", "Milestone", "Family"],
         content="It was a crisp autumn day. The leaves were turning shades of gold and crimson. We chose a small barn in Vermont for the ceremony. I remember the smell of apple cider and woodsmoke in the air. When I saw her walking down the aisle, everything else faded away. We wrote our own vows, promising to be each other's compass. It was the happiest day of my life.",
         audio_url="mock_audio_3.mp3"
     )
 ]
 
+from app.services.story_repository import create_story_repository
+# MOCK_STORIES is listed newest first; the repository is seeded oldest first
+story_repository = create_story_repository(seed=reversed(MOCK_STORIES))
+
 from app.services.conversation_manager import ContextManager
+from app.services.session_store import SessionConflictError
 context_manager = ContextManager()
 
+from app.core.cache import create_cache
+# Read-mostly responses; save_chat invalidates the "stories" and "stats" tags
+cache = create_cache()
+
+from app.services.jobs import JOB_TASKS, create_job_queue
+# Model training runs here, never on the request path
+job_queue = create_job_queue(story_repository)
+
 class ChatRequest(BaseModel):
     text: str
     session_id: str
@@ -94,78 +128,154 @@ class ChatRequest(BaseModel):
 def health_check():
     return {"status": "healthy"}
 
-@app.get("/api/v1/stories", response_model=List[Story])
-def get_stories():
-    return MOCK_STORIES
+STORY_FIELDS = set(Story.model_fields)
+SUMMARY_FIELDS = ["id", "title", "date", "topics"]
+
+@app.get("/api/v1/stories", response_model=StoryPage)
+async def get_stories(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated Story fields, e.g. id,title,date"),
+):
+    """
+    Newest-first, cursor-paginated story listing.
+    `view=summary` or `fields=` skip the heavy content/transcript columns.
+    """
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - STORY_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id is needed to build the next cursor; sorting and deduping gives
+        # equivalent requests ("title,id" / "id,title,title") one cache key
+        selected = sorted(requested | {"id"})
+    elif view == "summary":
+        selected = SUMMARY_FIELDS
+    else:
+        selected = None
+
+    cache_key = f"stories:{limit}:{cursor}:{','.join(selected) if selected else 'full'}"
+    cached, generation = await cache.get_with_generation(cache_key, tags=("stories",))
+    if cached:
+        return cached
+
+    # Fetch one extra row to learn whether another page exists
+    try:
+        if selected:
+            items = await story_repository.list_projected(selected, limit=limit + 1, before=cursor)
+        else:
+            items = [s.model_dump() for s in await story_repository.list_recent(limit=limit + 1, before=cursor)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+    page = StoryPage(items=items, next_cursor=next_cursor)
+    await cache.set(cache_key, page.model_dump(mode="json"), tags=("stories",), generation=generation)
+    return page
 
 @app.get("/api/v1/dashboard/stats", response_model=List[DashboardStat])
-def get_dashboard_stats():
-    # Calculate stats dynamically based on MOCK_STORIES
-    total_chapters = len(MOCK_STORIES)
-    
-    # Calculate total duration manually or semi-randomly for mock
-    total_duration = 0.0
-    for s in MOCK_STORIES:
-        # crude parsing of "12 mins"
-        try:
-            minutes = int(s.duration.split()[0])
-            total_duration += minutes
-        except:
-            total_duration += 10 # fallback
-            
-    total_hours = round(total_duration / 60, 1)
-    
-    # Dynamic Family Views (mock logic: 10 views per story + some variation)
-    family_views = 0
-    for s in MOCK_STORIES:
-        family_views += 10 + (int(s.id) * 2 % 7)
+async def get_dashboard_stats():
+    cached, generation = await cache.get_with_generation("dashboard:stats", tags=("stats",))
+    if cached:
+        return cached
 
-    return [
-        DashboardStat(label="Chapters", value=str(total_chapters), icon="Book", color="bg-brand-500", trend="+1 this session"),
+    # Counters are maintained by the repository on every story write
+    stats = await story_repository.stats()
+    total_hours = round(stats.total_seconds / 3600, 1)
+
+    result = [
+        DashboardStat(label="Chapters", value=str(stats.chapters), icon="Book", color="bg-brand-500", trend="+1 this session"),
         DashboardStat(label="Audio Hours", value=str(total_hours), icon="Layers", color="bg-sage-500", trend=f"{total_hours} hrs total"),
-        DashboardStat(label="Family Views", value=str(family_views), icon="Users", color="bg-fuchsia-500", trend="Active now"),
+        DashboardStat(label="Family Views", value=str(stats.family_views), icon="Users", color="bg-fuchsia-500", trend="Active now"),
     ]
+    await cache.set("dashboard:stats", [stat.model_dump() for stat in result], tags=("stats",),
+                    generation=generation)
+    return result
 
 @app.post("/api/v1/chat/save")
-async def save_chat(request: ChatRequest):
+async def save_chat(request: ChatRequest, background_tasks: BackgroundTasks):
     # Retrieve session
-    session = context_manager.get_session(request.session_id)
+    session = await context_manager.get_session(request.session_id, full_history=True)
     if not session or not session.history:
         raise HTTPException(status_code=400, detail="No active conversation to save")
         
     # Generate a title (mocked or simple heuristic)
     # in real app, we'd use LLM to summarize
-    first_user_msg = next((m['content'] for m in session.history if m['role'] == 'user'), "New Memory")
+    first_user_msg = next((t.content for t in session.history if t.role == Role.USER), "New Memory")
     title = "Memory: " + (first_user_msg[:20] + "..." if len(first_user_msg) > 20 else first_user_msg)
     
-    # Construct Story object
-    new_story = Story(
-        id=str(len(MOCK_STORIES) + 1), # simple increment ID
+    # Persist the story; the repository allocates the ID
+    new_story = await story_repository.create(
         title=title,
         date=datetime.date.today().strftime("%b %d, %Y"),
-        duration=f"{session.turn_count * 2} mins", # mock duration based on turns
+        duration_seconds=session.turn_count * 2 * 60, # mock duration based on turns
         topics=[session.current_topic.capitalize()],
-        content="\n\n".join([f"{m['role'].upper()}: {m['content']}" for m in session.history]),
-        transcript=session.history,
+        content="\n\n".join([f"{t.role.value.upper()}: {t.content}" for t in session.history]),
+        transcript=[t.to_dict() for t in session.history],
         audio_url="mock_audio_new.mp3"
     )
+    # Drop cached listings, story pages and stats before the client reloads them
+    await cache.invalidate("stories", "stats")
     
-    MOCK_STORIES.insert(0, new_story) # Add to top
-    
+    # Let the job queue teach the classifier the new story (it learns in
+    # batches; every API worker then hot-reloads the saved version)
+    background_tasks.add_task(job_queue.submit, "update_classifier", {})
+
     # Reset the session to allow a fresh start
-    context_manager.reset_session(request.session_id)
+    await context_manager.reset_session(request.session_id)
     
     return {"status": "success", "story_id": new_story.id}
 
+class JobRequest(BaseModel):
+    name: str  # "train_classifier", "update_classifier" or "train_topics"
+    num_topics: Optional[int] = None  # train_topics only
+
+@app.post("/api/v1/jobs", response_model=Job, status_code=202)
+def submit_job(request: JobRequest):
+    """
+    Queue a training run over the story archive. Poll GET /api/v1/jobs/{id}.
+    Only the job's parameters are queued; the worker reads the stories.
+    A plain def, so the broker round trip runs in the threadpool.
+    """
+    if request.name not in JOB_TASKS:
+        raise HTTPException(status_code=400, detail=f"Unknown job: {request.name}")
+    payload: Dict[str, Any] = {}
+    if request.name == "train_topics" and request.num_topics:
+        payload["num_topics"] = request.num_topics
+    return job_queue.submit(request.name, payload)
+
+@app.get("/api/v1/jobs/{job_id}", response_model=Job)
+def get_job(job_id: str):
+    job = job_queue.status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.delete("/api/v1/jobs/{job_id}", response_model=Job)
+def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/api/v1/dashboard/timeline", response_model=List[TimelineEvent])
 def get_dashboard_timeline():
     return MOCK_TIMELINE
 
 @app.get("/api/v1/stories/{story_id}", response_model=Story)
-def get_story(story_id: str):
-    for story in MOCK_STORIES:
-        if story.id == story_id:
-            return story
+async def get_story(story_id: str):
+    cached, generation = await cache.get_with_generation(f"story:{story_id}", tags=("stories",))
+    if cached:
+        return cached
+    story = await story_repository.get(story_id)
+    if story:
+        await cache.set(f"story:{story_id}", story.model_dump(mode="json"), tags=("stories",),
+                        generation=generation)
+        return story
     raise HTTPException(status_code=404, detail="Story not found")
 
 # Chat endpoint mock
@@ -173,36 +283,18 @@ def get_story(story_id: str):
 
 @app.post("/api/v1/chat/send")
 async def chat_send(request: ChatRequest):
-    # Ensure session exists
-    session = context_manager.get_session(request.session_id)
-    if not session:
-        context_manager.create_session(request.session_id)
-        # Hack to force specific ID if needed, but create_session generates one if not passed.
-        # Actually context_manager.create_session takes user_id and returns session_id.
-        # But our FE sends a session_id "demo_user".
-        # Let's adjust create_session or just manually inject for this demo.
-        # Re-reading conversation_manager.py: create_session(user_id) -> session_id.
-        # It stores in active_sessions[ctx.session_id]
-        
-        # Let's interact with it properly.
-        # If the FE sends "demo_user" as session_id effectively, we should map that.
-        # For simplicity in this demo:
-        # If the FE sends "demo_user", we manually ensure a context exists for it.
-        # We don't use create_session() because that generates a random UUID.
-        pass
-
-
-    # The ContextManager doesn't expose create_session_with_id. 
-    # Let's just do:
-    if request.session_id not in context_manager.active_sessions:
-        # Create a context manually and inject it to force the ID from FE
-        from app.services.conversation_manager import ConversationContext
-        ctx = ConversationContext(user_id="user_1", session_id=request.session_id)
-        context_manager.active_sessions[request.session_id] = ctx
-
-    reply = await context_manager.process_user_input(request.session_id, request.text)
+    # The frontend picks its own session_id, so create the context under that ID if unseen
+    await context_manager.get_or_create_session(request.session_id, user_id="user_1")
+
+    try:
+        reply, sentiment = await context_manager.process_turn(request.session_id, request.text)
+    except SessionConflictError:
+        raise HTTPException(status_code=409, detail="Conversation was updated concurrently, please resend")
     
+    sentiment = sentiment or {}
     return {
         "reply": reply,
-        "sentiment": "positive"
+        "sentiment": sentiment.get("primary_tone", "NEUTRAL"),
+        "sentiment_score": sentiment.get("scores", {}).get("compound", 0.0),
+        "is_sensitive": sentiment.get("is_sensitive", False)
     }
@@ -0,0 +1,50 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import time
+
+class Role(str, Enum):
+    USER = "user"
+    AI = "ai"
+
+class Turn:
+    """
+    One message in a conversation.
+    Slotted with an epoch-float timestamp: long sessions hold thousands of these,
+    so they avoid a per-turn dict and ISO string. Convert with to_dict() at the API boundary.
+    """
+    __slots__ = ("role", "content", "timestamp", "tone", "compound")
+
+    def __init__(self, role: Role, content: str, timestamp: Optional[float] = None,
+                 tone: Optional[str] = None, compound: Optional[float] = None):
+        self.role = Role(role)
+        self.content = content
+        self.timestamp = time.time() if timestamp is None else timestamp
+        # Sentiment of narrator turns: primary tone label and VADER compound score
+        self.tone = tone
+        self.compound = compound
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "role": self.role.value,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+        if self.tone is not None:
+            data["sentiment"] = {"tone": self.tone, "compound": self.compound}
+        return data
+
+    def pack(self) -> List[Any]:
+        """
+        Compact [role, content, timestamp(, tone, compound)] form used for session storage.
+        """
+        if self.tone is None:
+            return [self.role.value, self.content, self.timestamp]
+        return [self.role.value, self.content, self.timestamp, self.tone, self.compound]
+
+    @classmethod
+    def unpack(cls, data: List[Any]) -> "Turn":
+        return cls(*data)
+
+    def __repr__(self) -> str:
+        return f"Turn({self.role.value!r}, {self.content!r}, {self.timestamp!r})"
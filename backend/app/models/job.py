@@ -0,0 +1,23 @@
+from enum import Enum
+from typing import Any, Optional
+from pydantic import BaseModel
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATES = {JobState.SUCCEEDED, JobState.FAILED, JobState.CANCELLED}
+
+class Job(BaseModel):
+    id: str
+    name: str  # registered task, e.g. "train_classifier"
+    state: JobState = JobState.QUEUED
+    progress: float = 0.0  # 0.0 - 1.0
+    message: str = ""
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: float  # epoch seconds
+    updated_at: float
@@ -0,0 +1,25 @@
+from typing import List, Optional
+from pydantic import BaseModel, model_validator
+
+def format_duration(seconds: int) -> str:
+    """
+    Display form used by the dashboard, e.g. 720 -> "12 mins".
+    """
+    return f"{round(seconds / 60)} mins"
+
+class Story(BaseModel):
+    id: str
+    title: str
+    date: str
+    duration_seconds: int = 0
+    duration: str = ""  # Display text, derived from duration_seconds when omitted
+    topics: List[str]
+    content: str  # The full text or summary
+    transcript: Optional[List[dict]] = None # List of {role, content}
+    audio_url: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _derive_duration(self):
+        if not self.duration:
+            self.duration = format_duration(self.duration_seconds)
+        return self
@@ -1,8 +1,18 @@
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Any, List, Dict, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import os
+import time
 import uuid
+import logging
+from app.models.conversation import Role, Turn
 from app.services.nlp.llm_client import LLMClient
-from app.services.nlp.sentiment import SentimentAnalyzer
+from app.services.nlp.sentiment import SentimentAnalyzer, EmotionalTrajectory, analyze_text
+from app.services.nlp.summarizer import RollingSummary
+from app.services.session_store import SessionStore, FileSessionArchive, RedisSessionStore, SessionConflictError
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 class ConversationContext:
     """
@@ -11,51 +21,168 @@ class ConversationContext:
     def __init__(self, user_id: str, session_id: str = None):
         self.session_id = session_id or str(uuid.uuid4())
         self.user_id = user_id
-        self.history: List[Dict[str, str]] = [] # list of {role, content, timestamp}
+        self.history: List[Turn] = [] # Transcript (from history_offset on); becomes the story on save
+        self.history_offset = 0 # Turns before history[0] left in a shared store (see RedisSessionStore)
+        self.summary = RollingSummary() # Turns older than the prompt window
+        self.summarized_turns = 0 # The first summarized_turns turns are folded into summary
+        self.trajectory = EmotionalTrajectory() # Compound score per narrator turn
         self.current_topic: str = "general"
         self.exhausted_topics: List[str] = []
         self.used_questions: set = set() # Track asked questions to prevent repeats
-        self.start_time = datetime.now()
-        self.start_time = datetime.now()
+        self.start_time = time.time() # epoch seconds
         self.turn_count = 0
         self.state = "ACTIVE" # ACTIVE, PAUSED, ENDED
+        self.version = 0 # Bumped by shared session stores on every commit
+        self.persisted_turns = 0 # Turns already in a shared store's turn log
+
+    def to_dict(self, full_history: bool = True) -> Dict[str, Any]:
+        """
+        JSON-safe snapshot, used when the session leaves process memory.
+        With full_history=False only the unsummarized window of turns is
+        included, so the snapshot's size does not grow with the session.
+        """
+        start = 0 if full_history else max(self.summarized_turns - self.history_offset, 0)
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "history": [turn.pack() for turn in self.history[start:]],
+            "history_offset": self.history_offset + start,
+            "summary": self.summary.to_dict(),
+            "summarized_turns": self.summarized_turns,
+            "trajectory": self.trajectory.points,
+            "current_topic": self.current_topic,
+            "exhausted_topics": self.exhausted_topics,
+            "used_questions": list(self.used_questions),
+            "start_time": self.start_time,
+            "turn_count": self.turn_count,
+            "state": self.state,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationContext":
+        ctx = cls(user_id=data["user_id"], session_id=data["session_id"])
+        ctx.history = [Turn.unpack(turn) for turn in data["history"]]
+        ctx.history_offset = data.get("history_offset", 0)
+        ctx.summary = RollingSummary.from_data(data.get("summary"))
+        ctx.summarized_turns = data.get("summarized_turns", 0)
+        ctx.trajectory = EmotionalTrajectory(points=data.get("trajectory"))
+        ctx.current_topic = data["current_topic"]
+        ctx.exhausted_topics = data["exhausted_topics"]
+        ctx.used_questions = set(data["used_questions"])
+        ctx.start_time = data["start_time"]
+        ctx.turn_count = data["turn_count"]
+        ctx.state = data["state"]
+        return ctx
+
+def create_session_store():
+    """
+    Build the session store selected by SESSION_BACKEND ("local" or "redis").
+    Use "redis" whenever more than one worker or container serves chat.
+    """
+    idle_ttl = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+    # Idle sessions are evicted (and archived) instead of accumulating forever
+    archive = FileSessionArchive(
+        os.getenv("SESSION_ARCHIVE_DIR", "data/sessions"),
+        retention_seconds=float(os.getenv("SESSION_ARCHIVE_RETENTION_DAYS", "30")) * 24 * 3600,
+    )
+    if os.getenv("SESSION_BACKEND", "local") == "redis":
+        return RedisSessionStore.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            idle_ttl=idle_ttl,
+            archive=archive,
+            deserialize=ConversationContext.from_dict,
+        )
+    return SessionStore(
+        max_sessions=int(os.getenv("SESSION_MAX_ACTIVE", "10000")),
+        idle_ttl=idle_ttl,
+        archive=archive,
+        deserialize=ConversationContext.from_dict,
+    )
+
+def create_nlp_executor() -> Optional[Executor]:
+    """
+    Build the pool that runs CPU-bound NLP off the event loop, per NLP_EXECUTOR:
+    "thread" (default), "process" (true parallelism, one analyzer per worker)
+    or "inline" (no pool; blocks the loop, for comparison only).
+    """
+    mode = os.getenv("NLP_EXECUTOR", "thread")
+    workers = int(os.getenv("NLP_WORKERS", str(min(4, os.cpu_count() or 1))))
+    if mode == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nlp")
+    return None
 
 class ContextManager:
     """
     Orchestrates the conversation flow (Prompt 3.2).
     Integrates NLP, queues questions, manages state.
     """
-    def __init__(self):
-        self.active_sessions: Dict[str, ConversationContext] = {}
+    def __init__(self, session_store=None, max_commit_retries: int = 3, history_window: int = None):
+        self.active_sessions = session_store or create_session_store()
+        self.max_commit_retries = max_commit_retries
+        # Turns passed verbatim to the LLM; older ones are summarized
+        self.history_window = history_window or int(os.getenv("HISTORY_WINDOW_TURNS", "12"))
         self.llm_client = LLMClient()
         self.sentiment_analyzer = SentimentAnalyzer()
+        self.nlp_executor = create_nlp_executor()
 
-    def create_session(self, user_id: str) -> str:
+    async def create_session(self, user_id: str) -> str:
         ctx = ConversationContext(user_id)
-        self.active_sessions[ctx.session_id] = ctx
+        await self.active_sessions.put(ctx)
         return ctx.session_id
 
-    def get_session(self, session_id: str) -> Optional[ConversationContext]:
-        return self.active_sessions.get(session_id)
+    async def get_session(self, session_id: str, full_history: bool = False) -> Optional[ConversationContext]:
+        """
+        Shared stores load only the turns still in the prompt window; pass
+        full_history=True when the whole transcript is needed (saving a story).
+        """
+        return await self.active_sessions.get(session_id, full_history=full_history)
 
-    async def process_user_input(self, session_id: str, text: str) -> str:
+    async def get_or_create_session(self, session_id: str, user_id: str) -> ConversationContext:
         """
-        Main pipeline entry point for a chat turn.
+        Look up a session by a client-chosen ID, creating it if unseen (or restoring it if archived).
         """
-        ctx = self.get_session(session_id)
+        ctx = await self.get_session(session_id)
         if not ctx:
-            return "Session expired or invalid."
+            ctx = ConversationContext(user_id=user_id, session_id=session_id)
+            await self.active_sessions.put(ctx)
+        return ctx
 
+    async def process_user_input(self, session_id: str, text: str) -> str:
+        """
+        Main pipeline entry point for a chat turn. Returns the reply text.
+        """
+        reply, _ = await self.process_turn(session_id, text)
+        return reply
+
+    async def process_turn(self, session_id: str, text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Run a chat turn and return (reply, sentiment analysis of the user's text).
+        The turn is replayed on a fresh copy if another worker committed to
+        the same session in the meantime.
+        """
+        for attempt in range(self.max_commit_retries):
+            ctx = await self.get_session(session_id)
+            if not ctx:
+                return "Session expired or invalid.", None
+            response_text, sentiment = await self._run_turn(ctx, text)
+            try:
+                await self.active_sessions.commit(ctx)
+                return response_text, sentiment
+            except SessionConflictError:
+                logger.info(f"Session {session_id} changed concurrently, retrying turn ({attempt + 1}).")
+        raise SessionConflictError(session_id)
+
+    async def _run_turn(self, ctx: ConversationContext, text: str) -> Tuple[str, Dict[str, Any]]:
         # 1. Update History
-        ctx.history.append({
-            "role": "user",
-            "content": text,
-            "timestamp": datetime.now().isoformat()
-        })
+        user_turn = Turn(Role.USER, text)
+        ctx.history.append(user_turn)
         ctx.turn_count += 1
+        self._roll_window(ctx)
         
-        # 2. Analyze Input
-        sentiment = self.sentiment_analyzer.analyze(text)
+        # 2. Analyze Input (in the NLP pool, overlapped with response generation)
+        sentiment_future = self._analyze_sentiment(text)
         length_category = "long" if len(text.split()) > 20 else "short"
         
         # 3. Check Logic (Confusion, Topic Exhaustion)
@@ -66,41 +193,82 @@ class ContextManager:
             
         # 4. Generate Response
         response_text = await self.llm_client.generate_follow_up(
-            history=ctx.history,
+            history=ctx.history[-self.history_window:],
+            summary=ctx.summary.text(),
             current_topic=ctx.current_topic,
             user_response_length=length_category,
-            exclude_questions=list(ctx.used_questions)
+            exclude_questions=ctx.used_questions
         )
         ctx.used_questions.add(response_text)
+
+        # 5. Record the sentiment on the turn and the session trajectory
+        sentiment = await sentiment_future
+        user_turn.tone = sentiment.get("primary_tone", "NEUTRAL")
+        user_turn.compound = sentiment.get("scores", {}).get("compound", 0.0)
+        ctx.trajectory.add(user_turn.compound)
         
-        # 5. Update History with AI response
-        ctx.history.append({
-            "role": "ai",
-            "content": response_text,
-            "timestamp": datetime.now().isoformat()
-        })
+        # 6. Update History with AI response
+        ctx.history.append(Turn(Role.AI, response_text))
+        self._roll_window(ctx)
         
-        return response_text
+        return response_text, sentiment
+
+    def _analyze_sentiment(self, text: str) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        if self.nlp_executor is None:
+            future = loop.create_future()
+            future.set_result(self.sentiment_analyzer.analyze(text))
+            return future
+        if isinstance(self.nlp_executor, ProcessPoolExecutor):
+            return loop.run_in_executor(self.nlp_executor, analyze_text, text)
+        return loop.run_in_executor(self.nlp_executor, self.sentiment_analyzer.analyze, text)
+
+    async def sweep_sessions(self) -> int:
+        """
+        Archive idle sessions (see SessionStore.sweep / RedisSessionStore.sweep).
+        """
+        if isinstance(self.active_sessions, RedisSessionStore):
+            return await self.active_sessions.sweep()
+        return self.active_sessions.sweep()
+
+    def close(self):
+        if self.nlp_executor:
+            self.nlp_executor.shutdown(wait=False)
+
+    def _roll_window(self, ctx: ConversationContext):
+        """
+        Fold turns that just left the window into the rolling summary.
+        Each turn is summarized exactly once, so the per-turn cost is O(1).
+        """
+        while ctx.history_offset + len(ctx.history) - ctx.summarized_turns > self.history_window:
+            ctx.summary.add(ctx.history[ctx.summarized_turns - ctx.history_offset])
+            ctx.summarized_turns += 1
 
-    def change_topic(self, session_id: str, new_topic: str):
-        ctx = self.get_session(session_id)
+    async def change_topic(self, session_id: str, new_topic: str):
+        ctx = await self.get_session(session_id)
         if ctx:
             if ctx.current_topic != "general":
                 ctx.exhausted_topics.append(ctx.current_topic)
             ctx.current_topic = new_topic
+            await self.active_sessions.put(ctx)
             return True
         return False
 
-    def reset_session(self, session_id: str):
+    async def reset_session(self, session_id: str):
         """
         Resets the session state (clears history, resets topic) for a fresh start.
         """
-        ctx = self.get_session(session_id)
+        ctx = await self.get_session(session_id)
         if ctx:
             ctx.history = []
+            ctx.history_offset = 0
+            ctx.summary.clear()
+            ctx.summarized_turns = 0
+            ctx.trajectory.clear()
             ctx.current_topic = "general"
             ctx.turn_count = 0
             ctx.used_questions = set()
-            ctx.start_time = datetime.now()
+            ctx.start_time = time.time()
+            await self.active_sessions.put(ctx)
             return True
         return False
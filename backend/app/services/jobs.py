@@ -0,0 +1,371 @@
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+try:
+    import redis
+except ImportError:
+    redis = None
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import os
+import asyncio
+import threading
+import time
+import uuid
+import logging
+from app.models.job import FINISHED_STATES, Job, JobState
+from app.services.story_repository import InMemoryStoryRepository, StoryRepository, create_story_repository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Progress = Callable[[float, str], None]
+
+class JobCancelled(Exception):
+    """
+    Raised from a job's progress callback once cancellation was requested.
+    """
+
+ARCHIVE_PAGE_SIZE = 500
+
+# Set by create_job_queue when in-process jobs should read the API's own
+# in-memory store; otherwise jobs open the repository from DATABASE_URL
+_shared_archive: Optional[StoryRepository] = None
+
+@asynccontextmanager
+async def _open_archive():
+    if _shared_archive is not None:
+        yield _shared_archive
+        return
+    repository = create_story_repository()
+    try:
+        yield repository
+    finally:
+        await repository.close()
+
+def read_archive(fields: Sequence[str], page_size: int = ARCHIVE_PAGE_SIZE,
+                 after: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Every story's `fields`, newest first, read in the worker rather than
+    shipped in the job message. Pages through list_projected, so the heavy
+    columns that are not asked for (transcripts) never leave the database.
+    With `after`, only stories with a higher ID are read.
+    """
+    async def read():
+        rows, cursor = [], None
+        async with _open_archive() as repository:
+            while True:
+                page = await repository.list_projected(["id", *fields], limit=page_size, before=cursor)
+                if after is not None:
+                    newer = [row for row in page if int(row["id"]) > after]
+                    rows.extend(newer)
+                    if len(newer) < len(page):
+                        return rows
+                else:
+                    rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+                cursor = page[-1]["id"]
+    return asyncio.run(read())
+
+def _classifier():
+    from app.services.nlp.classification import StoryClassifier
+    return StoryClassifier(model_path=os.getenv("CLASSIFIER_MODEL_PATH", "data/classifier_model.pkl"))
+
+def train_classifier(payload: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """
+    Trains on the whole story archive, or on payload {"texts": [...],
+    "labels": [[...], ...]} if given. Saves a new model version, which
+    serving workers hot-reload.
+    """
+    classifier = _classifier()
+    with classifier.exclusive():
+        if "texts" in payload:
+            texts, labels, seen_through = payload["texts"], payload["labels"], 0
+        else:
+            stories = read_archive(["content", "topics"])
+            texts, labels = [s["content"] for s in stories], [s["topics"] for s in stories]
+            seen_through = max((int(s["id"]) for s in stories), default=0)
+        classifier.train(texts, labels, progress=progress, seen_through=seen_through)
+    labels = classifier.mlb.classes_.tolist() if classifier.mlb is not None else []
+    return {"version": classifier.version, "labels": labels}
+
+def update_classifier(payload: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """
+    Online update with the stories saved since the model last learned
+    (its `seen_through` story ID). Saves a new version only once at least
+    payload "min_batch" (default CLASSIFIER_UPDATE_BATCH, 10) stories are
+    pending, so a busy archive writes one artifact per batch, not per story.
+    Runs under the classifier's file lock: concurrent updates take turns.
+    """
+    min_batch = payload.get("min_batch", int(os.getenv("CLASSIFIER_UPDATE_BATCH", "10")))
+    classifier = _classifier()
+    with classifier.exclusive():
+        classifier.maybe_reload(force=True)
+        stories = read_archive(["content", "topics"], after=classifier.seen_through)
+        if not stories or len(stories) < min_batch:
+            return {"version": classifier.version, "learned": 0, "pending": len(stories)}
+        progress(0.5, f"Learning {len(stories)} stories")
+        classifier.partial_fit([s["content"] for s in stories], [s["topics"] for s in stories],
+                               seen_through=max(int(s["id"]) for s in stories))
+    return {"version": classifier.version, "learned": len(stories), "pending": 0}
+
+def train_topics(payload: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """
+    Trains on the whole story archive, or on payload {"documents": [[token,
+    ...], ...]} or raw {"texts": [...]} if given (tokenized here, in the
+    worker), plus optional "num_topics" (default 5).
+    LDA_WORKERS > 1 trains with that many LdaMulticore worker processes.
+    The model is saved as a new version under TOPIC_MODEL_DIR.
+    """
+    from app.services.nlp.topics import TopicModeler
+    documents = payload.get("documents")
+    if documents is None:
+        from gensim.parsing.preprocessing import STOPWORDS
+        from gensim.utils import simple_preprocess
+        texts = payload["texts"] if "texts" in payload else [s["content"] for s in read_archive(["content"])]
+        documents = [[w for w in simple_preprocess(text) if w not in STOPWORDS] for text in texts]
+    modeler = TopicModeler(num_topics=payload.get("num_topics", 5), workers=int(os.getenv("LDA_WORKERS", "1")),
+                           model_dir=os.getenv("TOPIC_MODEL_DIR", "data/topic_model"))
+    modeler.train(documents, progress=progress)
+    modeler.save()
+    return {"version": modeler.version, "topics": modeler.get_topics_display()}
+
+# Jobs that can be submitted by name. Each takes (payload, progress) and
+# returns a JSON-serialisable result.
+JOB_TASKS: Dict[str, Callable[[Dict[str, Any], Progress], Any]] = {
+    "train_classifier": train_classifier,
+    "update_classifier": update_classifier,
+    "train_topics": train_topics,
+}
+
+class JobQueue:
+    """
+    Runs long jobs (model training) off the request path.
+    """
+
+    def submit(self, name: str, payload: Dict[str, Any]) -> Job:
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued job outright, or ask a running one to stop at its next
+        progress report. Returns the job's status, or None if unknown.
+        """
+        raise NotImplementedError
+
+class LocalJobQueue(JobQueue):
+    """
+    In-process fallback: jobs run on a small thread pool. Intended for tests
+    and single-process setups; threads share the GIL with the API, so use the
+    Celery queue in production.
+    """
+
+    def __init__(self, max_workers: int = 1, max_finished: int = 100,
+                 tasks: Optional[Dict[str, Callable]] = None):
+        self.tasks = tasks if tasks is not None else JOB_TASKS
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._futures: Dict[str, Any] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, payload: Dict[str, Any]) -> Job:
+        if name not in self.tasks:
+            raise ValueError(f"Unknown job: {name}")
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, name=name, created_at=now, updated_at=now)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._cancel_events[job.id] = threading.Event()
+            self._futures[job.id] = self._executor.submit(self._run, job.id, name, payload)
+        return job.model_copy()
+
+    def status(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state in FINISHED_STATES:
+                return job.model_copy()
+            self._cancel_events[job_id].set()
+            future = self._futures[job_id]
+        if future.cancel():
+            self._update(job_id, state=JobState.CANCELLED, message="Cancelled before start")
+        return self.status(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id: str, name: str, payload: Dict[str, Any]):
+        cancelled = self._cancel_events[job_id]
+
+        def progress(fraction: float, message: str = ""):
+            if cancelled.is_set():
+                raise JobCancelled()
+            self._update(job_id, progress=fraction, message=message)
+
+        self._update(job_id, state=JobState.RUNNING)
+        try:
+            result = self.tasks[name](payload, progress)
+        except JobCancelled:
+            self._update(job_id, state=JobState.CANCELLED, message="Cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job_id} ({name}) failed")
+            self._update(job_id, state=JobState.FAILED, error=str(e))
+        else:
+            self._update(job_id, state=JobState.SUCCEEDED, progress=1.0, result=result)
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            self._jobs[job_id] = job.model_copy(update={**changes, "updated_at": time.time()})
+            if changes.get("state") in FINISHED_STATES:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+                self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[:-self.max_finished]:
+            del self._jobs[job_id]
+
+JOB_KEY_PREFIX = "job:"
+JOB_META_TTL = 24 * 3600
+
+# Celery task states -> job states. The task reports progress as "PROGRESS".
+CELERY_STATES = {
+    "PENDING": JobState.QUEUED,
+    "RECEIVED": JobState.QUEUED,
+    "STARTED": JobState.RUNNING,
+    "PROGRESS": JobState.RUNNING,
+    "RETRY": JobState.RUNNING,
+    "SUCCESS": JobState.SUCCEEDED,
+    "FAILURE": JobState.FAILED,
+    "REVOKED": JobState.CANCELLED,
+}
+
+def register_job_task(app, meta_client: Callable[[], Any]):
+    """
+    Register the generic job runner on a Celery app. `meta_client` returns the
+    Redis client holding job metadata (name, created_at, cancel flag).
+    """
+
+    @app.task(bind=True, name="memory_keeper.run_job", shared=False)
+    def run_job(self, name: str, payload: Dict[str, Any]):
+        key = JOB_KEY_PREFIX + self.request.id
+        client = meta_client()
+
+        def progress(fraction: float, message: str = ""):
+            if client.hget(key, "cancel"):
+                raise JobCancelled()
+            self.update_state(state="PROGRESS", meta={"progress": fraction, "message": message})
+
+        try:
+            return {"result": JOB_TASKS[name](payload, progress)}
+        except JobCancelled:
+            return {"cancelled": True}
+
+    return run_job
+
+class CeleryJobQueue(JobQueue):
+    """
+    Jobs run on Celery workers (`celery -A app.services.jobs.celery_app worker`).
+    Celery cannot tell an unknown task ID from a queued one, so each job's
+    name, creation time and cancel flag live in a small Redis hash.
+    """
+
+    def __init__(self, app, meta_client):
+        self.app = app
+        self.redis = meta_client
+        self._run_job = app.tasks["memory_keeper.run_job"]
+
+    def submit(self, name: str, payload: Dict[str, Any]) -> Job:
+        if name not in JOB_TASKS:
+            raise ValueError(f"Unknown job: {name}")
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, name=name, created_at=now, updated_at=now)
+        key = JOB_KEY_PREFIX + job.id
+        self.redis.hset(key, mapping={"name": name, "created_at": now})
+        self.redis.expire(key, JOB_META_TTL)
+        self._run_job.apply_async(args=(name, payload), task_id=job.id)
+        return job
+
+    def status(self, job_id: str) -> Optional[Job]:
+        name, created_at, cancel = self.redis.hmget(JOB_KEY_PREFIX + job_id, ["name", "created_at", "cancel"])
+        if name is None:
+            return None
+        result = self.app.AsyncResult(job_id)
+        info = result.info
+        job = Job(id=job_id, name=name.decode(), state=CELERY_STATES.get(result.state, JobState.RUNNING),
+                  created_at=float(created_at), updated_at=time.time())
+        if result.state == "PROGRESS" and isinstance(info, dict):
+            job.progress, job.message = info.get("progress", 0.0), info.get("message", "")
+        elif result.state == "SUCCESS":
+            if info.get("cancelled"):
+                job.state, job.message = JobState.CANCELLED, "Cancelled"
+            else:
+                job.progress, job.result = 1.0, info.get("result")
+        elif result.state == "FAILURE":
+            job.error = str(info)
+        elif cancel and job.state == JobState.QUEUED:
+            job.state, job.message = JobState.CANCELLED, "Cancelled before start"
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.status(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return job
+        self.redis.hset(JOB_KEY_PREFIX + job_id, "cancel", 1)
+        if job.state == JobState.QUEUED:
+            # Workers skip revoked tasks they have not started yet
+            self.app.control.revoke(job_id)
+        return self.status(job_id)
+
+def _celery_url() -> str:
+    return os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+_meta_client = None
+
+def job_meta_client():
+    global _meta_client
+    if _meta_client is None:
+        _meta_client = redis.from_url(_celery_url())
+    return _meta_client
+
+celery_app = None
+if Celery:
+    celery_app = Celery("memory_keeper", broker=_celery_url(), backend=_celery_url())
+    celery_app.conf.update(task_track_started=True, result_expires=JOB_META_TTL)
+    register_job_task(celery_app, job_meta_client)
+
+def create_job_queue(story_repository: Optional[StoryRepository] = None) -> JobQueue:
+    """
+    Build the job queue selected by JOB_BACKEND: "celery" (workers fed through
+    Redis) or "local" (default; in-process thread pool).
+
+    Jobs read stories themselves. In-process jobs share `story_repository`
+    when it is the in-memory store (nothing else can see it); a SQL
+    repository is reopened from DATABASE_URL, since its engine belongs to
+    the API's event loop.
+    """
+    global _shared_archive
+    if os.getenv("JOB_BACKEND", "local") == "celery":
+        if celery_app is None or redis is None:
+            raise RuntimeError("JOB_BACKEND=celery requires the celery and redis packages")
+        return CeleryJobQueue(celery_app, job_meta_client())
+    if isinstance(story_repository, InMemoryStoryRepository):
+        _shared_archive = story_repository
+    return LocalJobQueue(max_workers=int(os.getenv("JOB_WORKERS", "1")))
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List, Optional
+import logging
+from app.services.nlp.keywords import KeywordDetector
+from app.services.nlp.preprocessing import TextPreprocessor
+from app.services.nlp.spacy_models import KEYWORD_DISABLED
+from app.services.nlp.topics import TopicModeler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AnalysisPipeline:
+    """
+    Per-turn text analysis with a single spaCy parse. The raw text is parsed
+    once (with every component the analyzers need) and the resulting Doc is
+    handed to preprocessing, keyword detection and topic inference, instead
+    of each of them calling nlp() on the same text.
+    """
+
+    def __init__(self,
+                 preprocessor: Optional[TextPreprocessor] = None,
+                 keyword_detector: Optional[KeywordDetector] = None,
+                 topic_modeler: Optional[TopicModeler] = None):
+        self.preprocessor = preprocessor or TextPreprocessor()
+        self.keyword_detector = keyword_detector or KeywordDetector()
+        self.topic_modeler = topic_modeler
+        self.parses = 0
+
+    def parse(self, text: str):
+        """
+        The one nlp() call per turn. Uses the keyword detector's pipeline, which
+        is the shared registry model (or its blank fallback).
+        """
+        nlp = self.keyword_detector.nlp
+        if nlp is None:
+            return None
+        self.parses += 1
+        return nlp(text, disable=KEYWORD_DISABLED)
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """
+        Returns {"preprocessing", "keywords", "topics"} for one turn.
+        "topics" is empty when no TopicModeler is attached.
+        """
+        doc = self.parse(text)
+        if doc is None:
+            # No spaCy at all: the preprocessor's own fallback is all there is
+            preprocessing = self.preprocessor.process(text)
+            keywords = self.keyword_detector.detect_keywords(text)
+        else:
+            preprocessing = self.preprocessor.process_doc(doc)
+            keywords = self.keyword_detector.detect_keywords_doc(doc)
+
+        topics: List = []
+        if self.topic_modeler is not None:
+            topics = self.topic_modeler.get_topic_for_document(self.topic_tokens(doc, preprocessing))
+
+        return {"preprocessing": preprocessing, "keywords": keywords, "topics": topics}
+
+    @staticmethod
+    def topic_tokens(doc, preprocessing: Dict[str, Any]) -> List[str]:
+        """
+        Compact token view for the topic model: lowercased lemmas of
+        alphabetic, non-stop-word tokens.
+        """
+        if doc is None:
+            return preprocessing["lemmas"]
+        return [(token.lemma_ or token.lower_).lower() for token in doc if token.is_alpha and not token.is_stop]
+
+if __name__ == "__main__":
+    modeler = TopicModeler(num_topics=2)
+    modeler.train([
+        ["school", "teacher", "class", "grandmother"],
+        ["war", "army", "soldier", "fight"],
+        ["school", "friend", "play", "teacher"],
+        ["war", "soldier", "peace", "country"],
+    ])
+    pipeline = AnalysisPipeline(topic_modeler=modeler)
+    result = pipeline.analyze("Um, my grandmother was a teacher at the school during the war.")
+    print("Lemmas:", result["preprocessing"]["lemmas"])
+    print("Concepts:", result["keywords"]["custom_concepts"])
+    print("Topics:", result["topics"])
+    print("Parses:", pipeline.parses)
@@ -1,7 +1,7 @@
 try:
     import sklearn
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.linear_model import LogisticRegression
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
     from sklearn.multiclass import OneVsRestClassifier
     from sklearn.pipeline import Pipeline
     from sklearn.preprocessing import MultiLabelBinarizer
@@ -9,25 +9,123 @@ try:
 except ImportError:
     sklearn = None
     joblib = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from contextlib import contextmanager
+import glob
 import os
+import re
+import shutil
+import threading
+import time
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OnlineLabelModel:
+    """
+    Incrementally trainable multi-label model: stateless hashed features and
+    one logistic SGD head per label, so new stories update it in O(batch)
+    and unseen labels simply add a head. Quacks like the batch pipeline
+    (predict_proba over texts, classes_).
+
+    Heads are kept sparse between updates (sparsify()): a head only has
+    weights for the hashed features of the stories it has seen, so a saved
+    model is a few KB per label rather than n_features float64s.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, alpha: float = 1e-4):
+        self.alpha = alpha
+        self.n_seen = 0
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, stop_words='english')
+        # (labels, heads), replaced as a whole when labels are added
+        self._heads: Tuple[Tuple[str, ...], Tuple[Any, ...]] = ((), ())
+
+    @property
+    def classes_(self) -> "np.ndarray":
+        return np.array(self._heads[0], dtype=object)
+
+    def partial_fit(self, texts: List[str], labels: List[List[str]]):
+        X = self.vectorizer.transform(texts)
+        names, heads = self._heads
+        new_labels = sorted({label for story_labels in labels for label in story_labels} - set(names))
+        if new_labels:
+            names = names + tuple(new_labels)
+            heads = heads + tuple(SGDClassifier(loss="log_loss", alpha=self.alpha, random_state=42) for _ in new_labels)
+
+        label_sets = [set(story_labels) for story_labels in labels]
+        for name, head in zip(names, heads):
+            y = np.fromiter((name in story_labels for story_labels in label_sets), dtype=int, count=len(label_sets))
+            _make_writable(head)
+            head.partial_fit(X, y, classes=[0, 1])
+            head.sparsify()
+        # Published only once every head is fitted
+        self._heads = (names, heads)
+        self.n_seen += len(texts)
+
+    def predict_proba(self, texts: List[str]) -> "np.ndarray":
+        _, heads = self._heads
+        if not heads:
+            return np.zeros((len(texts), 0))
+        X = self.vectorizer.transform(texts)
+        return np.column_stack([head.predict_proba(X)[:, 1] for head in heads])
+
+def _make_writable(head):
+    # SGD updates dense weights in place: densify sparse heads, and copy
+    # heads loaded with mmap_mode="r", which are read-only
+    if not hasattr(head, "coef_"):
+        return
+    if not isinstance(head.coef_, np.ndarray):
+        head.densify()
+    elif not head.coef_.flags.writeable:
+        head.coef_ = np.array(head.coef_)
+    head.intercept_ = np.array(head.intercept_)
+
 class StoryClassifier:
     """
     Multi-label text classification system for categorizing story segments.
+
+    Trained models are saved as numbered versions next to `model_path`
+    (classifier_model.v3.pkl, ...), uncompressed so their arrays load with
+    mmap_mode="r" and every worker shares the same page-cache copy.
+    `model_path` itself always points at the newest version and is swapped
+    in atomically; workers notice the swap and reload within
+    `reload_interval` seconds, while in-flight predictions finish on the
+    model they started with.
+
+    train() fits the TF-IDF + logistic regression pipeline from scratch;
+    partial_fit() feeds newly labeled stories to an OnlineLabelModel kept
+    next to it. Predictions blend the two (`online_weight`), and labels only
+    the online model knows are scored by it alone. The next train() starts
+    a fresh online model, since the batch model now covers those stories.
+    `seen_through` records the newest story ID either model has learned.
+
+    Online updates belong to one owner (the update_classifier job): hold
+    exclusive() around reload, partial_fit and save so concurrent updaters
+    never train on the same stories or publish versions out of order. The
+    serving workers pick the saved versions up through hot reload.
     """
 
-    def __init__(self, model_path="data/classifier_model.pkl"):
+    def __init__(self, model_path="data/classifier_model.pkl", reload_interval: float = 5.0, keep_versions: int = 3,
+                 online_weight: float = 0.5):
         self.model_path = model_path
-        self.pipeline = None
-        self.mlb = None
+        self.reload_interval = reload_interval
+        self.keep_versions = keep_versions
+        self.online_weight = online_weight
+        # (pipeline, mlb, version, online, seen_through), replaced as a whole
+        # so readers get a consistent snapshot
+        self._model: Tuple[Any, Any, int, Optional[OnlineLabelModel], int] = (None, None, 0, None, 0)
+        self._model_stat: Optional[Tuple[int, int]] = None
+        self._next_reload_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._train_lock = threading.Lock()
         
         if sklearn:
-            self.mlb = MultiLabelBinarizer()
             # If model exists, load it
             if os.path.exists(model_path):
                 self.load_model()
@@ -36,29 +134,92 @@ class StoryClassifier:
         else:
             logger.warning("Scikit-learn not available.")
 
-    def train(self, texts: List[str], labels: List[List[str]]):
+    @property
+    def pipeline(self):
+        return self._model[0]
+
+    @property
+    def mlb(self):
+        return self._model[1]
+
+    @property
+    def version(self) -> int:
+        return self._model[2]
+
+    @property
+    def online(self) -> Optional[OnlineLabelModel]:
+        return self._model[3]
+
+    @property
+    def seen_through(self) -> int:
+        return self._model[4]
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Cross-process lock on `model_path` (an flock on a sibling .lock file;
+        a no-op where fcntl is unavailable).
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+        with open(f"{self.model_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def train(self, texts: List[str], labels: List[List[str]],
+              progress: Optional[Callable[[float, str], None]] = None, seen_through: int = 0):
         """
         Train the classification model on a dataset.
+        `progress(fraction, message)` is called between steps; an exception
+        raised from it (e.g. a cancelled job) aborts training.
+        `seen_through` is the newest story ID in the dataset.
         """
+        progress = progress or (lambda fraction, message: None)
         if not texts or not labels or not sklearn:
             logger.error("Empty training data or missing dependencies.")
             return
 
         # Transform labels to binary matrix
-        y = self.mlb.fit_transform(labels)
+        mlb = MultiLabelBinarizer()
+        y = mlb.fit_transform(labels)
         
         # Create Pipeline: Tfidf -> Classifier
         # Using LogisticRegression inside OneVsRest for multi-label support
-        self.pipeline = Pipeline([
+        pipeline = Pipeline([
             ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
             ('clf', OneVsRestClassifier(LogisticRegression(solver='liblinear')))
         ])
         
         logger.info("Training classifier...")
-        self.pipeline.fit(texts, y)
+        progress(0.1, "Fitting classifier")
+        pipeline.fit(texts, y)
         logger.info("Training complete.")
+        progress(0.9, "Saving model")
         
+        self._model = (pipeline, mlb, self.version, None, seen_through)
         self.save_model()
+        progress(1.0, f"Saved model version {self.version}")
+
+    def partial_fit(self, texts: List[str], labels: List[List[str]], save: bool = True,
+                    seen_through: Optional[int] = None):
+        """
+        Online update with a batch of newly labeled stories; labels not seen
+        before are added to the online model. The batch model is kept.
+        """
+        if not texts or not sklearn:
+            return
+        with self._train_lock:
+            pipeline, mlb, version, online, previous = self._model
+            online = online or OnlineLabelModel()
+            online.partial_fit(texts, labels)
+            self._model = (pipeline, mlb, version, online, previous if seen_through is None else seen_through)
+            if save:
+                self.save_model()
 
     def predict(self, text: str) -> List[Tuple[str, float]]:
         """
@@ -66,38 +227,187 @@ class StoryClassifier:
         Returns list of (Category, ConfidenceScore). 
         Note: LogisticRegression predict_proba gives prob for True/False per class.
         """
-        if not self.pipeline:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self,
+                      texts: Iterable[str],
+                      threshold: float = 0.3,
+                      top_k: Optional[int] = None,
+                      batch_size: int = 1024) -> List[List[Tuple[str, float]]]:
+        """
+        Predict categories for many texts (e.g. tagging a whole archive).
+        Each chunk of `batch_size` texts is vectorized once; thresholding and
+        top-k selection run on the probability matrix in NumPy.
+
+        Returns, per text, only the labels scoring above `threshold` (at most
+        `top_k` of them), as (Category, ConfidenceScore) sorted by score.
+        """
+        self.maybe_reload()
+        pipeline, mlb, _, online, _ = self._model
+        if online is not None and not len(online.classes_):
+            online = None
+        texts = list(texts)
+        if not pipeline and not online:
             logger.warning("Model not trained yet.")
-            return []
+            return [[] for _ in texts]
 
-        # Predict
-        # proba returns a list of arrays (one per class) in OvR? 
-        # Actually for OVR + LogReg, predict_proba returns (n_samples, n_classes)
-        probs = self.pipeline.predict_proba([text])[0]
-        
-        results = []
-        for idx, score in enumerate(probs):
-            if score > 0.3: # Threshold for "Active" tag
-                label = self.mlb.classes_[idx]
-                results.append((label, float(score)))
-                
-        return sorted(results, key=lambda x: x[1], reverse=True)
+        results: List[List[Tuple[str, float]]] = []
+        for start in range(0, len(texts), batch_size):
+            probs, classes = self._predict_proba(texts[start:start + batch_size], pipeline, mlb, online)
+            results.extend(self._select_labels(probs, classes, threshold, top_k))
+        return results
+
+    def _predict_proba(self, texts: List[str], pipeline, mlb,
+                       online: Optional[OnlineLabelModel]) -> Tuple["np.ndarray", "np.ndarray"]:
+        if not online:
+            # For OVR + LogReg, predict_proba returns (n_samples, n_classes)
+            return pipeline.predict_proba(texts), mlb.classes_
+        online_probs, online_classes = online.predict_proba(texts), online.classes_
+        if not pipeline:
+            return online_probs, online_classes
+
+        probs, classes = pipeline.predict_proba(texts), mlb.classes_
+        column = {label: i for i, label in enumerate(classes.tolist())}
+        shared = [(column[label], j) for j, label in enumerate(online_classes.tolist()) if label in column]
+        only_online = [j for j, label in enumerate(online_classes.tolist()) if label not in column]
+        if shared:
+            batch_cols, online_cols = map(list, zip(*shared))
+            probs[:, batch_cols] = ((1 - self.online_weight) * probs[:, batch_cols]
+                                    + self.online_weight * online_probs[:, online_cols])
+        if only_online:
+            probs = np.hstack([probs, online_probs[:, only_online]])
+            classes = np.concatenate([np.asarray(classes, dtype=object), online_classes[only_online]])
+        return probs, classes
+
+    @staticmethod
+    def _select_labels(probs: "np.ndarray", classes: "np.ndarray", threshold: float,
+                       top_k: Optional[int]) -> List[List[Tuple[str, float]]]:
+        keep = probs > threshold # Threshold for "Active" tag
+        if top_k is not None and top_k < probs.shape[1]:
+            top = np.argpartition(-probs, top_k - 1, axis=1)[:, :top_k]
+            in_top = np.zeros_like(keep)
+            np.put_along_axis(in_top, top, True, axis=1)
+            keep &= in_top
+
+        rows, cols = np.nonzero(keep)
+        scores = probs[rows, cols]
+        order = np.lexsort((-scores, rows))  # by row, then score descending
+        rows, cols, scores = rows[order], cols[order], scores[order]
+
+        labels = classes[cols].tolist()
+        scores = scores.tolist()
+        bounds = np.searchsorted(rows, np.arange(probs.shape[0] + 1)).tolist()
+        return [
+            list(zip(labels[bounds[i]:bounds[i + 1]], scores[bounds[i]:bounds[i + 1]]))
+            for i in range(probs.shape[0])
+        ]
 
     def save_model(self):
+        """
+        Write the current model as the next version, then atomically point
+        `model_path` at it (hard link + os.replace, so readers never see a
+        partial file). Older versions beyond `keep_versions` are pruned;
+        workers still mapping them keep their pages until they reload.
+        """
+        pipeline, mlb, _, online, seen_through = self._model
         try:
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            joblib.dump((self.pipeline, self.mlb), self.model_path)
-            logger.info(f"Model saved to {self.model_path}")
+            directory = os.path.dirname(self.model_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            version, version_path = self._claim_version()
+
+            tmp_path = f"{version_path}.tmp"
+            # Uncompressed on purpose: compressed arrays cannot be memory-mapped
+            joblib.dump((pipeline, mlb, version, online, seen_through), tmp_path)
+            os.replace(tmp_path, version_path)
+
+            pointer_tmp = f"{self.model_path}.tmp"
+            if os.path.exists(pointer_tmp):
+                os.remove(pointer_tmp)
+            try:
+                os.link(version_path, pointer_tmp)
+            except OSError:
+                shutil.copyfile(version_path, pointer_tmp)  # filesystems without hard links
+            os.replace(pointer_tmp, self.model_path)
+
+            self._model = (pipeline, mlb, version, online, seen_through)
+            self._model_stat = self._stat()
+            self._prune_versions()
+            logger.info(f"Model version {version} saved to {version_path}")
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
 
     def load_model(self):
         try:
-            self.pipeline, self.mlb = joblib.load(self.model_path)
-            logger.info("Model loaded successfully.")
+            loaded = joblib.load(self.model_path, mmap_mode="r")
+            stat = self._stat()
+            if len(loaded) == 2:  # unversioned (pipeline, mlb) artifacts from older releases
+                loaded = (*loaded, 0)
+            if len(loaded) == 3:  # (pipeline, mlb, version), the pipeline possibly an online model
+                pipeline, mlb, version = loaded
+                if isinstance(pipeline, OnlineLabelModel):
+                    loaded = (None, None, version, pipeline, 0)
+                else:
+                    loaded = (pipeline, mlb, version, None, 0)
+            self._model = tuple(loaded)
+            self._model_stat = stat
+            logger.info(f"Model version {self.version} loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
 
+    def maybe_reload(self, force: bool = False) -> bool:
+        """
+        Reload if `model_path` was swapped to a new version. Checked at most
+        every `reload_interval` seconds (one stat call) unless `force`. Only
+        one thread reloads; the others keep predicting with the model they
+        already hold.
+        """
+        if not sklearn or (not force and time.monotonic() < self._next_reload_check):
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_reload_check = time.monotonic() + self.reload_interval
+            stat = self._stat()
+            if stat is None or stat == self._model_stat:
+                return False
+            self.load_model()
+            return self._model_stat == stat
+        finally:
+            self._reload_lock.release()
+
+    def versions(self) -> List[int]:
+        root, ext = os.path.splitext(self.model_path)
+        pattern = re.compile(re.escape(root) + r"\.v(\d+)" + re.escape(ext) + "$")
+        found = (pattern.match(path) for path in glob.glob(f"{glob.escape(root)}.v*{ext}"))
+        return sorted(int(match.group(1)) for match in found if match)
+
+    def _claim_version(self) -> Tuple[int, str]:
+        # O_EXCL makes the claim atomic: a concurrent saver that computed the
+        # same number moves on to the next one instead of overwriting it
+        version = max(self.versions(), default=0) + 1
+        while True:
+            version_path = self._version_path(version)
+            try:
+                os.close(os.open(version_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return version, version_path
+            except FileExistsError:
+                version += 1
+
+    def _version_path(self, version: int) -> str:
+        root, ext = os.path.splitext(self.model_path)
+        return f"{root}.v{version}{ext}"
+
+    def _prune_versions(self):
+        for version in self.versions()[:-self.keep_versions]:
+            os.remove(self._version_path(version))
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.model_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
 if __name__ == "__main__":
     # Sample Training
     train_texts = [
@@ -121,3 +431,4 @@ if __name__ == "__main__":
     # Test
     test = "I met my wife at school."
     print(f"Prediction for '{test}':", classifier.predict(test))
+    print("Batch, top 1:", classifier.predict_batch([test, "The navy sent me overseas."], top_k=1))
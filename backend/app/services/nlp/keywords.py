@@ -5,8 +5,9 @@ except ImportError:
     spacy = None
     PhraseMatcher = None
 from collections import Counter
-from typing import List, Dict, Any
+from typing import Iterable, Iterator, List, Dict, Any
 import logging
+from app.services.nlp.spacy_models import KEYWORD_DISABLED, get_pipeline
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,22 +19,24 @@ class KeywordDetector:
     """
 
     def __init__(self, model_name="en_core_web_sm"):
-        self.nlp = None
+        self.model_name = model_name
+        self._nlp = None
         self.matcher = None
-        
+
         if not spacy:
             logger.warning("spaCy not installed. Keyword detection disabled.")
-            return
 
-        try:
-            self.nlp = spacy.load(model_name)
-        except OSError:
-            logger.warning(f"spaCy model '{model_name}' not found. Loading blank 'en' model for testing.")
-            self.nlp = spacy.blank("en")
-
-        if self.nlp:
-            self.matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+    @property
+    def nlp(self):
+        """
+        Shared spaCy pipeline, loaded on first use. Falls back to a blank
+        'en' pipeline (tokenizer + PhraseMatcher only) if the model is missing.
+        """
+        if self._nlp is None and spacy:
+            self._nlp = get_pipeline(self.model_name, blank_fallback="en")
+            self.matcher = PhraseMatcher(self._nlp.vocab, attr="LOWER")
             self._initialize_custom_dictionaries()
+        return self._nlp
 
     def _initialize_custom_dictionaries(self):
         """
@@ -67,7 +70,36 @@ class KeywordDetector:
         if not self.nlp or not self.matcher:
              return {"entities": [], "custom_concepts": [], "weighted_keywords": []}
 
-        doc = self.nlp(text)
+        return self.detect_keywords_doc(self.nlp(text, disable=KEYWORD_DISABLED))
+
+    def detect_keywords_many(self,
+                             texts: Iterable[str],
+                             batch_size: int = 256,
+                             n_process: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming detect_keywords() for archive backfills. Texts are parsed with
+        nlp.pipe and results are yielded in input order, so memory stays flat
+        however many segments the iterable produces.
+
+        Args:
+            texts: Segments to analyze; consumed lazily.
+            batch_size: Texts buffered per nlp.pipe batch.
+            n_process: Worker processes for nlp.pipe (-1 uses every core).
+        """
+        if not self.nlp or not self.matcher:
+            for _ in texts:
+                yield {"entities": [], "custom_concepts": [], "weighted_keywords": []}
+            return
+
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=KEYWORD_DISABLED):
+            yield self.detect_keywords_doc(doc)
+
+    def detect_keywords_doc(self, doc) -> Dict[str, Any]:
+        """
+        detect_keywords() on an already parsed Doc from the shared pipeline.
+        """
+        if not self.nlp or not self.matcher:
+             return {"entities": [], "custom_concepts": [], "weighted_keywords": []}
         
         # 1. Standard NER (People, Dates, Locations)
         entities = []
@@ -1,6 +1,8 @@
-from typing import List, Dict, Any
+from typing import Collection, List, Dict, Any
 import logging
 import random
+from app.models.conversation import Role, Turn
+from app.services.nlp.markers import match_markers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,36 +39,36 @@ class LLMClient:
         }
 
     async def generate_follow_up(self, 
-                                 history: List[Dict[str, str]], 
+                                 history: List[Turn], 
                                  current_topic: str,
                                  user_response_length: str = "medium",
-                                 exclude_questions: List[str] = None) -> str:
+                                 exclude_questions: Collection[str] = None,
+                                 summary: str = "") -> str:
         """
         Generates a context-aware follow-up question.
         
         Args:
-            history: List of {"role": "user/ai", "content": "..."}
+            history: Recent conversation turns (the prompt window), oldest first.
             current_topic: Current active topic (e.g. "childhood")
             user_response_length: 'short', 'medium', 'long' (derived from context)
-            exclude_questions: List of questions already asked in this session.
+            exclude_questions: Questions already asked in this session.
+            summary: Rolling summary of turns older than `history`. An LLM-backed
+                     implementation sends it as prompt context instead of the
+                     full transcript; the template fallback here ignores it.
         """
-        last_user_msg = history[-1]['content'] if history and history[-1]['role'] == 'user' else ""
-        text_lower = last_user_msg.lower()
+        last_user_msg = history[-1].content if history and history[-1].role == Role.USER else ""
+        markers = match_markers(last_user_msg)
         exclude_questions = exclude_questions or []
         
         # 1. Check for specific confusion markers or requests to stop
-        if "stop" in last_user_msg.lower() or "tired" in last_user_msg.lower():
+        if markers["break"]:
             return "We can take a break whenever you like. Should we stop for now?"
             
-        # 2. Dynamic topic detection based on keywords
-        if any(word in text_lower for word in ["mom", "dad", "brother", "sister", "grandma", "grandpa", "family", "parents"]):
-            current_topic = "family"
-        elif any(word in text_lower for word in ["job", "work", "office", "boss", "career", "school", "college", "university"]):
-            current_topic = "career"
-        elif any(word in text_lower for word in ["trip", "travel", "vacation", "road", "visit", "summer", "mountain", "beach"]):
-            current_topic = "travel"
-        elif any(word in text_lower for word in ["sad", "cry", "miss", "lost", "passed away", "died", "gone", "grief"]):
-            current_topic = "emotional"
+        # 2. Dynamic topic detection based on keywords (first matching category wins)
+        for topic in ("family", "career", "travel", "emotional"):
+            if markers[topic]:
+                current_topic = topic
+                break
 
         # Expanded template library (Prompt 3.1)
         # Dictionary of lists. Each list contains unique questions.
@@ -0,0 +1,97 @@
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Tuple
+import re
+
+WORD = re.compile(r"\w+")
+
+# Marker phrases behind the sentiment and follow-up heuristics, by category.
+# Matching is on whole words, so inflections that matter are listed explicitly.
+MARKER_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    # SentimentAnalyzer custom dimensions
+    "nostalgia": (
+        "back in the day", "used to", "remember when", "good old days",
+        "miss those", "cherish", "unforgettable",
+    ),
+    "sensitive": (
+        "died", "passed away", "funeral", "accident", "lost him", "lost her",
+        "hospital", "pain", "suffered", "cried", "hurt", "scared",
+    ),
+    # LLMClient: the narrator asking for a break
+    "break": ("stop", "tired"),
+    # LLMClient topic detection, in priority order
+    "family": ("mom", "dad", "brother", "sister", "grandma", "grandpa", "family", "parents"),
+    "career": ("job", "work", "office", "boss", "career", "school", "college", "university"),
+    "travel": ("trip", "travel", "vacation", "road", "visit", "summer", "mountain", "beach"),
+    "emotional": (
+        "sad", "cry", "cried", "miss", "missed", "lost", "passed away", "died", "gone", "grief",
+    ),
+}
+
+class MarkerMatcher:
+    """
+    Aho-Corasick automaton over word tokens. All phrases of all categories
+    are found in a single left-to-right pass over the text, and because
+    the alphabet is whole words, "lost" never fires inside "almost" and
+    "stop" never fires inside "stopped".
+    """
+
+    def __init__(self, categories: Mapping[str, Iterable[str]]):
+        self.categories = tuple(categories)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (category, phrase) pairs ending there, including via fail links
+        self._out: List[Tuple[Tuple[str, str], ...]] = [()]
+
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                state = 0
+                for word in WORD.findall(phrase.lower()):
+                    if word not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append(())
+                        self._goto[state][word] = len(self._goto) - 1
+                    state = self._goto[state][word]
+                self._out[state] += ((category, phrase),)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0) if state else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def find(self, text: str) -> Mapping[str, FrozenSet[str]]:
+        """
+        Returns every category mapped to the distinct phrases found in `text`
+        (an empty set when none matched).
+        """
+        found: Dict[str, set] = {category: set() for category in self.categories}
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for word in WORD.findall(text.lower()):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for category, phrase in out[state]:
+                found[category].add(phrase)
+        return MappingProxyType({category: frozenset(hits) for category, hits in found.items()})
+
+MARKER_MATCHER = MarkerMatcher(MARKER_CATEGORIES)
+
+@lru_cache(maxsize=256)
+def match_markers(text: str) -> Mapping[str, FrozenSet[str]]:
+    """
+    Scans `text` with the shared matcher. Results are read-only and cached, so
+    the sentiment pass and the follow-up generator scanning the same turn
+    share one scan.
+    """
+    return MARKER_MATCHER.find(text)
@@ -1,29 +1,79 @@
+from collections import OrderedDict
 import re
-import spacy
 from nltk.stem import PorterStemmer
+from typing import Iterable, Iterator
 import logging
+from app.services.nlp.spacy_models import PREPROCESSING_DISABLED, get_pipeline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _clean_match(match) -> str:
+    word = match.group("word")
+    if word:
+        return word
+    if match.group(0)[0].isspace():
+        return " "
+    # A filler takes the whitespace after it along, which is only safe when
+    # whitespace (or the start of the text) precedes it: in "wait...um I" the
+    # space is all that separates "wait..." from "i"
+    start = match.start()
+    if match.group("trail") and start and not match.string[start - 1].isspace():
+        return " "
+    return ""
+
+class LRUCache:
+    """
+    Small bounded LRU map with hit/miss counters (stems, lemmas).
+    Not locked: each TextPreprocessor owns its caches.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
 class TextPreprocessor:
     """
     A module for preprocessing text specifically designer for elderly speech patterns.
     Implements cleaning, tokenization, stemming, and lemmatization.
     """
 
-    def __init__(self, model_name="en_core_web_sm"):
+    def __init__(self, model_name="en_core_web_sm", cache_size: int = 4096):
         """
-        Initialize the preprocessor with spaCy model and NLTK stemmer.
+        Initialize the preprocessor with NLTK stemmer. The spaCy model comes
+        from the shared registry and is only loaded on first use. Stems and
+        lemmas are memoized in bounded LRU caches of `cache_size` entries:
+        narrators reuse a small vocabulary, so most lookups are hits.
         """
-        self.nlp = None
+        self.model_name = model_name
         self.stemmer = None
-        
-        try:
-            self.nlp = spacy.load(model_name)
-        except (OSError, ImportError, NameError):
-            logger.warning(f"spaCy model '{model_name}' not found. Text processing will be limited.")
+        self.stem_cache = LRUCache(cache_size)
+        self.lemma_cache = LRUCache(cache_size)
 
         try:
             self.stemmer = PorterStemmer()
@@ -37,6 +87,30 @@ class TextPreprocessor:
         ]
         self.repetition_pattern = r"(\b\w+\b)( \1\b)+"  # Word repetition "very very"
 
+        # All of the above as one alternation, so clean_text is a single pass:
+        # at a word boundary, a filler (with the whitespace after it) or a
+        # repeated-word run; otherwise whitespace that needs collapsing. Single
+        # spaces never match, so the replacement callback only runs where the
+        # text actually changes. A repeat never swallows the start of a filler
+        # ("i i mean" -> "i"), and \w++ is possessive so a non-repeated word
+        # fails without backtracking through its prefixes.
+        fillers = "|".join(self.filler_patterns)
+        bare_fillers = "|".join(pattern.removeprefix(r"\b") for pattern in self.filler_patterns)
+        cleaner = (
+            rf"\b(?:(?:{bare_fillers})(?P<trail>\s*)|(?P<word>\w++)(?: (?!{fillers})(?P=word)\b)+)"
+            r"|\s{2,}|[^\S ]+"
+        )
+        self._cleaner = re.compile(cleaner)
+        # Same matches on un-lowercased text, so process_doc gets offsets into doc.text
+        self._span_finder = re.compile(cleaner, re.IGNORECASE)
+
+    @property
+    def nlp(self):
+        """
+        Shared spaCy pipeline, or None if the model is unavailable.
+        """
+        return get_pipeline(self.model_name)
+
     def clean_text(self, text: str) -> str:
         """
         Cleans the input text by removing fillers, normalizing whitespace,
@@ -45,55 +119,119 @@ class TextPreprocessor:
         if not text:
             return ""
 
-        cleaned = text.lower()
-        
-        # Remove filler words
-        for pattern in self.filler_patterns:
-            cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE)
-            
-        # Reduce repetitions (e.g., "very very" -> "very")
-        # Note: sometimes repetition is emphatic, but for NLP analysis we often want to reduce it
-        cleaned = re.sub(self.repetition_pattern, r"\1", cleaned)
-        
-        # Remove extra whitespace
-        cleaned = re.sub(r"\s+", " ", cleaned).strip()
-        
-        return cleaned
+        # Fillers are dropped, repetitions reduced (e.g., "very very" -> "very"),
+        # whitespace collapsed. Note: sometimes repetition is emphatic, but for
+        # NLP analysis we often want to reduce it
+        return self._cleaner.sub(_clean_match, text.lower()).strip()
+
+    def clean_many(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        clean_text() over a stream of transcripts, yielded lazily in order.
+        """
+        for text in texts:
+            yield self.clean_text(text)
 
-    def process(self, text: str) -> dict:
+    def process(self, text: str, lemmas: bool = True, stems: bool = True) -> dict:
         """
         Full preprocessing pipeline: Clean -> Tokenize -> Lemmatize -> Stem.
         Returns a dictionary with raw, cleaned, lemmas, and stems.
+
+        Pass lemmas=False and/or stems=False to skip those steps (their lists
+        come back empty). Without lemmas only the tokenizer runs; with neither,
+        spaCy is not called at all.
         """
         cleaned_text = self.clean_text(text)
         
-        if not self.nlp:
-            # Fallback if spaCy is missing: simple split
+        nlp = self.nlp
+        if not nlp or not (lemmas or stems):
+            # Fallback if spaCy is missing (or not needed): simple split
             tokens = cleaned_text.split()
             return {
                 "original": text,
                 "cleaned": cleaned_text,
                 "tokens": tokens,
-                "lemmas": tokens, # No lemmatization without spacy
-                "stems": tokens
+                "lemmas": tokens if lemmas and not nlp else [], # No lemmatization without spacy
+                "stems": tokens if stems and not nlp else []
             }
 
-        doc = self.nlp(cleaned_text)
-        
-        tokens = [token.text for token in doc]
-        lemmas = [token.lemma_ for token in doc if not token.is_punct and not token.is_space]
-        stems = []
-        if self.stemmer:
-             stems = [self.stemmer.stem(token.text) for token in doc if not token.is_punct and not token.is_space]
-        
+        if not lemmas:
+            return self._from_tokens(text, cleaned_text, list(nlp.make_doc(cleaned_text)), lemmas, stems)
+
+        # The lemmatizer component is skipped: lemmas come from the LRU cache,
+        # and only cache misses are lemmatized.
+        doc = nlp(cleaned_text, disable=PREPROCESSING_DISABLED + ("lemmatizer",))
+        return self._from_tokens(text, cleaned_text, list(doc), lemmas, stems, _lemmatize_fn(nlp))
+
+    def process_doc(self, doc, lemmas: bool = True, stems: bool = True) -> dict:
+        """
+        Same output as process(), from a Doc already parsed on the raw text
+        (see AnalysisPipeline). Instead of re-parsing the cleaned string, the
+        tokens inside the character spans clean_text() removes (fillers,
+        including multi-word ones and stutters, and repeated words) are dropped.
+        """
+        dropped = self._dropped_spans(doc.text)
+        kept = []
+        span = next(dropped, None)
+        for token in doc:
+            while span and span[1] <= token.idx:
+                span = next(dropped, None)
+            if span and span[0] <= token.idx:
+                continue
+            kept.append(token)
+        return self._from_tokens(doc.text, self.clean_text(doc.text), kept, lemmas, stems)
+
+    def _dropped_spans(self, text: str) -> Iterator[tuple]:
+        """
+        (start, end) offsets of the text clean_text() removes, in order.
+        """
+        for match in self._span_finder.finditer(text):
+            word = match.group("word")
+            if word:
+                yield match.start() + len(word), match.end()
+            elif not match.group(0)[0].isspace():
+                yield match.span()
+
+    def cache_stats(self) -> dict:
+        return {"stems": self.stem_cache.stats(), "lemmas": self.lemma_cache.stats()}
+
+    def _from_tokens(self, original: str, cleaned_text: str, doc_tokens: list,
+                     lemmas: bool = True, stems: bool = True, lemmatize=None) -> dict:
+        words = [token for token in doc_tokens if not token.is_punct and not token.is_space]
         return {
-            "original": text,
+            "original": original,
             "cleaned": cleaned_text,
-            "tokens": tokens,
-            "lemmas": lemmas,
-            "stems": stems
+            "tokens": [token.text for token in doc_tokens],
+            "lemmas": [self._lemma(token, lemmatize) for token in words] if lemmas else [],
+            "stems": [self._stem(token.lower_) for token in words] if stems and self.stemmer else []
         }
 
+    def _stem(self, word: str) -> str:
+        stem = self.stem_cache.get(word)
+        if stem is None:
+            stem = self.stemmer.stem(word)
+            self.stem_cache.put(word, stem)
+        return stem
+
+    def _lemma(self, token, lemmatize=None) -> str:
+        # Lemmas set upstream (attribute ruler exceptions, or a full pipeline run) win
+        if token.lemma_ or lemmatize is None:
+            # Blank pipelines have no lemmatizer; fall back to the lowercased form
+            return (token.lemma_ or token.lower_).lower()
+        key = (token.lower_, token.tag_)
+        lemma = self.lemma_cache.get(key)
+        if lemma is None:
+            lemma = lemmatize(token)[0].lower()
+            self.lemma_cache.put(key, lemma)
+        return lemma
+
+def _lemmatize_fn(nlp):
+    """
+    The pipeline lemmatizer's per-token function, or None if it has none.
+    """
+    if "lemmatizer" not in nlp.pipe_names:
+        return None
+    return nlp.get_pipe("lemmatizer").lemmatize
+
 if __name__ == "__main__":
     # Example Usage
     preprocessor = TextPreprocessor()
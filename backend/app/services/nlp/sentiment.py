@@ -7,8 +7,11 @@ except ImportError:
     SentimentIntensityAnalyzer = None
     nltk = None
 import logging
-from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Collection, Dict, Iterable, List, Any
 import math
+import os
+from app.services.nlp.markers import MARKER_CATEGORIES, match_markers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,31 +37,25 @@ class SentimentAnalyzer:
         else:
             logger.warning("NLTK/VADER not available. Sentiment analysis will be dummy.")
         
-        # Heuristics for unique emotional states
-        self.nostalgia_markers = [
-            "back in the day", "used to", "remember when", "good old days", 
-            "miss those", "cherish", "unforgettable"
-        ]
-        
-        self.sensitive_markers = [
-            "died", "passed away", "funeral", "accident", "lost him", "lost her",
-            "hospital", "pain", "suffered", "cried", "hurt", "scared"
-        ]
+        # Heuristics for unique emotional states (matched by the shared MarkerMatcher)
+        self.nostalgia_markers = MARKER_CATEGORIES["nostalgia"]
+        self.sensitive_markers = MARKER_CATEGORIES["sensitive"]
 
-    def _detect_custom_emotion(self, text: str, markers: List[str]) -> float:
+    def _detect_custom_emotion(self, found: Collection[str]) -> float:
         """
         Simple frequency-based score for custom emotional categories.
-        Returns a score between 0.0 and 1.0 (normalized roughly).
+        Takes the distinct markers found in the text. Returns a score between 0.0 and 1.0 (normalized roughly).
         """
-        text_lower = text.lower()
-        count = sum(1 for marker in markers if marker in text_lower)
+        count = len(found)
         # S-curve normalization: 1 match -> 0.5, 3 matches -> 0.95
         if count == 0: return 0.0
         return 1.0 - (0.5 ** count)
 
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def analyze(self, text: str, include_subjectivity: bool = True) -> Dict[str, Any]:
         """
         Perform comprehensive sentiment analysis on a segment of text.
+        TextBlob subjectivity is the most expensive step; pass
+        include_subjectivity=False to skip it (scores["subjectivity"] is then None).
         """
         if not text:
             return {"sentiment": "neutral", "scores": {}, "flags": []}
@@ -71,14 +68,17 @@ class SentimentAnalyzer:
         
         # 2. Subjectivity (TextBlob)
         # 0.0 (objective) to 1.0 (subjective)
-        subjectivity = 0.5
-        if TextBlob:
-            blob = TextBlob(text)
-            subjectivity = blob.sentiment.subjectivity
+        subjectivity = None
+        if include_subjectivity:
+            subjectivity = 0.5
+            if TextBlob:
+                blob = TextBlob(text)
+                subjectivity = blob.sentiment.subjectivity
         
-        # 3. Custom Dimensions
-        nostalgia_score = self._detect_custom_emotion(text, self.nostalgia_markers)
-        trauma_score = self._detect_custom_emotion(text, self.sensitive_markers)
+        # 3. Custom Dimensions (one marker scan covers both categories)
+        markers = match_markers(text)
+        nostalgia_score = self._detect_custom_emotion(markers["nostalgia"])
+        trauma_score = self._detect_custom_emotion(markers["sensitive"])
         
         # 4. Classification Logic
         compound = vader_scores['compound']
@@ -109,6 +109,37 @@ class SentimentAnalyzer:
             "is_sensitive": trauma_score > 0.3 or compound < -0.6
         }
 
+    def analyze_batch(self,
+                      texts: Iterable[str],
+                      include_subjectivity: bool = False,
+                      n_jobs: int = 1,
+                      chunk_size: int = 512) -> List[Dict[str, Any]]:
+        """
+        Analyze many segments (e.g. archive re-analysis). Results are in input order.
+        Each segment still goes through analyze() one at a time; with n_jobs > 1
+        the segments are fanned out in chunks over a process pool, so any
+        gain comes from using more cores, not from cheaper per-segment work.
+
+        Args:
+            texts: Segments to analyze.
+            include_subjectivity: Run TextBlob as well (off by default: it
+                                  roughly doubles the cost per segment).
+            n_jobs: Worker processes; 1 runs in-process, -1 uses every core.
+            chunk_size: Segments sent to a worker at a time.
+        """
+        texts = list(texts)
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs <= 1 or len(texts) <= chunk_size:
+            return [self.analyze(t, include_subjectivity=include_subjectivity) for t in texts]
+
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for chunk_result in pool.map(_analyze_chunk, chunks, [include_subjectivity] * len(chunks)):
+                results.extend(chunk_result)
+        return results
+
     def analyze_conversation_flow(self, segments: List[str]) -> List[float]:
         """
         Generates an 'emotional journey map' by tracking the compound score
@@ -117,6 +148,66 @@ class SentimentAnalyzer:
         if not self.sia: return [0.0] * len(segments)
         return [self.sia.polarity_scores(seg)['compound'] for seg in segments]
 
+class EmotionalTrajectory:
+    """
+    Per-session emotional journey, updated one turn at a time.
+    Holds the same compound series analyze_conversation_flow would return,
+    plus running aggregates, so consumers never re-score the transcript.
+    """
+
+    def __init__(self, points: List[float] = None, smoothing: float = 0.3):
+        self.points: List[float] = []
+        self.smoothing = smoothing
+        self.mean = 0.0
+        self.low = 0.0
+        self.high = 0.0
+        self.trend = 0.0  # exponential moving average of compound scores
+        for point in points or []:
+            self.add(point)
+
+    def add(self, compound: float):
+        if not self.points:
+            self.low = self.high = self.trend = compound
+        else:
+            self.low = min(self.low, compound)
+            self.high = max(self.high, compound)
+            self.trend += self.smoothing * (compound - self.trend)
+        self.points.append(compound)
+        self.mean += (compound - self.mean) / len(self.points)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "turns": len(self.points),
+            "mean": self.mean,
+            "low": self.low,
+            "high": self.high,
+            "trend": self.trend,
+        }
+
+    def clear(self):
+        self.__init__(smoothing=self.smoothing)
+
+_worker_analyzer = None
+
+def _get_worker_analyzer() -> SentimentAnalyzer:
+    """
+    The analyzer for this process, built on first use (once per pool worker).
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = SentimentAnalyzer()
+    return _worker_analyzer
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """
+    Process-pool entry point for a single segment.
+    """
+    return _get_worker_analyzer().analyze(text)
+
+def _analyze_chunk(texts: List[str], include_subjectivity: bool) -> List[Dict[str, Any]]:
+    analyzer = _get_worker_analyzer()
+    return [analyzer.analyze(t, include_subjectivity=include_subjectivity) for t in texts]
+
 if __name__ == "__main__":
     analyzer = SentimentAnalyzer()
     
@@ -0,0 +1,78 @@
+try:
+    import spacy
+except ImportError:
+    spacy = None
+from typing import Any, Dict, Optional
+import logging
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Components a caller can skip at call time, e.g. nlp(text, disable=KEYWORD_DISABLED).
+# Unknown names are ignored by spaCy, so these are safe for blank pipelines too.
+PREPROCESSING_DISABLED = ("parser", "ner")  # tokens + lemmas only
+KEYWORD_DISABLED = ("parser",)              # entities, POS and lemmas; no dependency parse
+
+_pipelines: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+def get_pipeline(model_name: str = "en_core_web_sm", blank_fallback: Optional[str] = None):
+    """
+    Process-wide spaCy pipeline registry. Each model is loaded once, on first
+    request, and shared by every NLP service in the process.
+
+    Returns None when spaCy or the model is unavailable, unless `blank_fallback`
+    names a language (e.g. "en"), in which case a shared blank pipeline is returned.
+    """
+    if model_name not in _pipelines:
+        with _lock:
+            if model_name not in _pipelines:
+                _pipelines[model_name] = _load(model_name)
+    nlp = _pipelines[model_name]
+    if nlp is None and blank_fallback:
+        return get_blank(blank_fallback)
+    return nlp
+
+def get_blank(lang: str = "en"):
+    """
+    Shared tokenizer-only pipeline for `lang`.
+    """
+    key = f"blank:{lang}"
+    if key not in _pipelines:
+        with _lock:
+            if key not in _pipelines:
+                _pipelines[key] = spacy.blank(lang) if spacy else None
+    return _pipelines[key]
+
+def _load(model_name: str):
+    if not spacy:
+        logger.warning("spaCy not installed. Text processing will be limited.")
+        return None
+    try:
+        nlp = spacy.load(model_name)
+    except OSError:
+        logger.warning(f"spaCy model '{model_name}' not found.")
+        return None
+    logger.info(f"Loaded spaCy model '{model_name}' (components: {', '.join(nlp.pipe_names)})")
+    return nlp
+
+def register(model_name: str, nlp):
+    """
+    Install an already built pipeline under `model_name` (custom models, tests).
+    """
+    with _lock:
+        _pipelines[model_name] = nlp
+
+def loaded_pipelines() -> Dict[str, Any]:
+    """
+    Snapshot of the registry (failed loads map to None).
+    """
+    return dict(_pipelines)
+
+def clear():
+    """
+    Drop every cached pipeline (tests and benchmarks).
+    """
+    with _lock:
+        _pipelines.clear()
@@ -0,0 +1,111 @@
+try:
+    from spacy.lang.en.stop_words import STOP_WORDS
+except ImportError:
+    STOP_WORDS = {"the", "a", "an", "and", "or", "but", "i", "we", "my", "our", "it", "was", "were",
+                  "is", "to", "of", "in", "on", "at", "for", "with", "that", "this", "there", "had", "have"}
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+import re
+
+from app.models.conversation import Role, Turn
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+WORD = re.compile(r"\w[\w'-]*")
+
+class RollingSummary:
+    """
+    Incrementally maintained, extractive summary of turns that have scrolled
+    out of the prompt window, in two parts:
+
+    - recent points: the first sentence of each of the last `max_points`
+      narrator turns, verbatim;
+    - a head section that older points are compacted into instead of being
+      dropped: counts of their content words (names, places, years, ...),
+      capped at `max_head_terms` entries, of which the `head_size` most
+      mentioned are shown.
+
+    Update cost and summary length stay bounded no matter how long the
+    session runs, while the start of the session is still represented.
+    """
+
+    def __init__(self,
+                 max_points: int = 8,
+                 max_point_chars: int = 160,
+                 points: Optional[List[str]] = None,
+                 head_size: int = 12,
+                 max_head_terms: int = 200,
+                 head: Optional[List[List[Any]]] = None):
+        self.max_point_chars = max_point_chars
+        self.max_points = max_points
+        self.head_size = head_size
+        self.max_head_terms = max_head_terms
+        self.points = deque(points or [])
+        # lowercased term -> [display form, mentions], in first-mention order
+        self.head: Dict[str, List[Any]] = {term.lower(): [term, count] for term, count in head or []}
+        self._compact()
+
+    @classmethod
+    def from_data(cls, data: Union[None, List[str], Dict[str, Any]]) -> "RollingSummary":
+        """
+        Restore from to_dict() output (or a plain list of points from older sessions).
+        """
+        if isinstance(data, dict):
+            return cls(points=data.get("points"), head=data.get("head"))
+        return cls(points=data)
+
+    def add(self, turn: Turn):
+        """
+        Fold one turn into the summary. Interviewer questions are skipped:
+        the narrator's answers carry the content worth remembering.
+        """
+        if turn.role != Role.USER or not turn.content.strip():
+            return
+        first_sentence = SENTENCE_END.split(turn.content.strip(), maxsplit=1)[0]
+        if len(first_sentence) > self.max_point_chars:
+            first_sentence = first_sentence[:self.max_point_chars].rsplit(" ", 1)[0] + "..."
+        self.points.append(first_sentence)
+        self._compact()
+
+    def _compact(self):
+        while len(self.points) > self.max_points:
+            self._merge_into_head(self.points.popleft())
+
+    def _merge_into_head(self, point: str):
+        for word in WORD.findall(point):
+            key = word.lower()
+            if key in STOP_WORDS or len(key) < 3:
+                continue
+            if key in self.head:
+                self.head[key][1] += 1
+            else:
+                self.head[key] = [word, 1]
+        while len(self.head) > self.max_head_terms:
+            # Drop the least mentioned term, oldest first among ties
+            rarest = min(self.head, key=lambda k: self.head[k][1])
+            del self.head[rarest]
+
+    def head_terms(self) -> List[str]:
+        """
+        The `head_size` most mentioned terms from compacted points (earliest first among ties).
+        """
+        ranked = sorted(self.head.values(), key=lambda entry: -entry[1])
+        return [term for term, _ in ranked[:self.head_size]]
+
+    def text(self) -> str:
+        parts = []
+        terms = self.head_terms()
+        if terms:
+            parts.append("Earlier in the session, the narrator talked about: " + ", ".join(terms) + ".")
+        if self.points:
+            parts.append("More recently, the narrator mentioned: " + " | ".join(self.points))
+        return " ".join(parts)
+
+    def to_list(self) -> List[str]:
+        return list(self.points)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"points": list(self.points), "head": list(self.head.values())}
+
+    def clear(self):
+        self.points.clear()
+        self.head.clear()
@@ -1,25 +1,111 @@
 try:
     import gensim
     from gensim import corpora
-    from gensim.models import LdaModel, CoherenceModel
+    from gensim.models import LdaModel, LdaMulticore, CoherenceModel
+    from gensim.matutils import dirichlet_expectation
+    from gensim.models.callbacks import Metric
+    from scipy import sparse
 except ImportError:
     gensim = None
-from typing import List, Dict, Any, Tuple
+    Metric = object
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Any, NamedTuple, Optional, Tuple, Union
+import json
+import os
+import re
+import shutil
+import tempfile
 import logging
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class PassProgress(Metric):
+    """
+    gensim callback metric that reports LDA training progress once per pass.
+    """
+
+    def __init__(self, passes: int, progress: Callable[[float, str], None]):
+        self.passes = passes
+        self.progress = progress
+        self.done = 0
+        self.logger = "shell"
+        self.title = "pass"
+
+    def get_value(self, **kwargs) -> int:
+        self.done += 1
+        self.progress(self.done / self.passes, f"LDA pass {self.done}/{self.passes}")
+        return self.done
+
+# Token lists, either re-iterable (list, file-backed reader) or a zero-argument
+# callable returning a fresh iterator, so LDA can make several passes.
+Documents = Union[Iterable[List[str]], Callable[[], Iterable[List[str]]]]
+
+def _iterate(documents: Documents) -> Iterable[List[str]]:
+    return documents() if callable(documents) else documents
+
+def _require_reiterable(documents: Documents):
+    # A generator would be used up by the first pass, leaving later passes
+    # to train on nothing without any error
+    if not callable(documents) and iter(documents) is documents:
+        raise TypeError("documents is a one-shot iterator; pass a list, a re-iterable, "
+                        "or a zero-argument callable returning a fresh iterator")
+
+class BowCorpus:
+    """
+    Streams bag-of-words vectors from token lists, one document at a time,
+    instead of materializing the whole corpus.
+    """
+
+    def __init__(self, documents: Documents, dictionary):
+        self.documents = documents
+        self.dictionary = dictionary
+
+    def __iter__(self):
+        for tokens in _iterate(self.documents):
+            yield self.dictionary.doc2bow(tokens)
+
+class TopicAssignments(NamedTuple):
+    """
+    Flat (document index, topic id, probability) columns, one row per
+    document-topic pair above the probability cutoff, ordered by document.
+    """
+    doc: "np.ndarray"    # int64, position in the input iterable
+    topic: "np.ndarray"  # int32
+    prob: "np.ndarray"   # float32
+
 class TopicModeler:
     """
     Implements LDA Topic Modeling to discover themes in family stories.
     Manages a dictionary and corpus for the family's specific vocabulary.
+
+    With workers > 1 training uses LdaMulticore (symmetric alpha, since it
+    cannot auto-tune alpha). Documents are streamed, never held as a corpus.
+
+    With a `model_dir`, save() writes numbered versions (v1/, v2/, ...) with
+    the large arrays in separate .npy files, and a CURRENT file naming the
+    newest one; load() memory-maps them read-only. Topic labels and top words
+    are computed once per trained/updated/loaded model, so inference is one
+    get_document_topics call plus a list lookup.
     """
 
-    def __init__(self, num_topics=5):
+    def __init__(self, num_topics=5, workers: int = 1, chunksize: int = 2000, passes: int = 10,
+                 model_dir: Optional[str] = None, keep_versions: int = 3):
         self.num_topics = num_topics
+        self.workers = workers
+        self.chunksize = chunksize
+        self.passes = passes
+        self.model_dir = model_dir
+        self.keep_versions = keep_versions
         self.dictionary = None
         self.lda_model = None
+        self.version = 0
+        # Version directory matching the in-memory model (None once trained further)
+        self._saved_dir: Optional[str] = None
+        # Per topic id: (label, top words), rebuilt whenever the model changes
+        self._topics: List[Tuple[str, List[str]]] = []
         
         # Predefined mapping attempting to label discovered topics
         self.topic_labels = {
@@ -29,42 +115,95 @@ class TopicModeler:
             "family": ["marriage", "wedding", "husband", "wife", "children", "son", "daughter"]
         }
 
-    def train(self, tokenized_docs: List[List[str]]):
+        if gensim and model_dir and os.path.exists(self._current_path()):
+            self.load()
+
+    def train(self, tokenized_docs: Documents, progress: Optional[Callable[[float, str], None]] = None):
         """
-        Train the LDA model on a collection of stories (list of token lists).
+        Train the LDA model on a collection of stories (token lists; see Documents).
+        Raises TypeError for a one-shot iterator such as a generator, since
+        training makes several passes over the documents.
+        `progress(fraction, message)` is called after every pass; an exception
+        raised from it (e.g. a cancelled job) aborts training.
         """
         if not gensim:
             logger.warning("Gensim not installed. Topic modeling disabled.")
             return
+        _require_reiterable(tokenized_docs)
 
-        if not tokenized_docs:
+        # Create dictionary (one streaming pass)
+        dictionary = corpora.Dictionary(_iterate(tokenized_docs))
+        if not dictionary.num_docs:
             logger.warning("No documents provided for training.")
             return
-
-        # Create dictionary
-        self.dictionary = corpora.Dictionary(tokenized_docs)
         # Filter extremes: remove words in <3 docs or >80% of docs
         # (Be careful with small datasets: adjusting min_no below)
-        if len(tokenized_docs) > 5:
-            self.dictionary.filter_extremes(no_below=2, no_above=0.8)
+        if dictionary.num_docs > 5:
+            dictionary.filter_extremes(no_below=2, no_above=0.8)
+        self.dictionary = dictionary
 
-        # Create Corpus (BoW)
-        corpus = [self.dictionary.doc2bow(text) for text in tokenized_docs]
+        # Streamed Corpus (BoW)
+        corpus = BowCorpus(tokenized_docs, self.dictionary)
         
         # Train LDA
-        self.lda_model = LdaModel(
-            corpus=corpus,
-            id2word=self.dictionary,
-            num_topics=self.num_topics,
-            random_state=42,
-            update_every=1,
-            chunksize=10,
-            passes=10,
-            alpha='auto',
-            per_word_topics=True
-        )
+        if self.workers > 1:
+            # LdaMulticore takes no callbacks: run the passes one update at a time
+            self.lda_model = LdaMulticore(
+                id2word=self.dictionary,
+                num_topics=self.num_topics,
+                workers=self.workers,
+                random_state=42,
+                chunksize=self.chunksize,
+                passes=1,
+                per_word_topics=True
+            )
+            for done in range(1, self.passes + 1):
+                self.lda_model.update(corpus)
+                if progress:
+                    progress(done / self.passes, f"LDA pass {done}/{self.passes}")
+        else:
+            self.lda_model = LdaModel(
+                corpus=corpus,
+                id2word=self.dictionary,
+                num_topics=self.num_topics,
+                random_state=42,
+                update_every=1,
+                chunksize=self.chunksize,
+                passes=self.passes,
+                alpha='auto',
+                per_word_topics=True,
+                callbacks=[PassProgress(self.passes, progress)] if progress else None
+            )
+            self.lda_model.callbacks = None  # the progress closure must not end up in save()
+        self._refresh_topics()
+        self._saved_dir = None
         logger.info("LDA Model trained successfully.")
 
+    def update(self, tokenized_docs: Documents, passes: int = 1):
+        """
+        Fold new stories into the trained model (online LDA) instead of
+        retraining. The vocabulary is fixed at train() time, so words the
+        dictionary has never seen are ignored until the next full train.
+        Trains from scratch if there is no model yet.
+        """
+        if not gensim:
+            return
+        if not self.lda_model:
+            self.train(tokenized_docs)
+            return
+        _require_reiterable(tokenized_docs)  # gensim also counts the corpus before each pass
+
+        corpus = BowCorpus(tokenized_docs, self.dictionary)
+        _make_writable(self.lda_model)
+        for _ in range(passes):
+            if isinstance(self.lda_model, LdaMulticore):
+                self.lda_model.update(corpus)
+            else:
+                self.lda_model.update(corpus, passes=1)
+        self._refresh_topics()
+        self._saved_dir = None
+        logger.info("LDA Model updated.")
+
     def get_topic_for_document(self, tokens: List[str]) -> List[Tuple[str, float]]:
         """
         Infers the topic distribution for a new document.
@@ -76,31 +215,87 @@ class TopicModeler:
         bow = self.dictionary.doc2bow(tokens)
         topic_dist = self.lda_model.get_document_topics(bow)
         
-        # Map ID to human-readable label if possible
-        results = []
-        for topic_id, prob in topic_dist:
-            label = self._label_topic(topic_id)
-            results.append((label, float(prob)))
-            
+        # Map ID to human-readable label (precomputed)
+        results = [(self._topics[topic_id][0], float(prob)) for topic_id, prob in topic_dist]
         return sorted(results, key=lambda x: x[1], reverse=True)
 
-    def _label_topic(self, topic_id: int) -> str:
+    def get_topics_for_documents(self,
+                                 documents: Iterable[List[str]],
+                                 chunksize: int = 1000,
+                                 workers: int = 1,
+                                 minimum_probability: Optional[float] = None) -> TopicAssignments:
         """
-        Attempt to label a topic by comparing its top words to predefined categories.
+        Topic inference for a whole backlog of token lists. Documents are
+        streamed in chunks of `chunksize`, each chunk running one batched
+        E-step; with workers > 1 chunks are spread over a process pool (which
+        memory-maps the saved model version when the model is saved, instead
+        of receiving a pickled copy).
+
+        Returns compact columns for bulk insertion; map topic ids to names
+        with `labels`. Topics below `minimum_probability` (the model's own
+        cutoff by default, as in get_topic_for_document) are left out.
         """
-        top_words = [word for word, _ in self.lda_model.show_topic(topic_id, topn=10)]
-        
-        best_label = f"Topic {topic_id}"
-        max_overlap = 0
-        
-        for label, keywords in self.topic_labels.items():
-            # intersection of top_words and keywords
-            overlap = len(set(top_words) & set(keywords))
-            if overlap > max_overlap:
-                max_overlap = overlap
-                best_label = label.capitalize()
-                
-        return best_label
+        empty = TopicAssignments(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+        if not self.lda_model or not self.dictionary or not gensim:
+            return empty
+        if minimum_probability is None:
+            minimum_probability = self.lda_model.minimum_probability
+        minimum_probability = max(minimum_probability, 1e-8)
+
+        bow_chunks = _chunks((self.dictionary.doc2bow(tokens) for tokens in documents), chunksize)
+        if workers > 1:
+            source = os.path.join(self._saved_dir, "lda") if self._saved_dir else self.lda_model
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_inference_worker,
+                                     initargs=(source,)) as executor:
+                parts = self._collect(_map_bounded(executor, _infer_chunk, bow_chunks, 2 * workers), minimum_probability)
+        else:
+            parts = self._collect((_infer(self.lda_model, chunk) for chunk in bow_chunks), minimum_probability)
+
+        if not parts:
+            return empty
+        return TopicAssignments(*(np.concatenate(column) for column in zip(*parts)))
+
+    @staticmethod
+    def _collect(distributions: Iterable["np.ndarray"], minimum_probability: float) -> List[TopicAssignments]:
+        parts = []
+        offset = 0
+        for theta in distributions:
+            rows, topics = np.nonzero(theta >= minimum_probability)
+            parts.append(TopicAssignments((rows + offset).astype(np.int64), topics.astype(np.int32),
+                                          theta[rows, topics].astype(np.float32)))
+            offset += len(theta)
+        return parts
+
+    @property
+    def labels(self) -> List[str]:
+        """
+        Topic names by topic id (e.g. labels[assignments.topic[i]]).
+        """
+        return [label for label, _ in self._topics]
+
+    def _refresh_topics(self, topn: int = 10):
+        """
+        Label every topic by comparing its top words to predefined categories.
+        Runs once per model change; top words for all topics come from one
+        argsort over the topic-word matrix.
+        """
+        topic_words = self.lda_model.get_topics()
+        top_ids = np.argsort(-topic_words, axis=1, kind="stable")[:, :topn]
+        keyword_sets = [(label.capitalize(), set(keywords)) for label, keywords in self.topic_labels.items()]
+
+        topics = []
+        for topic_id, word_ids in enumerate(top_ids):
+            top_words = [self.dictionary[int(word_id)] for word_id in word_ids]
+            best_label = f"Topic {topic_id}"
+            max_overlap = 0
+            for label, keywords in keyword_sets:
+                # intersection of top_words and keywords
+                overlap = len(keywords.intersection(top_words))
+                if overlap > max_overlap:
+                    max_overlap = overlap
+                    best_label = label
+            topics.append((best_label, top_words))
+        self._topics = topics
 
     def get_topics_display(self) -> List[Dict[str, Any]]:
         """
@@ -108,16 +303,170 @@ class TopicModeler:
         """
         if not self.lda_model:
             return []
-            
-        output = []
-        for i in range(self.num_topics):
-            words = self.lda_model.show_topic(i, topn=10)
-            output.append({
-                "id": i,
-                "label": self._label_topic(i),
-                "words": [w[0] for w in words]
-            })
-        return output
+        return [{"id": i, "label": label, "words": list(words)} for i, (label, words) in enumerate(self._topics)]
+
+    def save(self):
+        """
+        Write the model as the next version under `model_dir`, then atomically
+        point CURRENT at it. Labels and top words are saved alongside, so
+        loading does not recompute them. Versions beyond `keep_versions` are pruned.
+        Concurrent savers each claim their own version number; failures raise.
+        """
+        if not self.lda_model or not self.model_dir:
+            return
+        os.makedirs(self.model_dir, exist_ok=True)
+        version, version_dir = self._claim_version()
+        # Private staging dir, renamed over the (empty) claimed one when complete
+        tmp_dir = tempfile.mkdtemp(prefix=f".v{version}-", dir=self.model_dir)
+        try:
+            # sep_limit=0: every array goes to its own .npy file, so load() can mmap it
+            self.lda_model.save(os.path.join(tmp_dir, "lda"), sep_limit=0)
+            with open(os.path.join(tmp_dir, "topics.json"), "w") as f:
+                json.dump({"num_topics": self.num_topics, "topics": self._topics}, f)
+            os.replace(tmp_dir, version_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+
+        self._publish(version)
+        self.version = version
+        self._saved_dir = version_dir
+        self._prune_versions()
+        logger.info(f"Topic model version {version} saved to {version_dir}")
+
+    def _claim_version(self) -> Tuple[int, str]:
+        """
+        Reserve the next version number by creating its directory: mkdir
+        succeeds for exactly one process, the others move on to the next number.
+        """
+        version = max(self.versions(), default=0) + 1
+        while True:
+            version_dir = self._version_dir(version)
+            try:
+                os.mkdir(version_dir)
+                return version, version_dir
+            except FileExistsError:
+                version += 1
+
+    def _publish(self, version: int):
+        """
+        Point CURRENT at `version` unless a newer version is already current
+        (a concurrent save that claimed a later number finished first).
+        """
+        try:
+            with open(self._current_path()) as f:
+                if int(f.read()) > version:
+                    return
+        except (FileNotFoundError, ValueError):
+            pass
+        fd, pointer_tmp = tempfile.mkstemp(prefix=".CURRENT-", dir=self.model_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(str(version))
+            os.replace(pointer_tmp, self._current_path())
+        except BaseException:
+            os.unlink(pointer_tmp)
+            raise
+
+    def load(self):
+        """
+        Load the version CURRENT points at, memory-mapping its arrays
+        read-only (update() copies them before training further).
+        """
+        try:
+            with open(self._current_path()) as f:
+                version = int(f.read())
+            version_dir = self._version_dir(version)
+            lda_model = LdaModel.load(os.path.join(version_dir, "lda"), mmap="r")
+            with open(os.path.join(version_dir, "topics.json")) as f:
+                meta = json.load(f)
+            self.lda_model, self.dictionary = lda_model, lda_model.id2word
+            self.num_topics = meta["num_topics"]
+            self._topics = [(label, words) for label, words in meta["topics"]]
+            self.version = version
+            self._saved_dir = version_dir
+            logger.info(f"Topic model version {version} loaded successfully.")
+        except Exception as e:
+            logger.error(f"Failed to load topic model: {e}")
+
+    def versions(self) -> List[int]:
+        if not self.model_dir or not os.path.isdir(self.model_dir):
+            return []
+        found = (re.fullmatch(r"v(\d+)", name) for name in os.listdir(self.model_dir))
+        return sorted(int(match.group(1)) for match in found if match)
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.model_dir, f"v{version}")
+
+    def _current_path(self) -> str:
+        return os.path.join(self.model_dir, "CURRENT")
+
+    def _prune_versions(self):
+        for version in self.versions()[:-self.keep_versions]:
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+def _infer(lda_model, bow_chunk) -> "np.ndarray":
+    """
+    LdaModel.inference vectorized over a chunk: the same mean-field updates
+    and per-document convergence test, but each iteration is a sparse
+    doc-term product for all documents at once instead of a Python loop
+    per document. Rows are normalized to topic distributions.
+    """
+    dtype = lda_model.dtype
+    lengths = np.fromiter((len(bow) for bow in bow_chunk), dtype=np.int64, count=len(bow_chunk))
+    rows = np.repeat(np.arange(len(bow_chunk)), lengths)
+    cols = np.fromiter((word_id for bow in bow_chunk for word_id, _ in bow), dtype=np.int64, count=rows.size)
+    cts = np.fromiter((count for bow in bow_chunk for _, count in bow), dtype=dtype, count=rows.size)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+
+    expElogbeta = lda_model.expElogbeta
+    word_topics = expElogbeta[:, cols].T  # (nnz, K)
+    eps = np.finfo(dtype).eps
+    gamma = lda_model.random_state.gamma(100., 1. / 100., (len(bow_chunk), lda_model.num_topics)).astype(dtype, copy=False)
+    active = np.ones(len(bow_chunk), dtype=bool)
+    for _ in range(lda_model.iterations):
+        expElogtheta = np.exp(dirichlet_expectation(gamma))
+        phinorm = np.einsum("ik,ik->i", expElogtheta[rows], word_topics) + eps
+        weights = sparse.csr_matrix((cts / phinorm, cols, indptr), shape=(len(bow_chunk), expElogbeta.shape[1]))
+        new_gamma = lda_model.alpha + expElogtheta * np.asarray(weights @ expElogbeta.T)
+        change = np.mean(np.abs(new_gamma - gamma), axis=1)
+        gamma[active] = new_gamma[active]
+        active &= change >= lda_model.gamma_threshold
+        if not active.any():
+            break
+    return gamma / gamma.sum(axis=1, keepdims=True)
+
+def _map_bounded(executor, fn, items: Iterable, max_pending: int) -> Iterator:
+    # executor.map would submit (and hold) every chunk up front
+    pending = []
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+_worker_model = None
+
+def _init_inference_worker(source):
+    global _worker_model
+    _worker_model = LdaModel.load(source, mmap="r") if isinstance(source, str) else source
+
+def _infer_chunk(bow_chunk) -> "np.ndarray":
+    return _infer(_worker_model, bow_chunk)
+
+def _make_writable(lda_model):
+    # Models loaded with mmap="r" are read-only; online updates modify these arrays in place
+    for owner, name in ((lda_model, "alpha"), (lda_model, "eta"), (lda_model, "expElogbeta"), (lda_model.state, "sstats")):
+        array = getattr(owner, name, None)
+        if isinstance(array, np.ndarray) and not array.flags.writeable:
+            setattr(owner, name, np.array(array))
 
 if __name__ == "__main__":
     # Tiny dataset simulation
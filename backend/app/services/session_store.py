@@ -0,0 +1,494 @@
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import WatchError
+except ImportError:
+    aioredis = None
+    from app.core.redis_stub import WatchError
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
+import time
+import zlib
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SessionConflictError(Exception):
+    """
+    Raised when a session was modified by another worker since it was loaded.
+    """
+
+class SessionArchive:
+    """
+    Durable home for sessions evicted from memory.
+    Sessions are stored as plain dicts (see ConversationContext.to_dict).
+    """
+
+    def save(self, session_id: str, data: Dict[str, Any]):
+        raise NotImplementedError
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+class InMemorySessionArchive(SessionArchive):
+    """
+    Archive kept in a dict. Intended for tests and single-process demos.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+
+    def save(self, session_id: str, data: Dict[str, Any]):
+        self._data[session_id] = json.dumps(data, separators=(",", ":"))
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._data.get(session_id)
+        return json.loads(raw) if raw else None
+
+    def delete(self, session_id: str):
+        self._data.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._data
+
+class FileSessionArchive(SessionArchive):
+    """
+    One JSON file per evicted session under `directory` (mounted at ./data in docker-compose).
+    Files are removed once their session is restored, and any left
+    untouched for `retention_seconds` are pruned (checked at most every
+    `prune_interval` seconds, on save).
+    """
+
+    def __init__(self, directory: str = "data/sessions", retention_seconds: float = 30 * 24 * 3600,
+                 prune_interval: float = 3600.0):
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+
+    def _path(self, session_id: str) -> str:
+        safe_id = "".join(c for c in session_id if c.isalnum() or c in "-_")
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def save(self, session_id: str, data: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(session_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete archived sessions older than the retention period. Returns how many were removed.
+        """
+        deadline = time.time() - self.retention_seconds
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # restored (or pruned) concurrently
+        return removed
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(session_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, session_id: str):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+class SessionStore:
+    """
+    Bounded in-memory session map with idle TTL and LRU eviction.
+
+    Entries are kept in access order, so both the idle sweep and the capacity
+    check only ever touch the least recently used end. Evicted sessions are
+    written to the archive first and transparently restored on the next lookup.
+
+    get/put/commit/delete are coroutines so the store is interchangeable with
+    RedisSessionStore; they never actually wait on the network.
+    """
+
+    def __init__(self,
+                 max_sessions: int = 10000,
+                 idle_ttl: float = 1800.0,
+                 archive: Optional[SessionArchive] = None,
+                 serialize: Callable[[Any], Dict[str, Any]] = None,
+                 deserialize: Callable[[Dict[str, Any]], Any] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_sessions: Hard cap on sessions held in memory.
+            idle_ttl: Seconds without access before a session is evicted.
+            archive: Where evicted sessions are persisted. None drops them.
+            serialize/deserialize: Convert sessions to/from archive dicts.
+            clock: Time source (injectable for tests).
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.archive = archive
+        self._serialize = serialize or (lambda ctx: ctx.to_dict())
+        self._deserialize = deserialize
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "restored": 0,
+            "evicted_idle": 0,
+            "evicted_capacity": 0,
+            "persist_failures": 0,
+        }
+
+    async def get(self, session_id: str, full_history: bool = True) -> Optional[Any]:
+        """
+        Sessions held in memory always carry their full history, so
+        `full_history` only matters for RedisSessionStore.
+        """
+        now = self._clock()
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            ctx, last_seen = entry
+            if now - last_seen <= self.idle_ttl:
+                self._sessions[session_id] = (ctx, now)
+                self._sessions.move_to_end(session_id)
+                self.metrics["hits"] += 1
+                return ctx
+            self._evict(session_id, "evicted_idle")
+
+        ctx = self._restore(session_id)
+        if ctx is None:
+            self.metrics["misses"] += 1
+            return None
+        self.metrics["restored"] += 1
+        self._put(ctx)
+        return ctx
+
+    async def put(self, ctx: Any):
+        self._put(ctx)
+
+    def _put(self, ctx: Any):
+        self.sweep()
+        self._sessions[ctx.session_id] = (ctx, self._clock())
+        self._sessions.move_to_end(ctx.session_id)
+        while len(self._sessions) > self.max_sessions:
+            oldest_id = next(iter(self._sessions))
+            self._evict(oldest_id, "evicted_capacity")
+
+    async def commit(self, ctx: Any):
+        """
+        Record the end of a turn. Local sessions are mutated in place, so this only refreshes recency.
+        """
+        self._put(ctx)
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        if self.archive:
+            self.archive.delete(session_id)
+
+    async def exists(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def sweep(self) -> int:
+        """
+        Evict sessions idle for longer than the TTL. Returns how many were evicted.
+        """
+        deadline = self._clock() - self.idle_ttl
+        evicted = 0
+        while self._sessions:
+            oldest_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if last_seen >= deadline:
+                break
+            self._evict(oldest_id, "evicted_idle")
+            evicted += 1
+        return evicted
+
+    def _evict(self, session_id: str, reason: str):
+        ctx, _ = self._sessions.pop(session_id)
+        self.metrics[reason] += 1
+        if not self.archive:
+            return
+        try:
+            self.archive.save(session_id, self._serialize(ctx))
+        except Exception as e:
+            self.metrics["persist_failures"] += 1
+            logger.error(f"Failed to persist evicted session {session_id}: {e}")
+
+    def _restore(self, session_id: str) -> Optional[Any]:
+        if not self.archive or not self._deserialize:
+            return None
+        data = self.archive.load(session_id)
+        if data is None:
+            return None
+        ctx = self._deserialize(data)
+        self.archive.delete(session_id)  # only once the session is back in memory
+        return ctx
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": len(self._sessions), **self.metrics}
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+class RedisSessionStore:
+    """
+    Session state shared by every worker through Redis.
+
+    Each session is a hash {v: version, d: zlib-compressed compact JSON}
+    holding everything but the older turns: the prompt window, the rolling
+    summary and the counters (ctx.to_dict(full_history=False)). The
+    transcript itself is a list next to it, `<key>:turns`, that commits only
+    RPUSH new turns onto, so a turn costs the same on the first message and
+    the thousandth. Only get(full_history=True) (saving a story) reads it.
+
+    A turn loads the session in one pipelined round trip (HMGET + LLEN +
+    EXPIRE + ZADD) and commits with WATCH/MULTI/EXEC: if another worker committed
+    in between, SessionConflictError is raised and the caller replays the
+    turn. Uses redis.asyncio, so round trips never block the event loop.
+
+    Every access also records the session in a sorted set of last-seen
+    times. sweep(), run periodically by any number of workers, drains
+    sessions idle for `idle_ttl` into the archive and deletes them; a
+    session missing from Redis is restored from there on its next get().
+    The key TTL (idle_ttl + expiry_grace) is only a backstop for when no
+    sweeper runs.
+    """
+
+    def __init__(self,
+                 client,
+                 idle_ttl: int = 1800,
+                 serialize: Callable[[Any], Dict[str, Any]] = None,
+                 deserialize: Callable[[Dict[str, Any]], Any] = None,
+                 key_prefix: str = "session:",
+                 archive: Optional[SessionArchive] = None,
+                 expiry_grace: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            client: redis.asyncio.Redis (or AsyncInMemoryRedis in tests).
+            idle_ttl: Seconds of inactivity before sweep() archives the session.
+            serialize/deserialize: Convert sessions to/from plain dicts.
+            key_prefix: Namespace for session keys.
+            archive: Where swept sessions are persisted. None drops them.
+            expiry_grace: Extra seconds before Redis expires an idle session
+                          the sweeper missed (default: idle_ttl).
+            clock: Wall-clock time source, shared by every worker (injectable for tests).
+        """
+        self.redis = client
+        self.idle_ttl = int(idle_ttl)
+        self.key_ttl = self.idle_ttl + int(self.idle_ttl if expiry_grace is None else expiry_grace)
+        self._serialize = serialize or (lambda ctx: ctx.to_dict(full_history=False))
+        self._deserialize = deserialize
+        self.key_prefix = key_prefix
+        self.archive = archive
+        self._clock = clock
+        self.metrics = {"hits": 0, "misses": 0, "conflicts": 0, "restored": 0, "archived": 0,
+                        "persist_failures": 0}
+
+    @classmethod
+    def from_url(cls, redis_url: str, **kwargs) -> "RedisSessionStore":
+        if not aioredis:
+            raise RuntimeError("redis is not installed.")
+        client = aioredis.from_url(redis_url, socket_timeout=2, socket_connect_timeout=2)
+        return cls(client, **kwargs)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _turns_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:turns"
+
+    @property
+    def _last_seen_key(self) -> str:
+        return f"{self.key_prefix}last_seen"
+
+    def _touch(self, pipe, session_id: str):
+        pipe.zadd(self._last_seen_key, {session_id: self._clock()})
+
+    def _dumps(self, ctx: Any) -> bytes:
+        payload = json.dumps(self._serialize(ctx), separators=(",", ":"))
+        return zlib.compress(payload.encode(), 1)
+
+    @staticmethod
+    def _pack_turns(turns) -> List[str]:
+        return [json.dumps(turn.pack(), separators=(",", ":")) for turn in turns]
+
+    def _unsaved_turns(self, ctx: Any) -> List[str]:
+        return self._pack_turns(ctx.history[max(ctx.persisted_turns - ctx.history_offset, 0):])
+
+    def _write_turns(self, pipe, ctx: Any, rewrite: bool = False):
+        # Queue the turn log update; `rewrite` replaces it with ctx.history
+        turns_key = self._turns_key(ctx.session_id)
+        if rewrite:
+            pipe.delete(turns_key)
+            turns = self._pack_turns(ctx.history)
+        else:
+            turns = self._unsaved_turns(ctx)
+        if turns:
+            pipe.rpush(turns_key, *turns)
+        pipe.expire(turns_key, self.key_ttl)
+
+    async def get(self, session_id: str, full_history: bool = False) -> Optional[Any]:
+        """
+        Load a session with the turns in its prompt window, or with the
+        whole transcript if `full_history`.
+        """
+        key, turns_key = self._key(session_id), self._turns_key(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget(key, "v", "d")
+        pipe.llen(turns_key)
+        if full_history:
+            pipe.lrange(turns_key, 0, -1)
+        pipe.expire(key, self.key_ttl)  # reading a session counts as activity
+        pipe.expire(turns_key, self.key_ttl)
+        # XX: only refreshes sessions already tracked, so a miss is never marked live
+        pipe.zadd(self._last_seen_key, {session_id: self._clock()}, xx=True)
+        results = await pipe.execute()
+        (version, payload), persisted = results[0], results[1]
+        if payload is None:
+            return await self._restore(session_id)
+        self.metrics["hits"] += 1
+        data = json.loads(zlib.decompress(payload))
+        if full_history:
+            data["history"] = [json.loads(turn) for turn in results[2]]
+            data["history_offset"] = 0
+        ctx = self._deserialize(data)
+        ctx.version = int(version)
+        ctx.persisted_turns = persisted
+        return ctx
+
+    async def _restore(self, session_id: str) -> Optional[Any]:
+        data = self.archive.load(session_id) if self.archive and self._deserialize else None
+        if data is None:
+            self.metrics["misses"] += 1
+            return None
+        ctx = self._deserialize(data)
+        await self.put(ctx)
+        self.archive.delete(session_id)  # only once the session is back in Redis
+        self.metrics["restored"] += 1
+        return ctx
+
+    async def put(self, ctx: Any):
+        """
+        Unconditional write (new sessions, resets). Bumps the version so
+        in-flight turns holding an older copy will conflict. A context
+        holding its whole history (history_offset 0) replaces the turn log.
+        """
+        key = self._key(ctx.session_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hincrby(key, "v", 1)
+        pipe.hset(key, "d", self._dumps(ctx))
+        pipe.expire(key, self.key_ttl)
+        self._write_turns(pipe, ctx, rewrite=ctx.history_offset == 0)
+        self._touch(pipe, ctx.session_id)
+        ctx.version = (await pipe.execute())[0]
+        ctx.persisted_turns = ctx.history_offset + len(ctx.history)
+
+    async def commit(self, ctx: Any):
+        """
+        Optimistically write back a session loaded with get(); turns added
+        since are appended to the turn log in the same transaction.
+        """
+        key = self._key(ctx.session_id)
+        payload = self._dumps(ctx)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                if int(await pipe.hget(key, "v") or 0) != ctx.version:
+                    raise WatchError("Session version changed.")
+                pipe.multi()
+                pipe.hset(key, mapping={"v": ctx.version + 1, "d": payload})
+                pipe.expire(key, self.key_ttl)
+                self._write_turns(pipe, ctx)
+                self._touch(pipe, ctx.session_id)
+                await pipe.execute()
+            except WatchError:
+                self.metrics["conflicts"] += 1
+                raise SessionConflictError(ctx.session_id)
+        ctx.version += 1
+        ctx.persisted_turns = ctx.history_offset + len(ctx.history)
+
+    async def delete(self, session_id: str):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._key(session_id), self._turns_key(session_id))
+        pipe.zrem(self._last_seen_key, session_id)
+        await pipe.execute()
+        if self.archive:
+            self.archive.delete(session_id)
+
+    async def sweep(self, limit: int = 100) -> int:
+        """
+        Archive and delete up to `limit` sessions idle for longer than
+        idle_ttl. Safe to run from every worker at once: a session is only
+        removed by the sweeper whose transaction wins, and a turn arriving
+        meanwhile aborts it. Returns how many sessions were swept.
+        """
+        deadline = self._clock() - self.idle_ttl
+        idle = await self.redis.zrangebyscore(self._last_seen_key, "-inf", deadline, start=0, num=limit)
+        swept = 0
+        for member in idle:
+            session_id = member.decode() if isinstance(member, bytes) else member
+            if await self._sweep_one(session_id, deadline):
+                swept += 1
+        return swept
+
+    async def _sweep_one(self, session_id: str, deadline: float) -> bool:
+        key, turns_key = self._key(session_id), self._turns_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key, self._last_seen_key)
+                last_seen = await pipe.zscore(self._last_seen_key, session_id)
+                if last_seen is None or last_seen > deadline:
+                    return False  # swept elsewhere, or active again
+                payload = await pipe.hget(key, "d")
+                turns = await pipe.lrange(turns_key, 0, -1)
+                if payload is not None and self.archive:
+                    data = json.loads(zlib.decompress(payload))
+                    data["history"] = [json.loads(turn) for turn in turns]
+                    data["history_offset"] = 0
+                    # Written first: if the transaction then loses, the
+                    # session is still live and this copy is overwritten
+                    # at its next eviction
+                    self.archive.save(session_id, data)
+                pipe.multi()
+                pipe.delete(key, turns_key)
+                pipe.zrem(self._last_seen_key, session_id)
+                await pipe.execute()
+            except WatchError:
+                return False
+            except Exception as e:
+                self.metrics["persist_failures"] += 1
+                logger.error(f"Failed to archive idle session {session_id}: {e}")
+                return False
+        self.metrics["archived"] += 1
+        return True
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self.redis.exists(self._key(session_id)))
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.metrics)
@@ -0,0 +1,351 @@
+try:
+    import sqlalchemy as sa
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:
+    sa = None
+    create_async_engine = None
+try:
+    from alembic import command as alembic_command
+    from alembic.config import Config as AlembicConfig
+except ImportError:
+    alembic_command = None
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from dataclasses import dataclass
+import asyncio
+import os
+import logging
+from app.models.story import Story
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if sa:
+    metadata = sa.MetaData()
+
+    stories_table = sa.Table(
+        "stories",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("date", sa.String(32), nullable=False),
+        sa.Column("duration_seconds", sa.Integer, nullable=False, default=0),
+        sa.Column("duration", sa.String(32), nullable=False),
+        sa.Column("topics", sa.JSON, nullable=False, default=list),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column("transcript", sa.JSON, nullable=True),
+        sa.Column("audio_url", sa.String(512), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Single-row running totals, updated in the same transaction as each insert
+    story_stats_table = sa.Table(
+        "story_stats",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chapters", sa.Integer, nullable=False),
+        sa.Column("total_seconds", sa.BigInteger, nullable=False),
+        sa.Column("family_views", sa.BigInteger, nullable=False),
+    )
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+# pg_advisory_xact_lock key serializing schema setup across processes
+SETUP_LOCK_ID = 0x5370_7279  # arbitrary, fixed
+
+def _insert_ignoring_conflicts(conn, table):
+    """
+    INSERT ... ON CONFLICT DO NOTHING where the dialect supports it, so a
+    row another process wrote first is skipped instead of failing.
+    """
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return table.insert()
+    return insert(table).on_conflict_do_nothing()
+
+def _migrate(connection):
+    """
+    Bring the schema to the newest migration on an open (sync) connection.
+    """
+    if alembic_command is None:
+        logger.warning("alembic is not installed. Creating tables without migrations.")
+        metadata.create_all(connection)
+        return
+    config = AlembicConfig(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    alembic_command.upgrade(config, "head")
+
+def family_views_for(story_id: int) -> int:
+    # Mock engagement metric: 10 views per story plus some variation
+    return 10 + (story_id * 2 % 7)
+
+@dataclass
+class StoryStats:
+    """
+    Archive-wide counters backing the dashboard, maintained on every write.
+    """
+    chapters: int = 0
+    total_seconds: int = 0
+    family_views: int = 0
+
+    def record(self, story: Story):
+        self.chapters += 1
+        self.total_seconds += story.duration_seconds
+        if story.id.isdigit():
+            self.family_views += family_views_for(int(story.id))
+
+class StoryRepository:
+    """
+    Storage interface for narrated stories.
+    IDs are allocated by the repository; listings are newest first.
+    """
+
+    async def get(self, story_id: str) -> Optional[Story]:
+        raise NotImplementedError
+
+    async def create(self, **fields) -> Story:
+        """
+        Persist a new story and return it with its allocated ID.
+        """
+        raise NotImplementedError
+
+    async def list_recent(self, limit: Optional[int] = None, before: Optional[str] = None) -> List[Story]:
+        """
+        Newest-first listing. `before` is a story ID cursor: only stories
+        older than it are returned. Raises ValueError for an unknown cursor.
+        """
+        raise NotImplementedError
+
+    async def list_projected(self, fields: Sequence[str], limit: Optional[int] = None,
+                             before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Same as list_recent, but returns only the requested fields as dicts.
+        """
+        return [story.model_dump(include=set(fields)) for story in await self.list_recent(limit, before)]
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def stats(self) -> StoryStats:
+        """
+        Running totals for the dashboard. O(1): never rescans stories.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """
+        Release connections (no-op for in-memory stores).
+        """
+
+class InMemoryStoryRepository(StoryRepository):
+    """
+    Dict-backed repository used in development and tests.
+    Lookups are O(1); insertion order is kept in an append-only list,
+    so newest-first listings never shift existing entries.
+    """
+
+    def __init__(self, stories: Iterable[Story] = ()):
+        """
+        Args:
+            stories: Seed stories, oldest first.
+        """
+        self._by_id: Dict[str, Story] = {}
+        self._order: List[str] = []
+        self._position: Dict[str, int] = {}  # story ID -> index in _order, for cursors
+        self._next_id = 1
+        self._stats = StoryStats()
+        for story in stories:
+            self._insert(story)
+
+    def _insert(self, story: Story):
+        self._by_id[story.id] = story
+        self._position[story.id] = len(self._order)
+        self._order.append(story.id)
+        self._stats.record(story)
+        if story.id.isdigit():
+            self._next_id = max(self._next_id, int(story.id) + 1)
+
+    async def get(self, story_id: str) -> Optional[Story]:
+        return self._by_id.get(story_id)
+
+    async def create(self, **fields) -> Story:
+        story = Story(id=str(self._next_id), **fields)
+        self._insert(story)
+        return story
+
+    async def list_recent(self, limit: Optional[int] = None, before: Optional[str] = None) -> List[Story]:
+        end = len(self._order)
+        if before is not None:
+            if before not in self._position:
+                raise ValueError(f"Unknown cursor: {before}")
+            end = self._position[before]
+        start = 0 if limit is None else max(end - limit, 0)
+        return [self._by_id[story_id] for story_id in reversed(self._order[start:end])]
+
+    async def count(self) -> int:
+        return len(self._order)
+
+    async def stats(self) -> StoryStats:
+        return StoryStats(**vars(self._stats))
+
+class SQLStoryRepository(StoryRepository):
+    """
+    PostgreSQL-backed repository (SQLAlchemy Core on asyncpg).
+    IDs come from the table's sequence, so concurrent writers never collide.
+    """
+
+    def __init__(self, database_url: str, seed: Iterable[Story] = ()):
+        if not sa:
+            raise RuntimeError("SQLAlchemy is not installed.")
+        self.engine = create_async_engine(self._async_url(database_url), pool_pre_ping=True)
+        self._seed = list(seed)
+        self._ready = False
+        self._init_lock = asyncio.Lock()
+
+    @staticmethod
+    def _async_url(database_url: str) -> str:
+        # docker-compose passes a plain postgresql:// URL; route it through asyncpg
+        if database_url.startswith("postgresql://"):
+            return "postgresql+asyncpg://" + database_url[len("postgresql://"):]
+        return database_url
+
+    async def _ensure_schema(self):
+        if self._ready:
+            return
+        async with self._init_lock:
+            if self._ready:
+                return
+            async with self.engine.begin() as conn:
+                if conn.dialect.name == "postgresql":
+                    # Every API and job worker runs this on first use: one at a
+                    # time, the others wait and then find everything in place.
+                    # Released when the transaction ends.
+                    await conn.execute(sa.select(sa.func.pg_advisory_xact_lock(SETUP_LOCK_ID)))
+                await conn.run_sync(_migrate)
+                existing = await conn.scalar(sa.select(sa.func.count()).select_from(stories_table))
+                if not existing and self._seed:
+                    # Keep the seed IDs so a story ID means the same story on every backend
+                    await conn.execute(_insert_ignoring_conflicts(conn, stories_table),
+                                       [self._to_row(s, keep_id=True) for s in self._seed])
+                    if conn.dialect.name == "postgresql":
+                        # Explicit IDs bypass the sequence; move it past them
+                        await conn.execute(sa.text(
+                            "SELECT setval(pg_get_serial_sequence('stories', 'id'), "
+                            "(SELECT COALESCE(MAX(id), 1) FROM stories))"
+                        ))
+                    logger.info(f"Seeded {len(self._seed)} stories.")
+                if await conn.scalar(sa.select(story_stats_table.c.id)) is None:
+                    # One-off aggregate over whatever the table already holds
+                    totals = (await conn.execute(sa.select(
+                        sa.func.count(),
+                        sa.func.coalesce(sa.func.sum(stories_table.c.duration_seconds), 0),
+                        sa.func.coalesce(sa.func.sum(10 + (stories_table.c.id * 2) % 7), 0),
+                    ))).one()
+                    await conn.execute(_insert_ignoring_conflicts(conn, story_stats_table).values(
+                        id=1, chapters=totals[0], total_seconds=totals[1], family_views=totals[2]
+                    ))
+            self._ready = True
+
+    @staticmethod
+    def _to_row(story: Story, keep_id: bool = False) -> dict:
+        if keep_id and story.id.isdigit():
+            return {**story.model_dump(exclude={"id"}), "id": int(story.id)}
+        return story.model_dump(exclude={"id"})
+
+    @staticmethod
+    def _to_story(row) -> Story:
+        data = dict(row._mapping)
+        data.pop("created_at", None)
+        data["id"] = str(data["id"])
+        return Story(**data)
+
+    async def get(self, story_id: str) -> Optional[Story]:
+        if not story_id.isdigit():
+            return None
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                sa.select(stories_table).where(stories_table.c.id == int(story_id))
+            )
+            row = result.first()
+        return self._to_story(row) if row else None
+
+    async def create(self, **fields) -> Story:
+        draft = Story(id="0", **fields)  # validates and fills derived fields
+        await self._ensure_schema()
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                stories_table.insert().values(**self._to_row(draft)).returning(stories_table.c.id)
+            )
+            story_id = result.scalar_one()
+            story = draft.model_copy(update={"id": str(story_id)})
+            await conn.execute(
+                story_stats_table.update().where(story_stats_table.c.id == 1).values(
+                    chapters=story_stats_table.c.chapters + 1,
+                    total_seconds=story_stats_table.c.total_seconds + story.duration_seconds,
+                    family_views=story_stats_table.c.family_views + family_views_for(story_id),
+                )
+            )
+        return story
+
+    def _page_query(self, columns, limit: Optional[int], before: Optional[str]):
+        # Keyset pagination on the primary key: no OFFSET scans on deep pages
+        query = sa.select(*columns).order_by(stories_table.c.id.desc())
+        if before is not None:
+            if not before.isdigit():
+                raise ValueError(f"Unknown cursor: {before}")
+            query = query.where(stories_table.c.id < int(before))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    async def list_recent(self, limit: Optional[int] = None, before: Optional[str] = None) -> List[Story]:
+        query = self._page_query([stories_table], limit, before)
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(query)
+            return [self._to_story(row) for row in result]
+
+    async def list_projected(self, fields: Sequence[str], limit: Optional[int] = None,
+                             before: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Only the requested columns leave the database (no transcript/content reads)
+        query = self._page_query([stories_table.c[f] for f in fields], limit, before)
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(query)
+            rows = [dict(row._mapping) for row in result]
+        if "id" in fields:
+            for row in rows:
+                row["id"] = str(row["id"])
+        return rows
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def count(self) -> int:
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            return await conn.scalar(sa.select(sa.func.count()).select_from(stories_table))
+
+    async def stats(self) -> StoryStats:
+        await self._ensure_schema()
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(
+                sa.select(story_stats_table.c.chapters, story_stats_table.c.total_seconds,
+                          story_stats_table.c.family_views).where(story_stats_table.c.id == 1)
+            )).one()
+        return StoryStats(chapters=row[0], total_seconds=row[1], family_views=row[2])
+
+def create_story_repository(seed: Iterable[Story] = ()) -> StoryRepository:
+    """
+    Pick the repository for this process: Postgres when DATABASE_URL is set,
+    otherwise an in-memory store seeded with `seed` (oldest first).
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if database_url and sa:
+        logger.info("Using PostgreSQL story repository.")
+        return SQLStoryRepository(database_url, seed=seed)
+    logger.info("DATABASE_URL not set. Using in-memory story repository.")
+    return InMemoryStoryRepository(seed)
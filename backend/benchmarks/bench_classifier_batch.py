@@ -0,0 +1,49 @@
+"""
+Archive tagging throughput: StoryClassifier.predict per text vs predict_batch.
+
+Run from backend/:  python -m benchmarks.bench_classifier_batch [texts] [labels]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from app.services.nlp.classification import StoryClassifier
+
+WORDS = (
+    "school teacher class war army navy factory manager mother father pie church "
+    "wedding married farm harvest train station city move house garden summer winter"
+).split()
+
+def main():
+    n_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_labels = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(3)
+    labels = [f"label_{i}" for i in range(n_labels)]
+
+    def sentence():
+        return " ".join(rng.choice(WORDS) for _ in range(12))
+
+    train_texts = [sentence() for _ in range(500)]
+    train_labels = [rng.sample(labels, rng.randint(1, 3)) for _ in train_texts]
+    texts = [sentence() for _ in range(n_texts)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        classifier = StoryClassifier(model_path=os.path.join(tmp, "model.pkl"))
+        classifier.train(train_texts, train_labels)
+
+        started = time.perf_counter()
+        single = [classifier.predict(t) for t in texts]
+        per_call = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = classifier.predict_batch(texts)
+        batched = time.perf_counter() - started
+
+    assert [[l for l, _ in r] for r in single] == [[l for l, _ in r] for r in batch]
+    print(f"{n_texts} texts, {n_labels} labels")
+    print(f"predict:        {n_texts / per_call:10.0f} texts/s")
+    print(f"predict_batch:  {n_texts / batched:10.0f} texts/s  ({per_call / batched:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+TextPreprocessor.clean_text on long speech-to-text output: the previous
+pattern-by-pattern implementation vs the precompiled single-pass cleaner.
+
+Run from backend/:  python -m benchmarks.bench_clean_text [words] [repeats]
+"""
+import random
+import re
+import sys
+import time
+from app.services.nlp.preprocessing import TextPreprocessor
+
+VOCABULARY = (
+    "i remember the old house on maple street where my mother grew roses and "
+    "my father fixed the car every sunday we walked to church in the snow"
+).split()
+FILLERS = ["um", "uh", "you know", "i mean", "like", "er"]
+PUNCTUATION = [",", ".", "...", "?", "!", "-", ";"]
+
+def legacy_clean_text(preprocessor: TextPreprocessor, text: str) -> str:
+    """
+    clean_text as it was: one re.sub per filler pattern, then repetition and whitespace.
+    """
+    if not text:
+        return ""
+    cleaned = text.lower()
+    for pattern in preprocessor.filler_patterns:
+        cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(preprocessor.repetition_pattern, r"\1", cleaned)
+    return re.sub(r"\s+", " ", cleaned).strip()
+
+def transcript(words: int, rng: random.Random) -> str:
+    """
+    STT-like text: fillers, stuttered repeats, irregular whitespace, and
+    punctuation, sometimes with no space between it and a filler
+    ("wait...um I", "um,ah very").
+    """
+    out = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.08:
+            out.append(rng.choice(FILLERS).capitalize() + ",")
+        elif roll < 0.10 and out:
+            out[-1] += rng.choice(PUNCTUATION) + rng.choice(FILLERS)
+        elif roll < 0.12 and out:
+            out.append(rng.choice(FILLERS) + rng.choice(PUNCTUATION) + rng.choice(FILLERS))
+        elif roll < 0.16 and out:
+            out.append(out[-1])
+        else:
+            out.append(rng.choice(VOCABULARY))
+        if rng.random() < 0.05:
+            out.append(".\n")
+    return " ".join(out).replace(" .", ".")
+
+def timed(fn, texts, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(7)
+    texts = [transcript(words, rng) for _ in range(10)]
+    preprocessor = TextPreprocessor()
+
+    mismatches = sum(legacy_clean_text(preprocessor, t) != preprocessor.clean_text(t) for t in texts)
+    legacy = timed(lambda t: legacy_clean_text(preprocessor, t), texts, repeats)
+    single = timed(preprocessor.clean_text, texts, repeats)
+
+    print(f"10 transcripts x {words} words (best of {repeats}), output mismatches: {mismatches}")
+    print(f"legacy:       {legacy * 1000:8.1f} ms")
+    print(f"single pass:  {single * 1000:8.1f} ms  ({legacy / single:.1f}x)")
+
+if __name__ == "__main__":
+    main()
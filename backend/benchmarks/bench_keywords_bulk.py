@@ -0,0 +1,42 @@
+"""
+Archive keyword backfill: one detect_keywords() call per segment vs the
+streaming detect_keywords_many() over nlp.pipe.
+
+Run from backend/:  python -m benchmarks.bench_keywords_bulk [segments] [batch_size] [n_process]
+"""
+import sys
+import time
+from app.services.nlp.keywords import KeywordDetector
+
+SEGMENTS = [
+    "I remember when Grandma moved to New York in 1945.",
+    "It was a difficult time during the war, but her wedding was beautiful.",
+    "My father retired from the railroad after forty years.",
+    "We drove to the beach every summer in my uncle's old Ford.",
+]
+
+def main():
+    segments = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    n_process = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    texts = [SEGMENTS[i % len(SEGMENTS)] for i in range(segments)]
+
+    detector = KeywordDetector()
+    detector.detect_keywords("warm-up")
+
+    started = time.perf_counter()
+    for text in texts:
+        detector.detect_keywords(text)
+    per_call = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in detector.detect_keywords_many(iter(texts), batch_size=batch_size, n_process=n_process):
+        pass
+    piped = time.perf_counter() - started
+
+    print(f"{segments} segments, batch_size={batch_size}, n_process={n_process}")
+    print(f"per call:  {segments / per_call:10.0f} segments/s")
+    print(f"nlp.pipe:  {segments / piped:10.0f} segments/s  ({per_call / piped:.1f}x)")
+
+if __name__ == "__main__":
+    main()
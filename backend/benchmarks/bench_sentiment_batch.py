@@ -0,0 +1,39 @@
+"""
+Sentiment throughput in turns/second: a per-call analyze() loop vs
+analyze_batch() in-process and fanned out over all cores, all without
+TextBlob subjectivity (the batch default), plus the per-call loop with it
+for reference. analyze_batch(n_jobs=1) is the same loop; only the
+process-pool fan-out can be faster.
+
+Run from backend/:  python -m benchmarks.bench_sentiment_batch [turns]
+"""
+import sys
+import time
+from app.services.nlp.sentiment import SentimentAnalyzer
+
+SAMPLES = [
+    "I remember the summer of '69, it was the best time of my life. We played outside all day.",
+    "Then my brother got sick and passed away. It was a very dark winter.",
+    "I just had oatmeal for breakfast.",
+    "Back in the day we used to walk two miles to school, and I cherish those mornings with my sister.",
+]
+
+def timed(label: str, turns: int, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {turns / elapsed:10.0f} turns/s")
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    texts = [SAMPLES[i % len(SAMPLES)] for i in range(turns)]
+    analyzer = SentimentAnalyzer()
+
+    timed("analyze() per call, subjectivity", turns, lambda: [analyzer.analyze(t) for t in texts])
+    timed("analyze() per call", turns,
+          lambda: [analyzer.analyze(t, include_subjectivity=False) for t in texts])
+    timed("analyze_batch(n_jobs=1)", turns, lambda: analyzer.analyze_batch(texts))
+    timed("analyze_batch(n_jobs=-1)", turns, lambda: analyzer.analyze_batch(texts, n_jobs=-1))
+
+if __name__ == "__main__":
+    main()
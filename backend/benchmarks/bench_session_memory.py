@@ -0,0 +1,61 @@
+"""
+Per-session memory footprint of conversation history: dict turns with ISO
+timestamps (previous layout) vs slotted Turn records.
+
+Run from backend/:  python -m benchmarks.bench_session_memory [turns] [sessions]
+"""
+from datetime import datetime
+import sys
+import tracemalloc
+from app.models.conversation import Role, Turn
+
+SAMPLE_REPLIES = [
+    "I remember the old dock down by the bay.",
+    "My grandfather taught me how to fish there.",
+    "We would sit for hours watching the bobbers dance on the water.",
+    "What did it smell like?",
+]
+
+def build_dict_history(turns: int) -> list:
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "ai",
+            "content": SAMPLE_REPLIES[i % len(SAMPLE_REPLIES)],
+            "timestamp": datetime.now().isoformat(),
+        }
+        for i in range(turns)
+    ]
+
+def build_turn_history(turns: int) -> list:
+    return [
+        Turn(Role.USER if i % 2 == 0 else Role.AI, SAMPLE_REPLIES[i % len(SAMPLE_REPLIES)])
+        for i in range(turns)
+    ]
+
+def measure(builder, turns: int, sessions: int) -> float:
+    """
+    Average bytes allocated per session (message strings are shared, as interned
+    template questions would be, so this isolates per-turn container overhead).
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    held = [builder(turns) for _ in range(sessions)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return (after - before) / sessions
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    dict_bytes = measure(build_dict_history, turns, sessions)
+    turn_bytes = measure(build_turn_history, turns, sessions)
+
+    print(f"{sessions} sessions x {turns} turns")
+    print(f"dict turns:    {dict_bytes / 1024:8.1f} KiB/session ({dict_bytes / turns:.0f} B/turn)")
+    print(f"slotted Turn:  {turn_bytes / 1024:8.1f} KiB/session ({turn_bytes / turns:.0f} B/turn)")
+    print(f"reduction:     {100 * (1 - turn_bytes / dict_bytes):.0f}%")
+
+if __name__ == "__main__":
+    main()
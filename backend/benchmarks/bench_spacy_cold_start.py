@@ -0,0 +1,63 @@
+"""
+Cold start of the NLP services: per-service spacy.load (previous behaviour)
+vs the shared lazy registry. Each variant runs in a fresh interpreter and
+reports construction time, first-call time and resident memory (module
+imports are excluded from both).
+
+Run from backend/:  python -m benchmarks.bench_spacy_cold_start [model_name]
+"""
+import json
+import subprocess
+import sys
+
+VARIANT = r"""
+import json, resource, sys, time
+import spacy
+from app.services.nlp.keywords import KeywordDetector
+from app.services.nlp.preprocessing import TextPreprocessor
+model_name, variant = sys.argv[1], sys.argv[2]
+
+def rss_mib():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+baseline = rss_mib()
+started = time.perf_counter()
+if variant == "per-service":
+    def load():
+        try:
+            return spacy.load(model_name)
+        except OSError:
+            return spacy.blank("en")
+    preprocessor_nlp, keyword_nlp = load(), load()
+    constructed = time.perf_counter()
+    preprocessor_nlp("It was a long time ago."); keyword_nlp("My grandmother was born in 1920.")
+else:
+    preprocessor, detector = TextPreprocessor(model_name), KeywordDetector(model_name)
+    constructed = time.perf_counter()
+    preprocessor.process("It was a long time ago."); detector.detect_keywords("My grandmother was born in 1920.")
+finished = time.perf_counter()
+print(json.dumps({"construct": constructed - started, "first_call": finished - constructed,
+                  "rss": rss_mib() - baseline}))
+"""
+
+def run(model_name: str, variant: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", VARIANT, model_name, variant],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "en_core_web_sm"
+    print(f"model: {model_name}")
+    print(f"{'variant':<14}{'construct':>12}{'first call':>12}{'total':>10}{'RSS':>12}")
+    for variant in ("per-service", "registry"):
+        r = run(model_name, variant)
+        total = r["construct"] + r["first_call"]
+        print(f"{variant:<14}{r['construct'] * 1000:>10.0f}ms{r['first_call'] * 1000:>10.0f}ms"
+              f"{total * 1000:>8.0f}ms{r['rss']:>8.1f} MiB")
+
+if __name__ == "__main__":
+    main()
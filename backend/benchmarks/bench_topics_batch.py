@@ -0,0 +1,48 @@
+"""
+Backlog tagging throughput: TopicModeler.get_topic_for_document per story vs
+get_topics_for_documents (chunked, optionally over a process pool).
+
+Run from backend/:  python -m benchmarks.bench_topics_batch [docs] [workers]
+"""
+import random
+import sys
+import time
+from app.services.nlp.topics import TopicModeler
+
+WORDS = (
+    "school teacher class war army navy factory manager mother father pie church "
+    "wedding married farm harvest train station city move house garden summer winter"
+).split()
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    rng = random.Random(3)
+
+    def document():
+        return [rng.choice(WORDS) for _ in range(30)]
+
+    modeler = TopicModeler(num_topics=10)
+    modeler.train([document() for _ in range(1000)])
+    docs = [document() for _ in range(n_docs)]
+
+    started = time.perf_counter()
+    for doc in docs:
+        modeler.get_topic_for_document(doc)
+    per_call = time.perf_counter() - started
+
+    started = time.perf_counter()
+    modeler.get_topics_for_documents(docs)
+    batched = time.perf_counter() - started
+
+    started = time.perf_counter()
+    assignments = modeler.get_topics_for_documents(docs, workers=workers)
+    pooled = time.perf_counter() - started
+
+    print(f"{n_docs} documents, {len(assignments.doc)} assignments")
+    print(f"get_topic_for_document:             {n_docs / per_call:10.0f} docs/s")
+    print(f"get_topics_for_documents:           {n_docs / batched:10.0f} docs/s  ({per_call / batched:.1f}x)")
+    print(f"get_topics_for_documents, {workers} procs:  {n_docs / pooled:10.0f} docs/s  ({per_call / pooled:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Load test for POST /api/v1/chat/send: N concurrent sessions, each sending
+several turns over real HTTP to a uvicorn worker. Reports latency percentiles.
+
+Run from backend/:
+    python -m benchmarks.load_chat_send [sessions] [turns] [nlp_executor]
+
+nlp_executor is passed to the server as NLP_EXECUTOR (thread, process, or
+inline for the old blocking behaviour). Set LOAD_TEST_URL to target an
+already running server instead of spawning one.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+
+MESSAGES = [
+    "I remember when we used to play in the park back in the day. It was wonderful and we stayed until dark.",
+    "My father worked at the steel mill for thirty years, and he came home tired but always smiling.",
+    "Then my brother got sick and passed away. It was a very dark winter for the whole family.",
+    "We drove across the country in a beat-up VW bus the summer I turned nineteen.",
+]
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(nlp_executor: str):
+    port = free_port()
+    env = dict(os.environ, NLP_EXECUTOR=nlp_executor, SESSION_ARCHIVE_DIR="/tmp/memory_keeper_bench_sessions")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/health")
+            return server, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+async def run_session(client: httpx.AsyncClient, session_id: str, turns: int, latencies: list):
+    for turn in range(turns):
+        payload = {"text": MESSAGES[turn % len(MESSAGES)], "session_id": session_id}
+        started = time.perf_counter()
+        response = await client.post("/api/v1/chat/send", json=payload)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+async def drive(url: str, sessions: int, turns: int) -> tuple:
+    latencies = []
+    limits = httpx.Limits(max_connections=sessions)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_session(client, f"load_{i}", turns, latencies) for i in range(sessions)))
+        return latencies, time.perf_counter() - started
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    nlp_executor = sys.argv[3] if len(sys.argv) > 3 else "thread"
+
+    server = None
+    url = os.getenv("LOAD_TEST_URL")
+    if not url:
+        server, url = start_server(nlp_executor)
+    try:
+        latencies, elapsed = asyncio.run(drive(url, sessions, turns))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print(f"NLP_EXECUTOR={nlp_executor}  {sessions} sessions x {turns} turns")
+    print(f"throughput: {len(latencies) / elapsed:8.1f} req/s")
+    for pct in (50, 95, 99):
+        print(f"p{pct}:       {percentile(latencies, pct) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from logging.config import fileConfig
+import asyncio
+import os
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.services.story_repository import SQLStoryRepository, metadata
+
+# Set when the app runs the migrations itself (see SQLStoryRepository)
+app_connection = context.config.attributes.get("connection")
+
+if context.config.config_file_name is not None and app_connection is None:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = metadata
+
+def database_url() -> str:
+    url = context.config.get_main_option("sqlalchemy.url") or os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("Set DATABASE_URL (or sqlalchemy.url) to run migrations.")
+    return SQLStoryRepository._async_url(url)
+
+def run_migrations_offline():
+    context.configure(url=database_url(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection):
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online():
+    engine = create_async_engine(database_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif app_connection is not None:
+    do_run_migrations(app_connection)
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,42 @@
+"""Initial schema: stories and story_stats
+
+The story_stats row itself (running totals) is written by the app when it
+seeds the database.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-03-25
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "stories",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("date", sa.String(32), nullable=False),
+        sa.Column("duration_seconds", sa.Integer, nullable=False),
+        sa.Column("duration", sa.String(32), nullable=False),
+        sa.Column("topics", sa.JSON, nullable=False),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column("transcript", sa.JSON, nullable=True),
+        sa.Column("audio_url", sa.String(512), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "story_stats",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chapters", sa.Integer, nullable=False),
+        sa.Column("total_seconds", sa.BigInteger, nullable=False),
+        sa.Column("family_views", sa.BigInteger, nullable=False),
+    )
+
+def downgrade():
+    op.drop_table("story_stats")
+    op.drop_table("stories")
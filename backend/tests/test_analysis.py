@@ -0,0 +1,48 @@
+import unittest
+from app.services.nlp.analysis import AnalysisPipeline
+from app.services.nlp.topics import TopicModeler
+
+class TestAnalysisPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        modeler = TopicModeler(num_topics=2)
+        modeler.train([
+            ["school", "teacher", "class"],
+            ["war", "army", "soldier"],
+            ["school", "teacher", "play"],
+            ["war", "soldier", "fight"],
+        ])
+        cls.pipeline = AnalysisPipeline(topic_modeler=modeler)
+
+    def test_single_parse_feeds_every_analyzer(self):
+        before = self.pipeline.parses
+        result = self.pipeline.analyze("Um, my grandfather was a teacher before the war.")
+        self.assertEqual(self.pipeline.parses - before, 1)
+
+        preprocessing = result["preprocessing"]
+        self.assertNotIn("um", preprocessing["cleaned"])
+        self.assertNotIn("Um", preprocessing["tokens"])
+        self.assertIn("teacher", preprocessing["stems"] + preprocessing["lemmas"])
+
+        concepts = [c["label"] for c in result["keywords"]["custom_concepts"]]
+        self.assertIn("FAMILY_ROLE", concepts)
+        self.assertTrue(len(result["topics"]) > 0)
+
+    def test_process_doc_drops_repetitions(self):
+        doc = self.pipeline.parse("It was very very cold.")
+        tokens = self.pipeline.preprocessor.process_doc(doc)["tokens"]
+        self.assertEqual(tokens.count("very"), 1)
+
+    def test_process_doc_matches_clean_text(self):
+        preprocessor = self.pipeline.preprocessor
+        for text in [
+            "Um, my father, you know, w-w-wait, he was a teacher.",
+            "I mean it was very very cold, like, really cold.",
+            "Then then th-th-then we moved, i i mean, to Ohio.",
+        ]:
+            result = preprocessor.process_doc(self.pipeline.parse(text))
+            self.assertEqual(" ".join(result["tokens"]).lower().split(),
+                             " ".join(t.text for t in self.pipeline.parse(result["cleaned"])).split())
+
+if __name__ == '__main__':
+    unittest.main()
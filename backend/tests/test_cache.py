@@ -0,0 +1,175 @@
+import unittest
+import asyncio
+from unittest import mock
+from app.core.cache import CacheManager, create_cache
+from app.core.redis_stub import AsyncInMemoryRedis, InMemoryPipeline, InMemoryRedis
+
+class TestCacheManager(unittest.TestCase):
+    def setUp(self):
+        self.redis = InMemoryRedis()
+        self.cache = CacheManager(AsyncInMemoryRedis(self.redis), default_ttl=60)
+
+    def test_round_trip(self):
+        async def run():
+            self.assertIsNone(await self.cache.get("stats"))
+            await self.cache.set("stats", {"stories": 3})
+            self.assertEqual(await self.cache.get("stats"), {"stories": 3})
+            self.assertTrue(0 < self.redis.ttl("cache:stats") <= 60)
+            self.assertEqual(await self.cache.delete("stats"), 1)
+            self.assertIsNone(await self.cache.get("stats"))
+        asyncio.run(run())
+
+    def test_batch_operations(self):
+        async def run():
+            await self.cache.set_many({"story:1": {"id": "1"}, "story:2": {"id": "2"}}, expire=30)
+            self.assertEqual(await self.cache.get_many(["story:1", "story:3", "story:2"]),
+                             {"story:1": {"id": "1"}, "story:2": {"id": "2"}})
+            self.assertTrue(0 < self.redis.ttl("cache:story:2") <= 30)
+            self.assertEqual(await self.cache.get_many([]), {})
+        asyncio.run(run())
+
+    def test_disabled_without_client(self):
+        async def run():
+            cache = CacheManager(None)
+            await cache.set("stats", {"stories": 3})
+            self.assertIsNone(await cache.get("stats"))
+            self.assertEqual(await cache.get_many(["stats"]), {})
+        asyncio.run(run())
+
+    def test_unreachable_redis_is_a_miss(self):
+        async def run():
+            cache = CacheManager.from_url("redis://127.0.0.1:1/0", socket_timeout=0.2)
+            pool = cache.redis.connection_pool
+            self.assertEqual(pool.max_connections, 20)
+            self.assertEqual(pool.connection_kwargs["socket_timeout"], 0.2)
+            await cache.set("stats", {"stories": 3})
+            self.assertIsNone(await cache.get("stats"))
+            self.assertEqual(await cache.get_many(["stats"]), {})
+            await cache.close()
+        asyncio.run(run())
+
+    def test_tag_invalidation(self):
+        async def run():
+            cache = CacheManager(AsyncInMemoryRedis(self.redis), batch_size=2)
+            await cache.set_many({f"story:{i}": {"id": i} for i in range(5)}, tags=("stories",))
+            await cache.set("stories:20:None:full", {"items": []}, tags=("stories", "user:1"))
+            await cache.set("dashboard:stats", [1], tags=("stats",))
+
+            self.assertEqual(await cache.invalidate("stories", "missing"), 6)
+            self.assertEqual(await cache.get_many([f"story:{i}" for i in range(5)]), {})
+            self.assertEqual(await cache.get("dashboard:stats"), [1])
+            self.assertEqual(self.redis.exists("cache:tag:stories"), 0)
+            # Already removed entries are skipped; the tag itself is still registered
+            self.assertEqual(await cache.invalidate("user:1"), 0)
+            self.assertEqual(await cache.invalidate("user:1"), 0)
+        asyncio.run(run())
+
+    def test_pattern_invalidation(self):
+        async def run():
+            cache = CacheManager(AsyncInMemoryRedis(self.redis), batch_size=2)
+            await cache.set_many({f"story:{i}": {"id": i} for i in range(5)})
+            await cache.set("dashboard:stats", [1])
+            self.redis.set("session:abc", "other namespace")
+            with mock.patch.object(self.redis, "keys", create=True) as keys:
+                self.assertEqual(await cache.invalidate(pattern="story:*"), 5)
+            keys.assert_not_called()
+            self.assertEqual(await cache.get("dashboard:stats"), [1])
+            self.assertEqual(self.redis.exists("session:abc"), 1)
+        asyncio.run(run())
+
+    def test_write_after_invalidation_is_not_cached(self):
+        async def run():
+            # A reader misses, then a writer invalidates before the reader stores its page
+            cached, generation = await self.cache.get_with_generation("stories:20", tags=("stories",))
+            self.assertIsNone(cached)
+            await self.cache.invalidate("stories")
+            await self.cache.set("stories:20", {"items": ["stale"]}, tags=("stories",), generation=generation)
+            self.assertIsNone(await self.cache.get("stories:20"))
+
+            # Without an intervening invalidation the page is stored
+            _, generation = await self.cache.get_with_generation("stories:20", tags=("stories",))
+            await self.cache.set("stories:20", {"items": ["fresh"]}, tags=("stories",), generation=generation)
+            self.assertEqual(await self.cache.get_with_generation("stories:20", tags=("stories",)),
+                             ({"items": ["fresh"]}, generation))
+
+            # An invalidation between the check and EXEC aborts the write
+            _, generation = await self.cache.get_with_generation("stories:21", tags=("stories",))
+            def invalidate_then_multi(pipe):
+                self.redis.incr("cache:gen:stories")
+                multi(pipe)
+            multi = InMemoryPipeline.multi
+            with mock.patch.object(InMemoryPipeline, "multi", invalidate_then_multi):
+                await self.cache.set("stories:21", {"items": []}, tags=("stories",), generation=generation)
+            self.assertIsNone(await self.cache.get("stories:21"))
+        asyncio.run(run())
+
+    def test_close_disconnects_pool(self):
+        async def run():
+            client = mock.AsyncMock()
+            await CacheManager(client).close()
+            client.aclose.assert_awaited_once_with(close_connection_pool=True)
+        asyncio.run(run())
+
+    def test_tag_sets_expire_with_longest_entry(self):
+        async def run():
+            await self.cache.set("a", 1, expire=100, tags=("t",))
+            await self.cache.set("b", 1, expire=10, tags=("t",))
+            self.assertTrue(90 < self.redis.ttl("cache:tag:t") <= 100)
+            await self.cache.set("c", 1, expire=500, tags=("t",))
+            self.assertTrue(490 < self.redis.ttl("cache:tag:t") <= 500)
+        asyncio.run(run())
+
+class TestCreateCache(unittest.TestCase):
+    def test_disabled_by_default(self):
+        with mock.patch.dict("os.environ", {}, clear=True):
+            self.assertIsNone(create_cache().redis)
+
+    def test_redis_when_configured(self):
+        with mock.patch.dict("os.environ", {"REDIS_URL": "redis://cache:6379/0"}, clear=True), \
+             mock.patch.object(CacheManager, "from_url", return_value=CacheManager(None)) as from_url:
+            create_cache()
+        from_url.assert_called_once()
+
+    def test_local_is_opt_in(self):
+        with mock.patch.dict("os.environ", {"CACHE_BACKEND": "local"}, clear=True):
+            self.assertIsInstance(create_cache().redis, AsyncInMemoryRedis)
+
+class TestInMemoryRedisScan(unittest.TestCase):
+    def test_scan_survives_deletes(self):
+        redis = InMemoryRedis()
+        for i in range(25):
+            redis.set(f"key:{i}", i)
+        redis.set("other", 1)
+        seen, cursor = [], 0
+        while True:
+            cursor, keys = redis.scan(cursor, match="key:*", count=10)
+            seen.extend(keys)
+            redis.unlink(*keys)
+            if cursor == 0:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(redis.exists("other"), 1)
+        self.assertEqual(list(redis.scan_iter()), [b"other"])
+
+    def test_sets(self):
+        redis = InMemoryRedis()
+        self.assertEqual(redis.sadd("tag", "a", "b", "c"), 3)
+        self.assertEqual(redis.sadd("tag", "a"), 0)
+        cursor, first = redis.sscan("tag", count=2)
+        self.assertEqual((cursor, first), (2, [b"a", b"b"]))
+        self.assertEqual(redis.sscan("tag", cursor, count=2), (0, [b"c"]))
+        self.assertEqual(redis.srem("tag", "a", "b", "c"), 3)
+        self.assertEqual(redis.exists("tag"), 0)
+
+    def test_async_pipeline(self):
+        async def run():
+            client = AsyncInMemoryRedis()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set("a", 1).sadd("tag", "a")
+                self.assertEqual(await pipe.execute(), [True, 1])
+            self.assertEqual(await client.mget(["a", "b"]), [b"1", None])
+            self.assertEqual([key async for key in client.scan_iter(match="a")], [b"a"])
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import shutil
+import glob
 import os
+import joblib
+import numpy as np
 from app.services.nlp.classification import StoryClassifier
 
 class TestStoryClassifier(unittest.TestCase):
@@ -23,8 +26,9 @@ class TestStoryClassifier(unittest.TestCase):
         self.classifier.train(self.train_texts, self.train_labels)
 
     def tearDown(self):
-        if os.path.exists(self.MODEL_PATH):
-            os.remove(self.MODEL_PATH)
+        # The pointer file plus every saved version (test_classifier.vN.pkl)
+        for path in glob.glob("data/test_classifier*"):
+            os.remove(path)
 
     def test_prediction(self):
         # "school" -> childhood
@@ -39,5 +43,80 @@ class TestStoryClassifier(unittest.TestCase):
         self.assertIn("childhood", labels)
         self.assertIn("career", labels)
 
+    def test_batch_matches_single_prediction(self):
+        texts = ["school", "school work", "war", "nothing related"]
+        batch = self.classifier.predict_batch(texts, batch_size=3)
+        self.assertEqual(len(batch), len(texts))
+        for text, result in zip(texts, batch):
+            self.assertEqual([label for label, _ in result], [label for label, _ in self.classifier.predict(text)])
+            for (_, batch_score), (_, single_score) in zip(result, self.classifier.predict(text)):
+                self.assertAlmostEqual(batch_score, single_score)
+
+    def test_batch_top_k(self):
+        result = self.classifier.predict_batch(["school work"], top_k=1)[0]
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result, self.classifier.predict("school work")[:1])
+
+    def test_versioned_save_and_mmap_load(self):
+        self.assertEqual(self.classifier.versions(), [1])
+        worker = StoryClassifier(model_path=self.MODEL_PATH)
+        self.assertEqual(worker.version, 1)
+        coef = worker.pipeline.named_steps["clf"].estimators_[0].coef_
+        self.assertIsInstance(coef, np.memmap)
+
+    def test_hot_reload_on_new_version(self):
+        worker = StoryClassifier(model_path=self.MODEL_PATH, reload_interval=0)
+        self.classifier.train(self.train_texts + ["the farm in spring"], self.train_labels + [["farming"]])
+        self.assertEqual(self.classifier.version, 2)
+
+        held = worker.pipeline  # an in-flight prediction keeps its snapshot
+        self.assertIn("farming", [label for label, _ in worker.predict("farm spring")])
+        self.assertEqual(worker.version, 2)
+        self.assertIsNot(worker.pipeline, held)
+        self.assertFalse(worker.maybe_reload())
+
+    def test_old_versions_are_pruned(self):
+        classifier = StoryClassifier(model_path=self.MODEL_PATH, keep_versions=2)
+        for _ in range(3):
+            classifier.train(self.train_texts, self.train_labels)
+        self.assertEqual(classifier.versions(), [3, 4])
+
+    def test_loads_unversioned_artifact(self):
+        joblib.dump((self.classifier.pipeline, self.classifier.mlb), self.MODEL_PATH)
+        legacy = StoryClassifier(model_path=self.MODEL_PATH)
+        self.assertEqual(legacy.version, 0)
+        self.assertIn("childhood", [label for label, _ in legacy.predict("school")])
+
+    def test_partial_fit_grows_labels(self):
+        online = StoryClassifier(model_path=self.MODEL_PATH)
+        online.partial_fit(["the farm in spring"] * 3, [["farming"]] * 3)
+        self.assertEqual(list(online.online.classes_), ["farming"])
+        self.assertIn("farming", [label for label, _ in online.predict("farm spring")])
+        # The batch model is kept and blended, not replaced
+        self.assertIs(online.pipeline.__class__, self.classifier.pipeline.__class__)
+        self.assertIn("childhood", [label for label, _ in online.predict("school")])
+
+        # A worker loading the mmap-ed online model can keep updating it
+        worker = StoryClassifier(model_path=self.MODEL_PATH)
+        worker.partial_fit(["harvest on the farm"], [["farming"]], save=False)
+        self.assertEqual(worker.predict_batch(["farm"], top_k=1)[0][0][0], "farming")
+
+    def test_online_heads_are_saved_sparse(self):
+        self.classifier.partial_fit(self.train_texts, self.train_labels, seen_through=4)
+        self.assertLess(os.path.getsize(self.MODEL_PATH), 200_000)
+        loaded = StoryClassifier(model_path=self.MODEL_PATH)
+        self.assertEqual((loaded.seen_through, loaded.online.n_seen), (4, 4))
+
+        # Retraining from the archive absorbs the online updates
+        loaded.train(self.train_texts, self.train_labels, seen_through=4)
+        self.assertIsNone(loaded.online)
+
+    def test_concurrent_savers_claim_distinct_versions(self):
+        other = StoryClassifier(model_path=self.MODEL_PATH)
+        # Both computed the same next version; the second moves on
+        open(self.classifier._version_path(2), "w").close()
+        other.save_model()
+        self.assertEqual(other.version, 3)
+
 if __name__ == '__main__':
     unittest.main()
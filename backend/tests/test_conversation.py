@@ -5,28 +5,56 @@ from app.services.conversation_manager import ContextManager
 class TestContextManager(unittest.TestCase):
     def setUp(self):
         self.manager = ContextManager()
-        self.session_id = self.manager.create_session("user_123")
+        self.session_id = asyncio.run(self.manager.create_session("user_123"))
 
     def test_session_creation(self):
         self.assertIsNotNone(self.session_id)
         self.assertIn(self.session_id, self.manager.active_sessions)
 
     def test_topic_change(self):
-        self.manager.change_topic(self.session_id, "childhood")
-        ctx = self.manager.get_session(self.session_id)
-        self.assertEqual(ctx.current_topic, "childhood")
+        async def run():
+            await self.manager.change_topic(self.session_id, "childhood")
+            ctx = await self.manager.get_session(self.session_id)
+            self.assertEqual(ctx.current_topic, "childhood")
+        asyncio.run(run())
 
     def test_interaction_flow(self):
         # Async test wrapper
         async def run_flow():
             response = await self.manager.process_user_input(self.session_id, "I liked playing hide and seek.")
             self.assertTrue(len(response) > 0)
-            ctx = self.manager.get_session(self.session_id)
+            ctx = await self.manager.get_session(self.session_id)
             self.assertEqual(len(ctx.history), 2) # User + AI
-            self.assertEqual(ctx.history[0]["role"], "user")
-            self.assertEqual(ctx.history[1]["role"], "ai")
+            self.assertEqual(ctx.history[0].role, "user")
+            self.assertEqual(ctx.history[1].role, "ai")
         
         asyncio.run(run_flow())
 
+    def test_turn_sentiment_recorded(self):
+        async def run():
+            reply, sentiment = await self.manager.process_turn(self.session_id, "I am so happy and delighted!")
+            self.assertTrue(reply)
+            ctx = await self.manager.get_session(self.session_id)
+            self.assertEqual(ctx.history[0].tone, sentiment["primary_tone"])
+            self.assertEqual(ctx.trajectory.points, [ctx.history[0].compound])
+            self.assertIsNone(ctx.history[1].tone)  # AI turns are not scored
+        asyncio.run(run())
+
+class TestHistoryWindow(unittest.TestCase):
+    def test_old_turns_roll_into_summary(self):
+        manager = ContextManager(history_window=4)
+        answers = ["I was born in Ohio. It snowed a lot.", "My father ran a hardware store.",
+                   "We moved to Chicago in 1960.", "I met my wife at a dance."]
+
+        async def run():
+            session_id = await manager.create_session("user_123")
+            for answer in answers:
+                await manager.process_user_input(session_id, answer)
+            return await manager.get_session(session_id)
+        ctx = asyncio.run(run())
+        self.assertEqual(len(ctx.history), 8)  # Full transcript is kept for saving
+        self.assertEqual(ctx.summarized_turns, 4)
+        self.assertEqual(ctx.summary.to_list(), ["I was born in Ohio.", "My father ran a hardware store."])
+
 if __name__ == '__main__':
     unittest.main()
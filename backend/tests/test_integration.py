@@ -1,11 +1,24 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services import jobs
+import os
+import tempfile
+import time
 import unittest
 
 # Note: In a real scenario, we'd mock the DB dependency override
 class TestAPIIntegration(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(app)
+        self.model_dir = tempfile.TemporaryDirectory()
+        model_path = os.path.join(self.model_dir.name, "classifier.pkl")
+        os.environ["CLASSIFIER_MODEL_PATH"] = model_path  # read by the training jobs
+        os.environ["CLASSIFIER_UPDATE_BATCH"] = "1"
+
+    def tearDown(self):
+        os.environ.pop("CLASSIFIER_MODEL_PATH", None)
+        os.environ.pop("CLASSIFIER_UPDATE_BATCH", None)
+        self.model_dir.cleanup()
 
     def test_health_check(self):
         # Assuming we have a health endpoint
@@ -15,10 +28,82 @@ class TestAPIIntegration(unittest.TestCase):
         else:
             self.assertEqual(response.status_code, 200)
 
+    def test_get_story(self):
+        response = self.client.get("/api/v1/stories/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], "1")
+        self.assertEqual(self.client.get("/api/v1/stories/missing").status_code, 404)
+
+    def test_story_listing_pagination(self):
+        response = self.client.get("/api/v1/stories", params={"limit": 2, "view": "summary"})
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(len(page["items"]), 2)
+        self.assertEqual(set(page["items"][0]), {"id", "title", "date", "topics"})
+        self.assertIsNotNone(page["next_cursor"])
+
+        response = self.client.get("/api/v1/stories", params={"cursor": page["next_cursor"], "fields": "title"})
+        rest = response.json()
+        self.assertEqual(set(rest["items"][0]), {"id", "title"})
+        self.assertNotIn(rest["items"][0]["id"], [s["id"] for s in page["items"]])
+
+        self.assertEqual(self.client.get("/api/v1/stories", params={"fields": "secret"}).status_code, 400)
+
+    def test_dashboard_stats(self):
+        response = self.client.get("/api/v1/dashboard/stats")
+        self.assertEqual(response.status_code, 200)
+        labels = [s["label"] for s in response.json()]
+        self.assertEqual(labels, ["Chapters", "Audio Hours", "Family Views"])
+
     def test_chat_flow(self):
-        # Simulate a full chat flow integration check
-        # This would require a running DB or mock override
-        pass
+        # Simulate a full chat flow against the in-memory story repository
+        payload = {"text": "I grew up on a farm in Ohio.", "session_id": "integration_user"}
+        response = self.client.post("/api/v1/chat/send", json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["reply"])
+        self.assertIn(response.json()["sentiment"], ["NEUTRAL", "POSITIVE", "NEGATIVE", "SENSITIVE/SAD",
+                                                     "NOSTALGIC_POSITIVE", "NOSTALGIC_MELANCHOLY"])
+
+        # Cached before the save, invalidated by it
+        chapters = self.client.get("/api/v1/dashboard/stats").json()[0]["value"]
+        self.client.get("/api/v1/stories", params={"limit": 1})
+
+        response = self.client.post("/api/v1/chat/save", json=payload)
+        self.assertEqual(response.status_code, 200)
+        story_id = response.json()["story_id"]
+        self.assertEqual(self.client.get("/api/v1/stories", params={"limit": 1}).json()["items"][0]["id"], story_id)
+        self.assertEqual(self.client.get("/api/v1/dashboard/stats").json()[0]["value"], str(int(chapters) + 1))
+        story = self.client.get(f"/api/v1/stories/{story_id}").json()
+        self.assertEqual(story["transcript"][0]["role"], "user")
+        self.assertEqual(story["transcript"][0]["content"], payload["text"])
+        self.assertIn("timestamp", story["transcript"][0])
+
+        # The saved story queued an online update, which saves a new model version
+        for _ in range(200):
+            classifier = jobs._classifier()
+            if classifier.online:
+                break
+            time.sleep(0.05)
+        self.assertIn(story["topics"][0], classifier.online.classes_.tolist())
+        self.assertEqual(classifier.seen_through, int(story_id))
+
+    def test_training_job(self):
+        response = self.client.post("/api/v1/jobs", json={"name": "train_classifier"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+
+        for _ in range(200):
+            job = self.client.get(f"/api/v1/jobs/{job_id}").json()
+            if job["state"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.05)
+        self.assertEqual(job["state"], "succeeded")
+        self.assertEqual(job["progress"], 1.0)
+        self.assertIn("Family", job["result"]["labels"])
+
+        self.assertEqual(self.client.delete(f"/api/v1/jobs/{job_id}").json()["state"], "succeeded")
+        self.assertEqual(self.client.get("/api/v1/jobs/missing").status_code, 404)
+        self.assertEqual(self.client.post("/api/v1/jobs", json={"name": "mine_bitcoin"}).status_code, 400)
 
 if __name__ == '__main__':
     unittest.main()
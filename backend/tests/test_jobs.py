@@ -0,0 +1,163 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+from celery import Celery
+from app.core.redis_stub import InMemoryRedis
+from app.models.job import JobState
+from app.models.story import Story
+from app.services import jobs
+from app.services.jobs import CeleryJobQueue, LocalJobQueue, create_job_queue, read_archive, register_job_task
+from app.services.story_repository import InMemoryStoryRepository, SQLStoryRepository
+
+TOPIC_TEXTS = ["school teacher class", "war army soldier", "school play teacher", "war soldier fight"]
+
+def archive_stories():
+    return [Story(id=str(i), title=f"Story {i}", date="Mar 20, 2024", topics=["Family"], content=text,
+                  transcript=[{"role": "user", "content": text}])
+            for i, text in enumerate(TOPIC_TEXTS, start=1)]
+
+def wait_for(queue, job_id, states, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job.state in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {job.state}")
+
+class TestLocalJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+        def slow(payload, progress):
+            for step in range(1, 4):
+                self.release.wait(timeout=5)
+                progress(step / 3, f"step {step}")
+            return {"steps": 3}
+
+        def broken(payload, progress):
+            raise RuntimeError("bad data")
+
+        self.queue = LocalJobQueue(max_workers=1, tasks={"slow": slow, "broken": broken})
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.shutdown()
+
+    def test_success_with_progress(self):
+        job = self.queue.submit("slow", {})
+        self.assertEqual(job.state, JobState.QUEUED)
+        self.release.set()
+        job = wait_for(self.queue, job.id, {JobState.SUCCEEDED})
+        self.assertEqual((job.progress, job.result, job.message), (1.0, {"steps": 3}, "step 3"))
+
+    def test_cancel_running_and_queued(self):
+        running = self.queue.submit("slow", {})
+        queued = self.queue.submit("slow", {})
+        wait_for(self.queue, running.id, {JobState.RUNNING})
+
+        self.assertEqual(self.queue.cancel(queued.id).state, JobState.CANCELLED)
+        self.queue.cancel(running.id)
+        self.release.set()
+        self.assertEqual(wait_for(self.queue, running.id, {JobState.CANCELLED}).state, JobState.CANCELLED)
+
+    def test_failure_and_unknown_jobs(self):
+        job = wait_for(self.queue, self.queue.submit("broken", {}).id, {JobState.FAILED})
+        self.assertEqual(job.error, "bad data")
+        self.assertIsNone(self.queue.status("missing"))
+        self.assertIsNone(self.queue.cancel("missing"))
+        with self.assertRaises(ValueError):
+            self.queue.submit("nope", {})
+
+class TestArchiveJobs(unittest.TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"TOPIC_MODEL_DIR": self.model_dir.name})
+        self.env.start()
+        os.environ.pop("DATABASE_URL", None)
+        os.environ.pop("JOB_BACKEND", None)
+        # Importing app.main elsewhere registers the API's store
+        self.shared_archive, jobs._shared_archive = jobs._shared_archive, None
+
+    def tearDown(self):
+        jobs._shared_archive = self.shared_archive
+        self.env.stop()
+        self.model_dir.cleanup()
+
+    def test_read_archive_pages_through_projection(self):
+        create_job_queue(InMemoryStoryRepository(archive_stories())).shutdown()
+        rows = read_archive(["content"], page_size=3)
+        self.assertEqual([row["id"] for row in rows], ["4", "3", "2", "1"])
+        self.assertEqual(set(rows[0]), {"id", "content"})
+
+    def test_local_jobs_read_the_in_memory_archive(self):
+        queue = create_job_queue(InMemoryStoryRepository(archive_stories()))
+        try:
+            job = wait_for(queue, queue.submit("train_topics", {"num_topics": 2}).id,
+                           {JobState.SUCCEEDED, JobState.FAILED})
+        finally:
+            queue.shutdown()
+        self.assertEqual(job.state, JobState.SUCCEEDED, job.error)
+        self.assertEqual(len(job.result["topics"]), 2)
+
+    def test_jobs_open_the_database_archive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite+aiosqlite:///{tmp}/stories.db"
+            seeded = SQLStoryRepository(url, seed=archive_stories())
+
+            async def seed():
+                await seeded.count()
+                await seeded.close()
+            asyncio.run(seed())
+
+            with mock.patch.dict(os.environ, {"DATABASE_URL": url}):
+                self.assertEqual([row["content"] for row in read_archive(["content"])], TOPIC_TEXTS[::-1])
+
+    def test_update_classifier_learns_new_stories_in_batches(self):
+        stories = archive_stories()
+        repository = InMemoryStoryRepository(stories[:2])
+        create_job_queue(repository).shutdown()
+        with mock.patch.dict(os.environ, {"CLASSIFIER_MODEL_PATH": f"{self.model_dir.name}/classifier.pkl"}):
+            progress = lambda fraction, message="": None
+            self.assertEqual(jobs.update_classifier({"min_batch": 3}, progress)["pending"], 2)
+
+            for story in stories[2:]:
+                asyncio.run(repository.create(**story.model_dump(exclude={"id"})))
+            result = jobs.update_classifier({"min_batch": 3}, progress)
+            self.assertEqual((result["learned"], result["version"]), (4, 1))
+
+            # Nothing new since: no retraining, no new version
+            result = jobs.update_classifier({"min_batch": 1}, progress)
+            self.assertEqual((result["learned"], result["version"]), (0, 1))
+            self.assertEqual(jobs._classifier().seen_through, 4)
+
+class TestCeleryJobQueue(unittest.TestCase):
+    def setUp(self):
+        # Eager Celery app with an in-memory result backend stands in for Redis + workers
+        self.app = Celery("test_jobs", broker="memory://", backend="cache+memory://")
+        self.app.conf.update(task_always_eager=True, task_store_eager_result=True)
+        self.redis = InMemoryRedis()
+        register_job_task(self.app, lambda: self.redis)
+        self.queue = CeleryJobQueue(self.app, self.redis)
+        self.model_dir = tempfile.TemporaryDirectory()
+        os.environ["TOPIC_MODEL_DIR"] = self.model_dir.name  # read by train_topics
+
+    def tearDown(self):
+        os.environ.pop("TOPIC_MODEL_DIR", None)
+        self.model_dir.cleanup()
+
+    def test_topic_training_job(self):
+        job = self.queue.submit("train_topics", {"texts": TOPIC_TEXTS, "num_topics": 2})
+        job = self.queue.status(job.id)
+        self.assertEqual(job.name, "train_topics")
+        self.assertEqual(job.state, JobState.SUCCEEDED)
+        self.assertEqual(len(job.result["topics"]), 2)
+        self.assertEqual(job.result["version"], 1)
+        self.assertIsNone(self.queue.status("missing"))
+
+if __name__ == '__main__':
+    unittest.main()
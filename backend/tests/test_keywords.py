@@ -36,6 +36,12 @@ class TestKeywordDetector(unittest.TestCase):
         concepts = [c["label"] for c in result["custom_concepts"]]
         self.assertIn("FAMILY_ROLE", concepts)  # "grandfather"
         self.assertIn("MILESTONE", concepts)    # "war" (defined as milestone/theme in code)
+    def test_detect_keywords_many_streams(self):
+        if not self.detector: return
+        texts = ["My grandfather fought in the war.", "Her wedding was in June.", ""]
+        results = self.detector.detect_keywords_many(iter(texts), batch_size=2)
+        self.assertFalse(isinstance(results, list))
+        self.assertEqual(list(results), [self.detector.detect_keywords(t) for t in texts])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import asyncio
+from app.models.conversation import Role, Turn
+from app.services.nlp.llm_client import LLMClient
+from app.services.nlp.markers import MarkerMatcher, match_markers
+
+class TestMarkerMatcher(unittest.TestCase):
+    def test_all_categories_in_one_scan(self):
+        markers = match_markers("Back in the day my grandpa passed away in the hospital.")
+        self.assertEqual(markers["nostalgia"], {"back in the day"})
+        self.assertEqual(markers["sensitive"], {"passed away", "hospital"})
+        self.assertEqual(markers["family"], {"grandpa"})
+        self.assertEqual(markers["emotional"], {"passed away"})
+        self.assertFalse(markers["travel"])
+
+    def test_word_boundaries(self):
+        markers = match_markers("We almost stopped at the gas station, but the dadaist painter wouldn't.")
+        self.assertFalse(markers["break"])
+        self.assertFalse(markers["emotional"])
+        self.assertFalse(markers["family"])
+
+    def test_overlapping_phrases(self):
+        matcher = MarkerMatcher({"a": ["lost him"], "b": ["him again"], "c": ["lost"]})
+        found = matcher.find("I lost him again.")
+        self.assertEqual(found["a"], {"lost him"})
+        self.assertEqual(found["b"], {"him again"})
+        self.assertEqual(found["c"], {"lost"})
+
+class TestFollowUpMarkers(unittest.TestCase):
+    def setUp(self):
+        self.client = LLMClient()
+
+    def ask(self, text):
+        return asyncio.run(self.client.generate_follow_up([Turn(Role.USER, text)], "general"))
+
+    def test_break_request(self):
+        self.assertIn("take a break", self.ask("I'm tired, can we stop?"))
+        self.assertNotIn("take a break", self.ask("The bus stopped near the beach."))
+
+    def test_topic_priority(self):
+        question = self.ask("My sister and I went on a trip to the beach.")
+        self.assertIn(question, self.client.templates["family"])
+
+if __name__ == '__main__':
+    unittest.main()
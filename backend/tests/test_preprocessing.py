@@ -1,4 +1,7 @@
 import unittest
+import spacy
+from spacy.lookups import Lookups
+from app.services.nlp import spacy_models
 from app.services.nlp.preprocessing import TextPreprocessor
 
 class TestTextPreprocessor(unittest.TestCase):
@@ -36,11 +39,69 @@ class TestTextPreprocessor(unittest.TestCase):
         self.assertIn("very cold", cleaned)
         self.assertNotIn("very very", cleaned)
 
+    def test_clean_text_single_pass_edge_cases(self):
+        if not self.processor: return
+        cases = {
+            "Well, um, it was a very very long time ago, you know?": "well, , it was a very long time ago, ?",
+            "I i mean, the the\n\n house": "i , the house",
+            "w-w-wait   Like,  then then then": ", then",
+            "um": "",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(self.processor.clean_text(text), expected)
+
+    def test_clean_text_filler_after_punctuation(self):
+        if not self.processor: return
+        # A filler glued to punctuation must not glue the next word on too
+        cases = {
+            "um,ah VERY": ", very",
+            "wait...um I": "wait... i",
+            "yes.\nuh\n\nno": "yes. no",
+            "so,um,then": "so,,then",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(self.processor.clean_text(text), expected)
+
+    def test_clean_many(self):
+        if not self.processor: return
+        texts = iter(["It was, uh, cold.", "Very very cold."])
+        self.assertEqual(list(self.processor.clean_many(texts)), ["it was, , cold.", "very cold."])
+
     def test_lemmatization(self):
         if not self.processor: return
         text = "I am running"
         result = self.processor.process(text)
         self.assertIn("run", result["lemmas"])
 
+class TestPreprocessorCaches(unittest.TestCase):
+    def setUp(self):
+        # Blank pipeline with a lookup lemmatizer stands in for the full model
+        nlp = spacy.blank("en")
+        lookups = Lookups()
+        lookups.add_table("lemma_lookup", {"running": "run", "was": "be"})
+        nlp.add_pipe("lemmatizer", config={"mode": "lookup"}).initialize(lookups=lookups)
+        spacy_models.register("test_lookup_model", nlp)
+        self.processor = TextPreprocessor("test_lookup_model", cache_size=3)
+
+    def test_repeated_vocabulary_hits_the_caches(self):
+        self.processor.process("I was running")
+        result = self.processor.process("I was running")
+        self.assertEqual(result["lemmas"], ["i", "be", "run"])
+        self.assertEqual(result["stems"], ["i", "wa", "run"])
+        stats = self.processor.cache_stats()
+        self.assertEqual(stats["lemmas"]["misses"], 3)
+        self.assertEqual(stats["lemmas"]["hits"], 3)
+        self.assertEqual(stats["stems"]["hits"], 3)
+
+    def test_caches_are_bounded(self):
+        self.processor.process("one two three four five")
+        self.assertEqual(self.processor.cache_stats()["stems"]["size"], 3)
+
+    def test_skip_lemmas_and_stems(self):
+        result = self.processor.process("Um I was running", lemmas=False, stems=False)
+        self.assertEqual(result["cleaned"], "i was running")
+        self.assertEqual((result["lemmas"], result["stems"]), ([], []))
+        self.assertEqual(self.processor.process("I was running", lemmas=False)["stems"], ["i", "wa", "run"])
+
 if __name__ == '__main__':
     unittest.main()
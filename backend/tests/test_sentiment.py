@@ -1,5 +1,5 @@
 import unittest
-from app.services.nlp.sentiment import SentimentAnalyzer
+from app.services.nlp.sentiment import SentimentAnalyzer, EmotionalTrajectory
 
 class TestSentimentAnalyzer(unittest.TestCase):
     @classmethod
@@ -30,5 +30,24 @@ class TestSentimentAnalyzer(unittest.TestCase):
         self.assertTrue(result["is_sensitive"])
         self.assertEqual(result["primary_tone"], "SENSITIVE/SAD")
 
+    def test_batch_matches_single_analysis(self):
+        if not self.analyzer: return
+        texts = ["I am so happy and delighted!", "Then he died in the war. It was full of pain.", ""]
+        batch = self.analyzer.analyze_batch(texts)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch[0]["primary_tone"], "POSITIVE")
+        self.assertIsNone(batch[0]["scores"]["subjectivity"])
+        self.assertEqual(batch[1]["primary_tone"], self.analyzer.analyze(texts[1])["primary_tone"])
+
+class TestEmotionalTrajectory(unittest.TestCase):
+    def test_running_aggregates(self):
+        trajectory = EmotionalTrajectory()
+        for compound in [0.5, -0.5, 0.9]:
+            trajectory.add(compound)
+        summary = trajectory.summary()
+        self.assertEqual(trajectory.points, [0.5, -0.5, 0.9])
+        self.assertAlmostEqual(summary["mean"], 0.3)
+        self.assertEqual((summary["low"], summary["high"]), (-0.5, 0.9))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+from app.core.redis_stub import AsyncInMemoryRedis
+from app.models.conversation import Role, Turn
+from app.services.conversation_manager import ContextManager, ConversationContext
+from app.services.session_store import (
+    SessionStore, FileSessionArchive, InMemorySessionArchive, RedisSessionStore, SessionConflictError
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.archive = InMemorySessionArchive()
+        self.store = SessionStore(max_sessions=2, idle_ttl=60, archive=self.archive,
+                                  deserialize=ConversationContext.from_dict, clock=self.clock)
+
+    def test_idle_sessions_are_evicted_and_restored(self):
+        async def run():
+            ctx = ConversationContext("user_1", session_id="s1")
+            ctx.history.append(Turn(Role.USER, "The old dock."))
+            await self.store.put(ctx)
+
+            self.clock.now = 120
+            self.assertEqual(self.store.sweep(), 1)
+            self.assertNotIn("s1", self.store)
+            self.assertIn("s1", self.archive)
+
+            restored = await self.store.get("s1")
+            self.assertEqual(restored.history[0].content, "The old dock.")
+            self.assertEqual(self.store.stats()["evicted_idle"], 1)
+            self.assertEqual(self.store.stats()["restored"], 1)
+        asyncio.run(run())
+
+    def test_capacity_evicts_least_recently_used(self):
+        async def run():
+            for sid in ["a", "b"]:
+                await self.store.put(ConversationContext("user_1", session_id=sid))
+            await self.store.get("a")  # "b" is now least recently used
+            await self.store.put(ConversationContext("user_1", session_id="c"))
+
+            self.assertTrue(await self.store.exists("a"))
+            self.assertNotIn("b", self.store)
+            self.assertIn("b", self.archive)
+            self.assertEqual(self.store.stats()["evicted_capacity"], 1)
+        asyncio.run(run())
+
+    def test_unknown_session_is_a_miss(self):
+        self.assertIsNone(asyncio.run(self.store.get("nobody")))
+        self.assertEqual(self.store.stats()["misses"], 1)
+
+class TestFileSessionArchive(unittest.TestCase):
+    def test_restored_and_expired_files_are_removed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            archive = FileSessionArchive(directory, retention_seconds=3600)
+            store = SessionStore(idle_ttl=60, archive=archive, deserialize=ConversationContext.from_dict)
+            archive.save("s1", ConversationContext("user_1", session_id="s1").to_dict())
+            self.assertIsNotNone(asyncio.run(store.get("s1")))
+            self.assertEqual(os.listdir(directory), [])
+
+            archive.save("old", {"session_id": "old"})
+            archive.save("new", {"session_id": "new"})
+            stale = time.time() - 7200
+            os.utime(os.path.join(directory, "old.json"), (stale, stale))
+            self.assertEqual(archive.prune(), 1)
+            self.assertEqual(os.listdir(directory), ["new.json"])
+
+class TestRedisSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.redis = AsyncInMemoryRedis()
+        self.store = RedisSessionStore(self.redis, deserialize=ConversationContext.from_dict)
+
+    def test_round_trip(self):
+        async def run():
+            ctx = ConversationContext("user_1", session_id="s1")
+            ctx.used_questions.add("What is your earliest memory?")
+            await self.store.put(ctx)
+            loaded = await self.store.get("s1")
+            self.assertEqual(loaded.used_questions, {"What is your earliest memory?"})
+            self.assertTrue(await self.store.exists("s1"))
+            self.assertIsNone(await self.store.get("missing"))
+            await self.store.delete("s1")
+            self.assertFalse(await self.store.exists("s1"))
+        asyncio.run(run())
+
+    def test_concurrent_commit_conflicts(self):
+        async def run():
+            await self.store.put(ConversationContext("user_1", session_id="s1"))
+            worker_a = await self.store.get("s1")
+            worker_b = await self.store.get("s1")
+            worker_a.turn_count += 1
+            await self.store.commit(worker_a)
+            worker_b.turn_count += 1
+            with self.assertRaises(SessionConflictError):
+                await self.store.commit(worker_b)
+            self.assertEqual(self.store.stats()["conflicts"], 1)
+            self.assertEqual((await self.store.get("s1")).turn_count, 1)
+        asyncio.run(run())
+
+    def test_sessions_shared_between_managers(self):
+        # Two managers stand in for two uvicorn workers sharing one Redis
+        store_kwargs = {"deserialize": ConversationContext.from_dict}
+        worker_1 = ContextManager(session_store=RedisSessionStore(self.redis, **store_kwargs))
+        worker_2 = ContextManager(session_store=RedisSessionStore(self.redis, **store_kwargs))
+
+        async def run():
+            await worker_1.get_or_create_session("demo_user", user_id="user_1")
+            await worker_1.process_user_input("demo_user", "I grew up by the sea.")
+            await worker_2.process_user_input("demo_user", "My father was a fisherman.")
+            return await worker_1.get_session("demo_user")
+        ctx = asyncio.run(run())
+
+        self.assertEqual(ctx.turn_count, 2)
+        self.assertEqual(len(ctx.history), 4)
+
+    def test_turns_are_appended_not_rewritten(self):
+        manager = ContextManager(session_store=self.store, history_window=4)
+        answers = [f"Answer number {i}. More detail." for i in range(6)]
+
+        async def run():
+            await manager.get_or_create_session("s1", user_id="user_1")
+            sizes = []
+            for answer in answers:
+                await manager.process_user_input("s1", answer)
+                sizes.append(len(await self.redis.hget("session:s1", "d")))
+            window = await manager.get_session("s1")
+            full = await manager.get_session("s1", full_history=True)
+            return sizes, window, full
+        sizes, window, full = asyncio.run(run())
+
+        # The hash holds the window only: it stops growing once turns roll into the summary
+        self.assertLess(sizes[-1], sizes[2] * 1.5)
+        self.assertEqual(self.redis.sync.llen("session:s1:turns"), 12)
+        self.assertEqual((len(window.history), window.history_offset), (4, 8))
+        self.assertEqual(window.summarized_turns, 8)
+        self.assertEqual([t.content for t in full.history if t.role == Role.USER], answers)
+        self.assertIsNotNone(full.history[0].tone)
+
+    def test_idle_sessions_are_archived_before_expiry_and_restored(self):
+        clock = FakeClock()
+        archive = InMemorySessionArchive()
+        kwargs = {"idle_ttl": 60, "archive": archive, "clock": clock,
+                  "deserialize": ConversationContext.from_dict}
+        # Two stores stand in for two workers sweeping the same Redis
+        worker_1, worker_2 = RedisSessionStore(self.redis, **kwargs), RedisSessionStore(self.redis, **kwargs)
+
+        async def run():
+            manager = ContextManager(session_store=worker_1, history_window=2)
+            await manager.get_or_create_session("idle", user_id="user_1")
+            for answer in ["I grew up by the sea.", "My father was a fisherman."]:
+                await manager.process_user_input("idle", answer)
+            await worker_1.put(ConversationContext("user_1", session_id="busy"))
+
+            clock.now = 50
+            await worker_1.get("busy")
+            self.assertEqual(await worker_1.sweep(), 0)  # nothing idle yet
+
+            clock.now = 100
+            self.assertEqual(await worker_1.sweep() + await worker_2.sweep(), 1)
+            self.assertIn("idle", archive)
+            self.assertTrue(await worker_1.exists("busy"))
+            self.assertEqual(archive.load("idle")["history"][0][1], "I grew up by the sea.")
+            self.assertFalse(await self.redis.exists("session:idle", "session:idle:turns"))
+
+            restored = await worker_2.get("idle", full_history=True)
+            self.assertEqual(len(restored.history), 4)
+            self.assertNotIn("idle", archive)
+            self.assertEqual(worker_2.stats()["restored"], 1)
+            # Restored sessions keep working, with the turn log intact
+            await ContextManager(session_store=worker_2, history_window=2).process_user_input("idle", "We sailed.")
+            self.assertEqual(len((await worker_1.get("idle", full_history=True)).history), 6)
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
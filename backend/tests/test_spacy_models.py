@@ -0,0 +1,28 @@
+import unittest
+from app.services.nlp import spacy_models
+from app.services.nlp.keywords import KeywordDetector
+from app.services.nlp.preprocessing import TextPreprocessor
+
+class TestSpacyRegistry(unittest.TestCase):
+    def setUp(self):
+        spacy_models.clear()
+
+    def test_services_load_lazily_and_share_the_model(self):
+        preprocessor = TextPreprocessor()
+        detector = KeywordDetector()
+        self.assertEqual(spacy_models.loaded_pipelines(), {})
+
+        preprocessor.process("It was a long time ago.")
+        detector.detect_keywords("My grandmother was born in 1920.")
+        self.assertIs(preprocessor.nlp, spacy_models.get_pipeline())
+        self.assertEqual(list(spacy_models.loaded_pipelines())[0], "en_core_web_sm")
+        if preprocessor.nlp is not None:
+            self.assertIs(detector.nlp, preprocessor.nlp)
+
+    def test_missing_model_falls_back_to_shared_blank(self):
+        self.assertIsNone(spacy_models.get_pipeline("no_such_model"))
+        blank = spacy_models.get_pipeline("no_such_model", blank_fallback="en")
+        self.assertIs(blank, spacy_models.get_blank("en"))
+
+if __name__ == '__main__':
+    unittest.main()
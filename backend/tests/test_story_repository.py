@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from app.models.story import Story
+from app.services.story_repository import InMemoryStoryRepository, SQLStoryRepository
+
+def make_story(story_id: str, title: str) -> Story:
+    return Story(id=story_id, title=title, date="Mar 20, 2024", duration_seconds=600,
+                 topics=["Family"], content="...")
+
+class TestInMemoryStoryRepository(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryStoryRepository([make_story("1", "Oldest"), make_story("2", "Newer")])
+
+    def test_lookup_by_id(self):
+        async def run():
+            story = await self.repo.get("2")
+            self.assertEqual(story.title, "Newer")
+            self.assertIsNone(await self.repo.get("999"))
+        asyncio.run(run())
+
+    def test_create_allocates_new_id_newest_first(self):
+        async def run():
+            story = await self.repo.create(title="Newest", date="Mar 25, 2024", duration_seconds=240,
+                                           topics=["General"], content="USER: hi")
+            self.assertEqual(story.id, "3")
+            recent = await self.repo.list_recent()
+            self.assertEqual([s.id for s in recent], ["3", "2", "1"])
+            self.assertEqual(await self.repo.count(), 3)
+        asyncio.run(run())
+
+    def test_list_recent_limit(self):
+        async def run():
+            recent = await self.repo.list_recent(limit=1)
+            self.assertEqual([s.title for s in recent], ["Newer"])
+        asyncio.run(run())
+
+    def test_cursor_pagination(self):
+        async def run():
+            await self.repo.create(title="Newest", date="Mar 25, 2024", duration_seconds=240,
+                                   topics=["General"], content="USER: hi")
+            page = await self.repo.list_recent(limit=2, before="3")
+            self.assertEqual([s.id for s in page], ["2", "1"])
+            self.assertEqual(await self.repo.list_recent(before="1"), [])
+            with self.assertRaises(ValueError):
+                await self.repo.list_recent(before="999")
+        asyncio.run(run())
+
+    def test_projection(self):
+        async def run():
+            rows = await self.repo.list_projected(["id", "title"])
+            self.assertEqual(rows, [{"id": "2", "title": "Newer"}, {"id": "1", "title": "Oldest"}])
+        asyncio.run(run())
+
+    def test_stats_updated_on_create(self):
+        async def run():
+            stats = await self.repo.stats()
+            self.assertEqual((stats.chapters, stats.total_seconds), (2, 1200))
+            story = await self.repo.create(title="Newest", date="Mar 25, 2024", duration_seconds=240,
+                                           topics=["General"], content="USER: hi")
+            self.assertEqual(story.duration, "4 mins")
+            stats = await self.repo.stats()
+            self.assertEqual((stats.chapters, stats.total_seconds), (3, 1440))
+        asyncio.run(run())
+
+class TestSQLStoryRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'stories.db')}"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_seed_keeps_story_ids(self):
+        async def run():
+            seed = [make_story("1", "Oldest"), make_story("2", "Newer"), make_story("5", "Newest seed")]
+            repo = SQLStoryRepository(self.url, seed=seed)
+            self.assertEqual((await repo.get("1")).title, "Oldest")
+            self.assertEqual((await repo.get("5")).title, "Newest seed")
+            memory = InMemoryStoryRepository(seed)
+            story = await repo.create(title="Saved", date="Mar 25, 2024", duration_seconds=240,
+                                      topics=["General"], content="USER: hi")
+            self.assertEqual(story.id, (await memory.create(**story.model_dump(exclude={"id"}))).id)
+            self.assertEqual(story.id, "6")
+            self.assertEqual([s.id for s in await repo.list_recent()], ["6", "5", "2", "1"])
+            await repo.engine.dispose()
+        asyncio.run(run())
+
+    def test_setup_is_idempotent_across_processes(self):
+        from sqlalchemy.dialects import postgresql
+        from app.services.story_repository import _insert_ignoring_conflicts, stories_table
+        seed = [make_story("1", "Oldest"), make_story("2", "Newer")]
+
+        async def run():
+            # Separate engines stand in for separate worker processes
+            first, second = SQLStoryRepository(self.url, seed=seed), SQLStoryRepository(self.url, seed=seed)
+            await first.count()
+            self.assertEqual(await second.count(), 2)
+            self.assertEqual((await second.stats()).chapters, 2)
+            for repo in (first, second):
+                await repo.engine.dispose()
+
+            # The row a concurrent worker inserted first is skipped, not an IntegrityError
+            async with first.engine.begin() as conn:
+                await conn.execute(_insert_ignoring_conflicts(conn, stories_table),
+                                   [SQLStoryRepository._to_row(seed[0], keep_id=True)])
+            await first.engine.dispose()
+            self.assertEqual(await SQLStoryRepository(self.url).count(), 2)
+        asyncio.run(run())
+
+        class PostgresConn:
+            dialect = postgresql.dialect()
+        statement = _insert_ignoring_conflicts(PostgresConn, stories_table)
+        self.assertIn("ON CONFLICT DO NOTHING", str(statement.compile(dialect=postgresql.dialect())))
+
+    def test_schema_comes_from_migrations(self):
+        import sqlite3
+        async def run():
+            repo = SQLStoryRepository(self.url, seed=[make_story("1", "Oldest")])
+            self.assertEqual((await repo.stats()).chapters, 1)
+            await repo.engine.dispose()
+        asyncio.run(run())
+        with sqlite3.connect(os.path.join(self.tmp.name, "stories.db")) as db:
+            self.assertEqual(db.execute("SELECT version_num FROM alembic_version").fetchall(), [("0001",)])
+
+if __name__ == '__main__':
+    unittest.main()
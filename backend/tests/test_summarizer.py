@@ -0,0 +1,41 @@
+import unittest
+from app.models.conversation import Role, Turn
+from app.services.conversation_manager import ConversationContext
+from app.services.nlp.summarizer import RollingSummary
+
+class TestRollingSummary(unittest.TestCase):
+    def test_old_points_are_compacted_not_dropped(self):
+        summary = RollingSummary(max_points=2, head_size=5)
+        summary.add(Turn(Role.USER, "I was born in Ohio in 1952. It snowed."))
+        summary.add(Turn(Role.AI, "Tell me more."))  # interviewer turns are skipped
+        for i in range(30):
+            summary.add(Turn(Role.USER, f"Later story number {i}."))
+
+        self.assertEqual(summary.to_list(), ["Later story number 28.", "Later story number 29."])
+        terms = summary.head_terms()
+        self.assertIn("ohio", summary.head)  # the first turn is still represented
+        self.assertEqual(terms[:2], ["Later", "story"])  # most mentioned first
+        self.assertEqual(len(terms), 5)
+        self.assertIn("Earlier in the session", summary.text())
+
+    def test_head_is_bounded(self):
+        summary = RollingSummary(max_points=1, max_head_terms=10)
+        for i in range(50):
+            summary.add(Turn(Role.USER, f"Visited town{i} with Grandma."))
+        self.assertEqual(len(summary.head), 10)
+        self.assertEqual(summary.head_terms()[:2], ["Visited", "Grandma"])
+
+    def test_round_trip_and_legacy_lists(self):
+        ctx = ConversationContext("user_1", session_id="s1")
+        ctx.summary = RollingSummary(max_points=1)
+        ctx.summary.add(Turn(Role.USER, "We lived in Ohio."))
+        ctx.summary.add(Turn(Role.USER, "Then Chicago."))
+        restored = ConversationContext.from_dict(ctx.to_dict()).summary
+        self.assertEqual(restored.to_dict(), ctx.summary.to_dict())
+        self.assertIn("Ohio", restored.text())
+
+        legacy = RollingSummary.from_data(["I was born in Ohio."])
+        self.assertEqual(legacy.to_list(), ["I was born in Ohio."])
+
+if __name__ == '__main__':
+    unittest.main()
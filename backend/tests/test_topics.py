@@ -1,5 +1,8 @@
 import unittest
-from app.services.nlp.topics import TopicModeler
+import os
+import tempfile
+from unittest import mock
+from app.services.nlp.topics import BowCorpus, TopicModeler
 
 class TestTopicModeler(unittest.TestCase):
     @classmethod
@@ -33,5 +36,190 @@ class TestTopicModeler(unittest.TestCase):
         self.assertEqual(len(display), 2)
         self.assertIn("words", display[0])
 
+    def test_update_folds_in_new_documents(self):
+        modeler = TopicModeler(num_topics=2)
+        modeler.train(self.docs)
+        updates_before = modeler.lda_model.num_updates
+        # "plane" is unknown to the fixed dictionary and is ignored
+        modeler.update([["apple", "fruit", "plane"], ["car", "drive"]], passes=2)
+        self.assertEqual(modeler.lda_model.num_updates, updates_before + 4)
+        self.assertNotIn("plane", modeler.dictionary.token2id)
+
+    def test_update_without_model_trains(self):
+        modeler = TopicModeler(num_topics=2)
+        modeler.update(self.docs)
+        self.assertIsNotNone(modeler.lda_model)
+
+class TestStreamedTraining(unittest.TestCase):
+    def setUp(self):
+        self.docs = [
+            ["apple", "banana", "fruit"],
+            ["apple", "orange", "fruit"],
+            ["car", "bus", "drive"],
+            ["car", "truck", "drive"],
+            ["apple", "banana", "fruit"],
+            ["car", "bus", "drive"]
+        ]
+
+    def test_corpus_is_reiterable(self):
+        from gensim import corpora
+        dictionary = corpora.Dictionary(self.docs)
+        corpus = BowCorpus(lambda: iter(self.docs), dictionary)
+        self.assertEqual(list(corpus), list(corpus))
+        self.assertEqual(len(list(corpus)), 6)
+
+    def test_train_from_generator_factory(self):
+        modeler = TopicModeler(num_topics=2, passes=2)
+        reported = []
+        modeler.train(lambda: (doc for doc in self.docs), progress=lambda f, m: reported.append(f))
+        self.assertEqual(modeler.dictionary.num_docs, 6)
+        self.assertEqual(reported, [0.5, 1.0])
+
+    def test_rejects_one_shot_iterators(self):
+        for workers in (1, 2):
+            with self.assertRaises(TypeError):
+                TopicModeler(num_topics=2, workers=workers).train(doc for doc in self.docs)
+        modeler = TopicModeler(num_topics=2, passes=1)
+        modeler.train(self.docs)
+        with self.assertRaises(TypeError):
+            modeler.update(iter(self.docs))
+        modeler.update(lambda: iter(self.docs), passes=2)
+
+    def test_multicore(self):
+        modeler = TopicModeler(num_topics=2, workers=2, passes=2)
+        reported = []
+        modeler.train(self.docs, progress=lambda f, m: reported.append(f))
+        self.assertEqual(reported, [0.5, 1.0])
+        self.assertEqual(len(modeler.get_topics_display()), 2)
+        modeler.update([["apple", "fruit"]])
+        self.assertTrue(modeler.get_topic_for_document(["apple", "fruit"]))
+
+class TestBatchInference(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.modeler = TopicModeler(num_topics=2, model_dir=cls.tmp.name)
+        cls.modeler.train([
+            ["school", "teacher", "play"],
+            ["school", "play", "kid"],
+            ["war", "army", "soldier"],
+            ["war", "soldier", "fight"],
+            ["school", "teacher", "kid"],
+            ["army", "fight", "war"]
+        ])
+        cls.docs = [["school", "kid"], ["war", "army"], [], ["teacher", "play", "school"]] * 5
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def dominant(self, assignments):
+        best = {}
+        for doc, topic, prob in zip(assignments.doc.tolist(), assignments.topic.tolist(), assignments.prob.tolist()):
+            if prob > best.get(doc, (None, 0.0))[1]:
+                best[doc] = (self.modeler.labels[topic], prob)
+        return [best[i][0] for i in range(len(self.docs))]
+
+    def test_matches_single_document_inference(self):
+        assignments = self.modeler.get_topics_for_documents(iter(self.docs), chunksize=3)
+        self.assertEqual(assignments.doc.dtype, "int64")
+        self.assertEqual(assignments.topic.dtype, "int32")
+        self.assertEqual(assignments.prob.dtype, "float32")
+        self.assertTrue((assignments.doc[:-1] <= assignments.doc[1:]).all())
+        expected = [self.modeler.get_topic_for_document(doc)[0][0] for doc in self.docs]
+        self.assertEqual(self.dominant(assignments), expected)
+
+    def test_process_pool(self):
+        expected = self.dominant(self.modeler.get_topics_for_documents(self.docs))
+        # Pickled model, then the saved (memory-mapped) version
+        self.assertEqual(self.dominant(self.modeler.get_topics_for_documents(self.docs, chunksize=4, workers=2)), expected)
+        self.modeler.save()
+        self.assertEqual(self.dominant(self.modeler.get_topics_for_documents(self.docs, chunksize=4, workers=2)), expected)
+
+    def test_empty_and_untrained(self):
+        self.assertEqual(len(self.modeler.get_topics_for_documents([]).doc), 0)
+        self.assertEqual(len(TopicModeler().get_topics_for_documents(self.docs).prob), 0)
+
+class TestTopicPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_dir = os.path.join(self.tmp.name, "topics")
+        self.docs = [
+            ["school", "teacher", "play"],
+            ["school", "play", "kid"],
+            ["war", "army", "soldier"],
+            ["war", "soldier", "fight"],
+            ["school", "teacher", "kid"],
+            ["army", "fight", "war"]
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        modeler = TopicModeler(num_topics=2, model_dir=self.model_dir, keep_versions=2)
+        modeler.train(self.docs)
+        modeler.save()
+        modeler.save()
+        modeler.save()
+        self.assertEqual(modeler.version, 3)
+        self.assertEqual(modeler.versions(), [2, 3])
+
+        loaded = TopicModeler(model_dir=self.model_dir)
+        self.assertEqual(loaded.version, 3)
+        self.assertEqual(loaded.num_topics, 2)
+        self.assertEqual(loaded.get_topics_display(), modeler.get_topics_display())
+        self.assertFalse(loaded.lda_model.expElogbeta.flags.writeable)  # memory-mapped
+        self.assertEqual(loaded.get_topic_for_document(["war", "soldier"]),
+                         modeler.get_topic_for_document(["war", "soldier"]))
+
+        # Online updates work on the read-only mapped arrays
+        loaded.update([["school", "kid", "teacher"]])
+        loaded.save()
+        self.assertEqual(loaded.version, 4)
+
+    def test_concurrent_saves_claim_distinct_versions(self):
+        first = TopicModeler(num_topics=2, model_dir=self.model_dir)
+        first.train(self.docs)
+        second = TopicModeler(num_topics=2, model_dir=self.model_dir)
+        second.train(self.docs)
+        # Both saw v1 as the newest version before either finished writing
+        with mock.patch.object(TopicModeler, "versions", return_value=[]):
+            first.save()
+            second.save()
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertEqual(TopicModeler(model_dir=self.model_dir).version, 2)
+        self.assertEqual(sorted(os.listdir(self.model_dir)), ["CURRENT", "v1", "v2"])
+
+    def test_save_errors_propagate(self):
+        modeler = TopicModeler(num_topics=2, model_dir=self.model_dir)
+        modeler.train(self.docs)
+        with mock.patch.object(modeler.lda_model, "save", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                modeler.save()
+        # Nothing half-written is left behind, and the number is free again
+        self.assertEqual(os.listdir(self.model_dir), [])
+        modeler.save()
+        self.assertEqual(modeler.version, 1)
+
+    def test_labels_computed_once_per_model(self):
+        modeler = TopicModeler(num_topics=2)
+        modeler.train(self.docs)
+        labels = {label for label, _ in modeler._topics}
+        self.assertTrue(labels & {"Childhood", "Wartime"})
+        with mock.patch.object(modeler.lda_model, "show_topic") as show_topic, \
+                mock.patch.object(modeler.lda_model, "get_topics") as get_topics:
+            for _ in range(5):
+                modeler.get_topic_for_document(["war", "army"])
+            modeler.get_topics_display()
+        show_topic.assert_not_called()
+        get_topics.assert_not_called()
+
+    def test_missing_model_dir(self):
+        modeler = TopicModeler(model_dir=self.model_dir)
+        self.assertIsNone(modeler.lda_model)
+        self.assertEqual(modeler.versions(), [])
+        self.assertEqual(modeler.get_topic_for_document(["war"]), [("Uncategorized", 1.0)])
+
 if __name__ == '__main__':
     unittest.main()
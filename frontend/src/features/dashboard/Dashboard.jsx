@@ -23,6 +23,9 @@ const Dashboard = () => {
   const [stats, setStats] = React.useState([]);
   const [timelineEvents, setTimelineEvents] = React.useState([]);
   const [stories, setStories] = React.useState([]);
+  // Cursor for the next page of stories; null once the archive is exhausted
+  const [nextCursor, setNextCursor] = React.useState(null);
+  const [loadingMore, setLoadingMore] = React.useState(false);
 
   // Icon mapping
   const iconMap = {
@@ -31,16 +34,35 @@ const Dashboard = () => {
     "Users": Users
   };
 
+  const fetchStories = (cursor) => axios.get('http://localhost:8000/api/v1/stories', {
+    params: { fields: 'id,title,date,duration,topics', ...(cursor && { cursor }) }
+  });
+
+  const loadMoreStories = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetchStories(nextCursor);
+      setStories(prev => [...prev, ...res.data.items]);
+      setNextCursor(res.data.next_cursor);
+    } catch (error) {
+      console.error("Failed to fetch more stories", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   React.useEffect(() => {
     const fetchDashboardData = async () => {
       try {
         const [storiesRes, statsRes, timelineRes] = await Promise.all([
-          axios.get('http://localhost:8000/api/v1/stories'),
+          fetchStories(),
           axios.get('http://localhost:8000/api/v1/dashboard/stats'),
           axios.get('http://localhost:8000/api/v1/dashboard/timeline')
         ]);
         
-        setStories(storiesRes.data);
+        setStories(storiesRes.data.items);
+        setNextCursor(storiesRes.data.next_cursor);
         
         // Transform stats to include components
         const transformedStats = statsRes.data.map(stat => ({
@@ -151,6 +173,15 @@ const Dashboard = () => {
                   </PerspectiveCard>
                 </Link>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={loadMoreStories}
+                  disabled={loadingMore}
+                  className="w-full py-5 bg-white shadow-premium rounded-3xl text-brand font-bold border border-white hover:border-brand/20 transition-all disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more stories'}
+                </button>
+              )}
            </div>
         </div>
 